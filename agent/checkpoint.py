@@ -0,0 +1,187 @@
+"""Durable, incremental per-session checkpoints in a SQLite file.
+
+Sessions used to live only in an in-memory dict that was rebuilt with a
+``deepcopy`` every turn, so a restart lost every conversation in progress.
+:class:`SessionCheckpointer` persists each session as
+
+* ``session_slots``: one row per state key (film, jadwal, kursi, ...), written
+  only when that slot's value changed during the turn;
+* ``session_messages``: the message log, append-only (``seq`` = position).
+
+Saving a turn therefore costs O(changed slots + new messages), not O(history).
+Values are JSON (datetimes tagged), messages use LangChain's ``message_to_dict``.
+
+This is an application-level store, not a LangGraph checkpointer: each turn
+is a fresh graph run seeded from the loaded state. The methods are blocking
+(plain ``sqlite3``); async callers run them with ``asyncio.to_thread``.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional
+
+from langchain_core.messages import AnyMessage, message_to_dict, messages_from_dict
+
+DEFAULT_CHECKPOINT_PATH = "tiketa_sessions.db"
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    raise TypeError(f"Tidak bisa diserialisasi: {type(value).__name__}")
+
+
+def _object_hook(value: Dict[str, Any]) -> Any:
+    if len(value) == 1 and "__datetime__" in value:
+        return datetime.fromisoformat(value["__datetime__"])
+    return value
+
+
+def dump_value(value: Any) -> str:
+    return json.dumps(value, default=_default, ensure_ascii=False)
+
+
+def load_value(payload: str) -> Any:
+    return json.loads(payload, object_hook=_object_hook)
+
+
+def dump_state(state: Mapping[str, Any]) -> str:
+    """Whole session state as one JSON document (same encoding as the checkpoint rows)."""
+    data = {key: value for key, value in state.items() if key != "messages"}
+    data["messages"] = [message_to_dict(message) for message in state.get("messages") or []]
+    return dump_value(data)
+
+
+def load_state(payload: str) -> Dict[str, Any]:
+    state = load_value(payload)
+    state["messages"] = messages_from_dict(state.get("messages") or [])
+    return state
+
+
+class SessionCheckpointer:
+    """Stores session slot deltas and an append-only message log in SQLite."""
+
+    def __init__(self, path: str = DEFAULT_CHECKPOINT_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                message_count INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS session_slots (
+                session_id TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (session_id, key)
+            );
+            CREATE TABLE IF NOT EXISTS session_messages (
+                session_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (session_id, seq)
+            );
+            """
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Rebuild the full state of ``session_id``, or ``None`` if it was never saved."""
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)).fetchone() is None:
+                return None
+            slots = self._conn.execute(
+                "SELECT key, value FROM session_slots WHERE session_id = ?", (session_id,)
+            ).fetchall()
+            payloads = self._conn.execute(
+                "SELECT payload FROM session_messages WHERE session_id = ? ORDER BY seq", (session_id,)
+            ).fetchall()
+        state: Dict[str, Any] = {key: load_value(value) for key, value in slots}
+        state["messages"] = messages_from_dict([json.loads(payload) for (payload,) in payloads])
+        return state
+
+    def save(
+        self,
+        session_id: str,
+        state: Mapping[str, Any],
+        previous: Optional[Mapping[str, Any]] = None,
+        known_messages: Optional[int] = None,
+    ) -> int:
+        """Persist what changed since ``previous`` (the state the turn started from).
+
+        ``known_messages`` is the number of messages already stored; it defaults to
+        ``len(previous["messages"])`` and must be given when that list was appended
+        to in place during the turn.
+
+        Returns the number of rows written.
+        """
+        previous = previous or {}
+        messages: List[AnyMessage] = state.get("messages") or []
+        known = len(previous.get("messages") or []) if known_messages is None else known_messages
+        rewrite = known > len(messages)
+        if rewrite:
+            # Riwayat dipendekkan (mis. sesi di-reset): tulis ulang seluruhnya.
+            known = 0
+        changed = [
+            (session_id, key, dump_value(value))
+            for key, value in state.items()
+            if key != "messages" and (rewrite or key not in previous or previous[key] != value)
+        ]
+        appended = [
+            (session_id, seq, json.dumps(message_to_dict(message), default=_default, ensure_ascii=False))
+            for seq, message in enumerate(messages[known:], start=known)
+        ]
+        with self._lock, self._conn:
+            if rewrite:
+                self._conn.execute("DELETE FROM session_messages WHERE session_id = ?", (session_id,))
+                self._conn.execute("DELETE FROM session_slots WHERE session_id = ?", (session_id,))
+            self._conn.execute(
+                "INSERT INTO sessions (session_id, message_count, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET message_count = excluded.message_count, "
+                "updated_at = excluded.updated_at",
+                (session_id, len(messages), time.time()),
+            )
+            if changed:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO session_slots (session_id, key, value) VALUES (?, ?, ?)", changed
+                )
+            if appended:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO session_messages (session_id, seq, payload) VALUES (?, ?, ?)", appended
+                )
+        return len(changed) + len(appended)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock, self._conn:
+            for table in ("session_messages", "session_slots", "sessions"):
+                self._conn.execute(f"DELETE FROM {table} WHERE session_id = ?", (session_id,))
+
+    def session_ids(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT session_id FROM sessions ORDER BY updated_at")]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_session_checkpointer() -> Optional[SessionCheckpointer]:
+    """Build the checkpointer from ``TIKETA_CHECKPOINT_PATH`` (``off`` disables it)."""
+    path = os.getenv("TIKETA_CHECKPOINT_PATH", DEFAULT_CHECKPOINT_PATH)
+    if not path or path.lower() in {"off", "none", "0"}:
+        return None
+    return SessionCheckpointer(path)
@@ -0,0 +1,175 @@
+"""Bounded prompt construction for the browsing LLM calls.
+
+``TicketAgentState.messages`` only ever grows, so sending it verbatim makes
+every turn slower than the last. :func:`build_context` assembles the prompt
+from three parts instead:
+
+* a system message with the structured slots already in state (film, jadwal,
+  kursi, nama, pertanyaan terakhir) and a rolling summary of older turns;
+* a sliding window of the most recent turns (a turn starts at a
+  ``HumanMessage``, so tool calls and their results are never split);
+* a token budget: when exceeded, the oldest window turn is folded into the
+  summary, and bulky tool output outside the latest turn is clipped.
+
+The summary is extractive (no extra LLM call) and incremental: state keeps
+``conversation_summary`` plus ``summarized_message_count``, so each call only
+summarizes the turns that just left the window.
+"""
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, List, Mapping, Optional, Sequence
+
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, SystemMessage, ToolMessage
+
+DEFAULT_TOKEN_BUDGET = 3000
+DEFAULT_WINDOW_TURNS = 4
+MAX_SUMMARY_CHARS = 1500
+OLD_TOOL_OUTPUT_CHARS = 300
+MIN_TOOL_OUTPUT_CHARS = 120
+SUMMARY_SNIPPET_CHARS = 160
+
+SLOT_LABELS = {
+    "movie_title": "Film",
+    "current_movie_id": "ID film",
+    "current_showtime_id": "ID jadwal",
+    "selected_seats": "Kursi dipilih",
+    "user_name": "Nama pemesan",
+    "current_question": "Pertanyaan terakhir",
+}
+
+
+@dataclass
+class PromptContext:
+    messages: List[AnyMessage]
+    summary: str
+    summarized_count: int
+    estimated_tokens: int
+
+
+def message_text(message: AnyMessage) -> str:
+    content = getattr(message, "content", "")
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        parts = [part.get("text", "") if isinstance(part, dict) else str(part) for part in content]
+        return " ".join(p for p in parts if p)
+    return str(content)
+
+
+def estimate_tokens(message: AnyMessage) -> int:
+    """Rough token estimate (~4 characters per token) including tool-call args."""
+    size = len(message_text(message))
+    for call in getattr(message, "tool_calls", None) or []:
+        size += len(json.dumps(call.get("args", {}), default=str)) + len(call.get("name") or "")
+    return size // 4 + 4
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 3].rstrip() + "..."
+
+
+def _summarize(messages: Sequence[AnyMessage]) -> List[str]:
+    lines = []
+    user_text: Optional[str] = None
+    tools: List[str] = []
+    reply: Optional[str] = None
+
+    def flush() -> None:
+        if user_text is None and reply is None:
+            return
+        line = f"- Pengguna: {_clip(user_text or '-', SUMMARY_SNIPPET_CHARS)}"
+        if tools:
+            line += f" [tool: {', '.join(dict.fromkeys(tools))}]"
+        if reply:
+            line += f" | Asisten: {_clip(reply, SUMMARY_SNIPPET_CHARS)}"
+        lines.append(line)
+
+    for message in messages:
+        if isinstance(message, HumanMessage):
+            flush()
+            user_text, tools, reply = message_text(message), [], None
+        elif isinstance(message, ToolMessage):
+            tools.append(message.name or "tool")
+        elif isinstance(message, AIMessage) and message_text(message).strip():
+            reply = message_text(message)
+    flush()
+    return lines
+
+
+def extend_summary(summary: str, messages: Sequence[AnyMessage]) -> str:
+    """Append the given (older) messages to the rolling summary, keeping its tail."""
+    lines = [line for line in (summary or "").splitlines() if line] + _summarize(messages)
+    while lines and sum(len(line) + 1 for line in lines) > MAX_SUMMARY_CHARS:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def _header(state: Mapping[str, Any], summary: str) -> SystemMessage:
+    parts = ["Anda adalah asisten bioskop Tiketa. Jawab dalam Bahasa Indonesia yang ramah dan ringkas."]
+    slots = []
+    for key, label in SLOT_LABELS.items():
+        value = state.get(key)
+        if value in (None, "", []):
+            continue
+        if isinstance(value, list):
+            value = ", ".join(str(v) for v in value)
+        slots.append(f"- {label}: {value}")
+    if slots:
+        parts.append("Data pemesanan saat ini:\n" + "\n".join(slots))
+    if summary:
+        parts.append("Ringkasan percakapan sebelumnya:\n" + summary)
+    return SystemMessage(content="\n\n".join(parts))
+
+
+def _window(messages: Sequence[AnyMessage], latest_start: int, offset: int, tool_limit: int) -> List[AnyMessage]:
+    window: List[AnyMessage] = []
+    for idx, message in enumerate(messages, start=offset):
+        text = message_text(message)
+        if isinstance(message, ToolMessage) and idx < latest_start and len(text) > tool_limit:
+            message = message.model_copy(update={"content": _clip(text, tool_limit)})
+        window.append(message)
+    return window
+
+
+def build_context(
+    state: Mapping[str, Any],
+    token_budget: Optional[int] = None,
+    window_turns: Optional[int] = None,
+) -> PromptContext:
+    """Build a bounded prompt for ``state`` (see module docstring)."""
+    # Env dibaca per panggilan (bukan saat import) supaya bisa diubah tanpa reload modul.
+    budget = token_budget or int(os.getenv("TIKETA_CONTEXT_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
+    max_turns = max(window_turns or int(os.getenv("TIKETA_CONTEXT_WINDOW_TURNS", DEFAULT_WINDOW_TURNS)), 1)
+    messages: Sequence[AnyMessage] = state.get("messages") or []
+    done = min(state.get("summarized_message_count") or 0, len(messages))
+    summary = state.get("conversation_summary") or ""
+
+    starts = [idx for idx in range(done, len(messages)) if isinstance(messages[idx], HumanMessage)]
+    latest_start = starts[-1] if starts else done
+    if len(starts) > max_turns:
+        keep_from = starts[-max_turns]
+        summary = extend_summary(summary, messages[done:keep_from])
+        done = keep_from
+
+    tool_limit = OLD_TOOL_OUTPUT_CHARS
+    while True:
+        header = _header(state, summary)
+        window = _window(messages[done:], latest_start, done, tool_limit)
+        total = estimate_tokens(header) + sum(estimate_tokens(m) for m in window)
+        if total <= budget:
+            break
+        later_starts = [idx for idx in starts if done < idx]
+        if later_starts:
+            summary = extend_summary(summary, messages[done : later_starts[0]])
+            done = later_starts[0]
+        elif tool_limit > MIN_TOOL_OUTPUT_CHARS:
+            tool_limit = MIN_TOOL_OUTPUT_CHARS
+        else:
+            # Giliran terakhir sendiri sudah melebihi budget; kirim apa adanya.
+            break
+
+    return PromptContext([header] + window, summary, done, total)
@@ -0,0 +1,163 @@
+"""Deterministic pre-classifier that answers trivial turns without the LLM.
+
+When the assistant has just asked a specific question (``current_question``)
+and the user's reply is fully explained by that question -- "ya", "D7, D8",
+"yang kedua", "2", "jam 7 malam" -- the intent and entities are already known.
+:func:`fast_classify` recognises those replies and returns the state updates
+``node_classify_intent`` would have produced, so the Gemini round trip can be
+skipped. Anything it is not sure about returns ``None`` and goes to the LLM.
+"""
+from __future__ import annotations
+
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Mapping, Optional
+
+from agent.showtime_resolver import ORDINAL_WORDS, parse_time_constraint, showtime_index_for
+from agent.title_index import title_index_for
+from data.seats import ALL_VALID_SEATS
+from db.catalogue import catalogue
+
+YES_WORDS = {"ya", "iyah", "iya", "yes", "ok", "oke", "sip", "lanjut", "gas"}
+NO_WORDS = {"tidak", "gak", "ga", "enggak", "no", "ntar", "nanti", "belum"}
+
+# Kata pengisi yang boleh menemani jawaban singkat tanpa mengubah maknanya.
+FILLER_WORDS = {
+    "yang", "mau", "ambil", "pilih", "kursi", "kursinya", "seat", "dan", "sama", "aja", "saja",
+    "deh", "dong", "ya", "nomor", "no", "itu", "ini", "film", "filmnya", "jadwal", "jam", "pukul",
+}
+
+MAX_SHORT_REPLY_WORDS = 5
+MIN_TITLE_CONFIDENCE = 0.9
+
+NAME_PATTERN = re.compile(r"^(?:atas nama|nama saya|namaku|nama aku|nama)\s+([a-z][a-z .'-]{0,40})$")
+
+fast_path_stats: Counter = Counter()
+
+
+@dataclass(frozen=True)
+class FastPathResult:
+    path: str
+    updates: Dict[str, Any] = field(default_factory=dict)
+
+
+def normalize_reply(raw_text: Optional[str]) -> str:
+    """Lowercase, collapse whitespace and strip trailing punctuation ("Oke!" -> "oke")."""
+    return re.sub(r"\s+", " ", (raw_text or "").strip().lower()).strip(" .,!?")
+
+
+def detect_confirmation(raw_text: Optional[str]) -> Optional[bool]:
+    """``True``/``False`` for a yes/no reply, ``None`` otherwise.
+
+    Shared by the fast path and the router, so a reply is never fast-pathed
+    as a confirmation and then read differently by ``main_router``.
+    """
+    text = normalize_reply(raw_text)
+    if text in YES_WORDS:
+        return True
+    if text in NO_WORDS:
+        return False
+    return None
+
+
+def _words(text: str) -> list[str]:
+    return re.findall(r"[a-z0-9']+", text)
+
+
+def _confirmation(text: str, state: Mapping[str, Any]) -> Optional[FastPathResult]:
+    if detect_confirmation(text) is None:
+        return None
+    prior = state.get("intent")
+    # Router membaca jawaban ya/tidak langsung dari pesan terakhir.
+    return FastPathResult("confirmation", {"intent": prior if prior and prior != "other" else "booking"})
+
+
+def _seats(raw_text: str) -> Optional[FastPathResult]:
+    tokens = re.findall(r"[A-Za-z]+[0-9]*|[0-9]+", raw_text)
+    seats = []
+    for token in tokens:
+        upper = token.upper()
+        if upper in ALL_VALID_SEATS:
+            if upper not in seats:
+                seats.append(upper)
+        elif token.lower() not in FILLER_WORDS:
+            return None
+    if not seats:
+        return None
+    return FastPathResult("seats", {"selected_seats": seats, "intent": "answering_question"})
+
+
+def _movie(text: str, state: Mapping[str, Any]) -> Optional[FastPathResult]:
+    candidates = catalogue.movie_dicts(state.get("candidate_movie_ids"))
+    words = _words(text)
+    if not candidates or not words or len(words) > MAX_SHORT_REPLY_WORDS:
+        return None
+    movie = None
+    content = [w for w in words if w not in FILLER_WORDS]
+    if len(content) == 1 and content[0].isdigit():
+        position = int(content[0])
+        if 1 <= position <= len(candidates):
+            movie = candidates[position - 1]
+    elif len(content) == 1 and content[0] in ORDINAL_WORDS:
+        position = ORDINAL_WORDS[content[0]]
+        if position < len(candidates):
+            movie = candidates[position]
+    else:
+        match = title_index_for(candidates).resolve(text)
+        if match and match.confidence >= MIN_TITLE_CONFIDENCE:
+            movie = {"id": match.movie_id, "title": match.title}
+    if not movie or movie.get("id") is None:
+        return None
+    return FastPathResult(
+        "movie",
+        {"current_movie_id": movie["id"], "movie_title": movie.get("title"), "intent": "answering_question"},
+    )
+
+
+def _showtime(text: str, state: Mapping[str, Any]) -> Optional[FastPathResult]:
+    showtimes = catalogue.showtime_dicts(state.get("available_showtime_ids"))
+    words = _words(text)
+    if not showtimes or not words or len(words) > MAX_SHORT_REPLY_WORDS:
+        return None
+    constraint = parse_time_constraint(text)
+    strong = constraint.ordinal is not None or constraint.showtime_ids or constraint.exact_times or (
+        constraint.hours and ("jam" in words or "pukul" in words)
+    )
+    if not strong:
+        return None
+    match = showtime_index_for(showtimes).resolve(constraint)
+    if not match or match.get("id") is None:
+        return None
+    updates: Dict[str, Any] = {"current_showtime_id": match["id"], "intent": "answering_question"}
+    if match.get("movie_id") and not state.get("current_movie_id"):
+        updates["current_movie_id"] = match["movie_id"]
+    return FastPathResult("showtime", updates)
+
+
+def _name(text: str) -> Optional[FastPathResult]:
+    match = NAME_PATTERN.match(text)
+    if not match:
+        return None
+    name = " ".join(part.capitalize() for part in match.group(1).split())
+    return FastPathResult("name", {"user_name": name, "intent": "answering_question"})
+
+
+def fast_classify(raw_text: str, state: Mapping[str, Any]) -> Optional[FastPathResult]:
+    """Classify ``raw_text`` without the LLM when the pending question makes it unambiguous."""
+    question = state.get("current_question")
+    text = normalize_reply(raw_text)
+    result: Optional[FastPathResult] = None
+    if question and text:
+        if question == "ask_confirmation":
+            result = _confirmation(text, state)
+        elif question == "ask_seats":
+            result = _seats(raw_text)
+        elif question == "ask_movie":
+            result = _movie(text, state)
+        elif question == "ask_showtime":
+            result = _showtime(text, state)
+        elif question == "ask_name":
+            result = _name(text)
+    fast_path_stats[result.path if result else "llm"] += 1
+    return result
@@ -0,0 +1,92 @@
+"""Offline rendering of the workflow graph, cached by graph topology.
+
+``draw_mermaid_png()`` renders through the remote mermaid.ink service by
+default, which is slow and fails in network-isolated containers. This module
+renders explicitly, on request, and never touches the network:
+
+* ``mermaid`` (default): Mermaid source text from ``draw_mermaid()``;
+* ``png``: a local Graphviz render via ``draw_png()`` (needs ``pygraphviz``).
+
+The output is regenerated only when the topology changes. A sha256 over the
+sorted nodes and edges is stored next to the output (``<output>.sha256``).
+
+Usage::
+
+    python -m agent.graph_render [--format mermaid|png] [--output PATH] [--force]
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+from typing import Any, Optional
+
+DEFAULT_OUTPUTS = {"mermaid": "workflow_graph.mmd", "png": "workflow_graph.png"}
+
+
+def graph_signature(graph: Any) -> str:
+    """Stable hash of a drawable graph's nodes and edges."""
+    nodes = sorted(str(node_id) for node_id in graph.nodes)
+    edges = sorted(
+        (str(edge.source), str(edge.target), bool(edge.conditional), str(edge.data or ""))
+        for edge in graph.edges
+    )
+    payload = json.dumps({"nodes": nodes, "edges": edges}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _read_cached_signature(output: str) -> Optional[str]:
+    try:
+        with open(output + ".sha256", "r", encoding="utf-8") as handle:
+            return handle.read().strip()
+    except OSError:
+        return None
+
+
+def render_graph(app: Any, fmt: str = "mermaid", output: Optional[str] = None, force: bool = False) -> bool:
+    """Render ``app``'s graph to ``output``; return ``False`` when the cached file is still current."""
+    if fmt not in DEFAULT_OUTPUTS:
+        raise ValueError(f"Format tidak dikenal: {fmt} (pilih {', '.join(DEFAULT_OUTPUTS)})")
+    output = output or DEFAULT_OUTPUTS[fmt]
+    graph = app.get_graph()
+    signature = graph_signature(graph)
+    if not force and os.path.exists(output) and _read_cached_signature(output) == signature:
+        return False
+
+    if fmt == "mermaid":
+        with open(output, "w", encoding="utf-8") as handle:
+            handle.write(graph.draw_mermaid())
+    else:
+        # Render lokal lewat Graphviz; sengaja tidak memakai draw_mermaid_png (API remote).
+        graph.draw_png(output)
+    with open(output + ".sha256", "w", encoding="utf-8") as handle:
+        handle.write(signature + "\n")
+    return True
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Render graph workflow Tiketa secara offline.")
+    parser.add_argument("--format", choices=sorted(DEFAULT_OUTPUTS), default="mermaid")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--force", action="store_true", help="Render ulang walaupun topologi tidak berubah.")
+    args = parser.parse_args(argv)
+
+    from run_tiketa import compile_apps
+
+    app, _ = compile_apps()
+    output = args.output or DEFAULT_OUTPUTS[args.format]
+    try:
+        rendered = render_graph(app, args.format, output, force=args.force)
+    except ImportError as exc:
+        print(f"Gagal render {args.format} ({exc}) Pasang 'pygraphviz' atau gunakan --format mermaid.")
+        return 1
+    if rendered:
+        print(f"Graph workflow disimpan ke '{output}'.")
+    else:
+        print(f"'{output}' masih sesuai topologi graph, tidak dirender ulang.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
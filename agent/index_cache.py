@@ -0,0 +1,59 @@
+"""Shared memo for the per-candidate-list resolver indexes.
+
+:func:`agent.title_index.title_index_for` and
+:func:`agent.showtime_resolver.showtime_index_for` build an index over the
+candidates listed to one user. Sessions that list the same films or showtimes
+share it. The key is the catalogue version plus the candidate ids: titles and
+times behind an id only change through a catalogue write, and every such write
+bumps :attr:`db.catalogue.Catalogue.version`, so hashing ids is enough and an
+edit can never be answered from an old index.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Sequence, Tuple, TypeVar
+
+from db.catalogue import catalogue
+
+DEFAULT_MAX_INDEXES = 128
+
+IndexT = TypeVar("IndexT")
+
+
+class CatalogueIndexCache(Generic[IndexT]):
+    """LRU of indexes keyed on ``(catalogue.version, candidate ids)``."""
+
+    def __init__(self, build: Callable[[Sequence[dict]], IndexT], maxsize: int = DEFAULT_MAX_INDEXES):
+        self._build = build
+        self.maxsize = maxsize
+        self._indexes: "OrderedDict[Tuple[int, Tuple[Hashable, ...]], IndexT]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, items: Sequence[dict]) -> IndexT:
+        key = (catalogue.version, tuple(item.get("id") for item in items))
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+                self._hits += 1
+                return index
+            self._misses += 1
+        # Dibangun di luar lock; kalau dua thread membangun bersamaan, yang terakhir menang.
+        index = self._build(items)
+        with self._lock:
+            self._indexes[key] = index
+            self._indexes.move_to_end(key)
+            while len(self._indexes) > self.maxsize:
+                self._indexes.popitem(last=False)
+        return index
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._indexes), "hits": self._hits, "misses": self._misses}
@@ -0,0 +1,211 @@
+"""Response cache for the intent classifier LLM call.
+
+The classifier prompt only depends on the user's message, so identical (after
+normalization) messages asked in the same conversational context always yield
+the same extraction. :class:`ClassifierCache` stores the extracted tool-call
+arguments keyed by normalized text plus context, with LRU eviction in the
+backend, TTL expiry on read, and hit/miss counters. Backends are pluggable:
+:class:`MemoryBackend` for a single process, :class:`SqliteBackend` for a cache
+file that survives restarts.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Mapping, Optional, Protocol, Tuple
+
+DEFAULT_MAX_ENTRIES = 2048
+DEFAULT_TTL_SECONDS = 6 * 60 * 60
+
+
+def normalize_message(text: Optional[str]) -> str:
+    text = re.sub(r"\s+", " ", (text or "").strip().lower())
+    return text.strip(" .,!?")
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> Optional[Tuple[Any, float]]: ...
+
+    def set(self, key: str, value: Any, stored_at: float) -> int: ...
+
+    def delete(self, key: str) -> None: ...
+
+    def clear(self) -> None: ...
+
+    def __len__(self) -> int: ...
+
+
+class MemoryBackend:
+    """LRU dictionary bounded by ``max_entries``."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                self._data.move_to_end(key)
+            return item
+
+    def set(self, key: str, value: Any, stored_at: float) -> int:
+        """Store ``value`` and return how many entries were evicted."""
+        with self._lock:
+            self._data[key] = (value, stored_at)
+            self._data.move_to_end(key)
+            evicted = 0
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SqliteBackend:
+    """On-disk LRU cache in a single SQLite file (values stored as JSON)."""
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_last_used ON llm_cache (last_used)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            row = self._conn.execute("SELECT value, stored_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value: Any, stored_at: float) -> int:
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, stored_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, payload, stored_at, time.time()),
+            )
+            overflow = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_used LIMIT ?)",
+                    (overflow,),
+                )
+            self._conn.commit()
+        return max(overflow, 0)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+class ClassifierCache:
+    """TTL + LRU cache of classifier outputs with hit/miss metrics."""
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0}
+        self._stats_lock = threading.Lock()
+
+    @staticmethod
+    def make_key(text: str, context: Optional[Mapping[str, Any]] = None) -> str:
+        payload = json.dumps(
+            {"text": normalize_message(text), "context": dict(context or {})},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def get(self, text: str, context: Optional[Mapping[str, Any]] = None) -> Optional[Any]:
+        key = self.make_key(text, context)
+        item = self.backend.get(key)
+        if item is None:
+            self._count("misses")
+            return None
+        value, stored_at = item
+        if self.ttl_seconds is not None and self._clock() - stored_at > self.ttl_seconds:
+            self.backend.delete(key)
+            self._count("expired")
+            self._count("misses")
+            return None
+        self._count("hits")
+        return value
+
+    def put(self, text: str, context: Optional[Mapping[str, Any]], value: Any) -> None:
+        evicted = self.backend.set(self.make_key(text, context), value, self._clock())
+        if evicted:
+            self._count("evicted", evicted)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        stats["size"] = len(self.backend)
+        return stats
+
+
+def create_classifier_cache() -> ClassifierCache:
+    """Build the classifier cache from ``TIKETA_CLASSIFIER_CACHE*`` env vars.
+
+    ``TIKETA_CLASSIFIER_CACHE_PATH`` switches to the SQLite backend;
+    ``TIKETA_CLASSIFIER_CACHE_SIZE`` and ``TIKETA_CLASSIFIER_CACHE_TTL`` tune
+    the LRU bound and the TTL in seconds.
+    """
+    max_entries = int(os.getenv("TIKETA_CLASSIFIER_CACHE_SIZE", DEFAULT_MAX_ENTRIES))
+    ttl_seconds = float(os.getenv("TIKETA_CLASSIFIER_CACHE_TTL", DEFAULT_TTL_SECONDS))
+    path = os.getenv("TIKETA_CLASSIFIER_CACHE_PATH")
+    backend: CacheBackend = SqliteBackend(path, max_entries) if path else MemoryBackend(max_entries)
+    return ClassifierCache(backend, ttl_seconds=ttl_seconds)
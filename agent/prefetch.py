@@ -0,0 +1,160 @@
+"""Speculative prefetch of the next booking step's data.
+
+The booking flow is predictable. Once films are listed, the user picks one and
+``get_showtimes`` follows. Once showtimes are listed, ``get_available_seats``
+follows. :class:`Prefetcher` starts those reads on a small background pool
+right after the current reply is produced, while the user is still typing,
+and keeps them per session with a short TTL. When the answer arrives,
+``node_find_showtime`` and ``node_select_seats`` take the prefetched result.
+If the read is still in flight they wait on it, and if it is missing or
+failed they fall back to the normal call.
+
+Only data that cannot go stale within the TTL is cached as a result
+(showtime lists). Seat availability depends on holds and bookings made in the
+meantime, so for seats the prefetch only warms the shared occupancy bitmap
+(:data:`tools.seat_index.seat_index`). The tool then answers from memory.
+
+Configuration: ``TIKETA_PREFETCH`` (``0`` disables), ``TIKETA_PREFETCH_TTL``
+(seconds, default 30), ``TIKETA_PREFETCH_WORKERS`` (default 2).
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+DEFAULT_TTL_SECONDS = 30.0
+DEFAULT_MAX_SESSIONS = 1024
+DEFAULT_WORKERS = 2
+# Berapa lama node mau menunggu prefetch yang masih berjalan sebelum query sendiri.
+DEFAULT_WAIT_SECONDS = 5.0
+
+EntryKey = Tuple[str, Hashable]
+
+
+class Prefetcher:
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL_SECONDS,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        workers: int = DEFAULT_WORKERS,
+        enabled: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.enabled = enabled
+        self._workers = max(workers, 1)
+        self._clock = clock
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._sessions: "OrderedDict[str, Dict[EntryKey, Tuple[Future, float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._scheduled = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="tiketa-prefetch")
+        return self._executor
+
+    def schedule(self, session_id: Optional[str], kind: str, key: Hashable, fn: Callable[[], Any]) -> None:
+        """Start ``fn()`` in the background unless a fresh entry for (kind, key) exists."""
+        if not self.enabled or not session_id:
+            return
+        now = self._clock()
+        with self._lock:
+            entries = self._sessions.get(session_id)
+            current = entries.get((kind, key)) if entries else None
+            if current is not None and current[1] > now:
+                return
+        future = self._get_executor().submit(fn)
+        with self._lock:
+            entries = self._sessions.setdefault(session_id, {})
+            self._sessions.move_to_end(session_id)
+            entries[(kind, key)] = (future, now + self.ttl)
+            self._scheduled += 1
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def _lookup(self, session_id: Optional[str], kind: str, key: Hashable) -> Optional[Future]:
+        if not self.enabled or not session_id:
+            return None
+        now = self._clock()
+        with self._lock:
+            entries = self._sessions.get(session_id)
+            entry = entries.get((kind, key)) if entries else None
+            if entry is not None and entry[1] <= now:
+                del entries[(kind, key)]
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._sessions.move_to_end(session_id)
+            return entry[0]
+
+    def _resolved(self, result: Any, error: Optional[BaseException]) -> Any:
+        with self._lock:
+            if error is None:
+                self._hits += 1
+                return result
+            self._misses += 1
+        print(f"   > Prefetch tidak terpakai: {error!r}")
+        return None
+
+    def get(self, session_id: Optional[str], kind: str, key: Hashable, wait: float = DEFAULT_WAIT_SECONDS) -> Any:
+        """Prefetched result for (kind, key), waiting up to ``wait`` seconds if in flight; else None."""
+        future = self._lookup(session_id, kind, key)
+        if future is None:
+            return None
+        try:
+            return self._resolved(future.result(timeout=wait), None)
+        except (FutureTimeoutError, Exception) as exc:
+            return self._resolved(None, exc)
+
+    async def aget(self, session_id: Optional[str], kind: str, key: Hashable, wait: float = DEFAULT_WAIT_SECONDS) -> Any:
+        """Async variant of :meth:`get`; waits without blocking the event loop."""
+        future = self._lookup(session_id, kind, key)
+        if future is None:
+            return None
+        try:
+            result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), wait)
+            return self._resolved(result, None)
+        except (asyncio.TimeoutError, Exception) as exc:
+            return self._resolved(None, exc)
+
+    def discard(self, session_id: str) -> None:
+        """Forget every entry of ``session_id`` (its booking flow ended)."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "sessions": len(self._sessions),
+                "scheduled": self._scheduled,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+def create_prefetcher() -> Prefetcher:
+    """Build the prefetcher from ``TIKETA_PREFETCH*`` env vars."""
+    return Prefetcher(
+        ttl=float(os.getenv("TIKETA_PREFETCH_TTL", DEFAULT_TTL_SECONDS)),
+        workers=int(os.getenv("TIKETA_PREFETCH_WORKERS", DEFAULT_WORKERS)),
+        enabled=os.getenv("TIKETA_PREFETCH", "1").lower() not in {"0", "false", "no", "off"},
+    )
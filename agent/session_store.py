@@ -0,0 +1,301 @@
+"""Bounded in-memory session store that spills evicted sessions to disk.
+
+``session_states`` used to be a plain dict that only ever grew. A
+:class:`SessionStore` keeps at most ``max_sessions`` sessions and roughly
+``max_bytes`` of state resident, in LRU order. Sessions idle for longer than
+``idle_ttl`` seconds are evicted too.
+
+When the SQLite checkpoint (:mod:`agent.checkpoint`) is enabled it already
+holds every session, so evicted sessions are simply dropped and rehydrated
+from the checkpoint on their next turn. Without a checkpoint, evicted sessions
+are written to ``spill_dir`` as zlib-compressed JSON (the checkpoint's
+encoding, never pickle) and :meth:`SessionStore.get` loads them back
+transparently. The file is removed once the session is resident again; an
+unreadable file is renamed to ``*.corrupt`` and kept for inspection. Spill
+file I/O runs outside the store lock, and the async entry points
+(:meth:`SessionStore.aget`, :meth:`SessionStore.aput`) run it in a worker
+thread so the event loop is never blocked on disk.
+
+Resident size is an estimate (text length plus per-object overhead), so that
+``put`` stays cheap and does not have to serialize the whole history each turn.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from agent.checkpoint import dump_state, load_state
+
+DEFAULT_MAX_SESSIONS = 1000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_IDLE_TTL = 30 * 60
+DEFAULT_SPILL_DIR = ".tiketa_sessions"
+SPILL_SUFFIX = ".json.z"
+
+# Perkiraan overhead objek Python (dict/list/message) di atas panjang teksnya.
+OBJECT_OVERHEAD = 64
+MESSAGE_OVERHEAD = 400
+
+
+def estimate_bytes(value: Any) -> int:
+    """Cheap recursive size estimate of a session state value."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return 16
+    if isinstance(value, str):
+        return 50 + len(value)
+    if isinstance(value, Mapping):
+        return OBJECT_OVERHEAD + sum(estimate_bytes(k) + estimate_bytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return OBJECT_OVERHEAD + sum(estimate_bytes(item) for item in value)
+    content = getattr(value, "content", None)
+    if content is not None:
+        size = MESSAGE_OVERHEAD + estimate_bytes(content)
+        tool_calls = getattr(value, "tool_calls", None)
+        if tool_calls:
+            size += estimate_bytes(tool_calls)
+        return size
+    return OBJECT_OVERHEAD
+
+
+class SessionStore:
+    """LRU + idle-TTL + memory-budget store for per-session state."""
+
+    def __init__(
+        self,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        idle_ttl: Optional[float] = DEFAULT_IDLE_TTL,
+        spill_dir: Optional[str] = DEFAULT_SPILL_DIR,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.spill_dir = spill_dir
+        self._clock = clock
+        # session_id -> (state, perkiraan ukuran, waktu akses terakhir); urutan = LRU.
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        # Sesi yang sudah dievict tapi file spill-nya belum selesai ditulis.
+        self._spilling: Dict[str, Any] = {}
+        self._resident_bytes = 0
+        self._lock = threading.RLock()
+        self._stats = {"hits": 0, "misses": 0, "reloads": 0, "spills": 0, "expired": 0, "corrupt": 0}
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def _spill_path(self, session_id: str) -> Optional[str]:
+        if not self.spill_dir:
+            return None
+        digest = hashlib.sha1(session_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.spill_dir, f"{digest}{SPILL_SUFFIX}")
+
+    def get(self, session_id: str, default: Any = None) -> Any:
+        with self._lock:
+            evicted = self._expire_idle()
+            state, reused = self._resident(session_id)
+        self._spill(evicted + reused)
+        if state is not None:
+            return state
+        # File dibaca di luar lock supaya sesi lain tidak ikut menunggu disk.
+        state = self._reload(session_id)
+        with self._lock:
+            if state is None:
+                self._stats["misses"] += 1
+                return default
+            current = self._entries.get(session_id)
+            if current is not None:
+                # Sesi sudah diisi thread lain selagi file dibaca; versi itu lebih baru.
+                return current[0]
+            self._stats["reloads"] += 1
+            evicted = self._insert(session_id, state)
+        self._spill(evicted)
+        return state
+
+    def put(self, session_id: str, state: Any) -> None:
+        with self._lock:
+            evicted = self._insert(session_id, state)
+            evicted += self._expire_idle()
+        self._spill(evicted)
+
+    async def aget(self, session_id: str, default: Any = None) -> Any:
+        """Async variant of :meth:`get`; spill file I/O runs in a worker thread."""
+        if not self.spill_dir:
+            return self.get(session_id, default)
+        return await asyncio.to_thread(self.get, session_id, default)
+
+    async def aput(self, session_id: str, state: Any) -> None:
+        """Async variant of :meth:`put`; spill file I/O runs in a worker thread."""
+        if not self.spill_dir:
+            self.put(session_id, state)
+            return
+        await asyncio.to_thread(self.put, session_id, state)
+
+    __setitem__ = put
+
+    def __getitem__(self, session_id: str) -> Any:
+        state = self.get(session_id)
+        if state is None:
+            raise KeyError(session_id)
+        return state
+
+    def __contains__(self, session_id: object) -> bool:
+        with self._lock:
+            if session_id in self._entries or session_id in self._spilling:
+                return True
+            path = self._spill_path(str(session_id))
+            return bool(path and os.path.exists(path))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._entries))
+
+    def pop(self, session_id: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+            if entry is not None:
+                self._resident_bytes -= entry[1]
+                return entry[0]
+            state = self._spilling.pop(session_id, None)
+        if state is None:
+            state = self._reload(session_id)
+        return default if state is None else state
+
+    def _resident(self, session_id: str) -> Tuple[Any, List[Tuple[str, Any]]]:
+        """State held in memory (lock held) plus whatever re-inserting it evicted."""
+        entry = self._entries.get(session_id)
+        if entry is not None:
+            state, size, _ = entry
+            self._entries[session_id] = (state, size, self._clock())
+            self._entries.move_to_end(session_id)
+            self._stats["hits"] += 1
+            return state, []
+        state = self._spilling.get(session_id)
+        if state is None:
+            return None, []
+        # Dievict barusan dan filenya masih ditulis: pakai lagi dari memori.
+        self._stats["hits"] += 1
+        return state, self._insert(session_id, state)
+
+    def _insert(self, session_id: str, state: Any) -> List[Tuple[str, Any]]:
+        old = self._entries.pop(session_id, None)
+        if old is not None:
+            self._resident_bytes -= old[1]
+        self._spilling.pop(session_id, None)
+        size = estimate_bytes(state)
+        self._entries[session_id] = (state, size, self._clock())
+        self._resident_bytes += size
+        evicted = []
+        # Sesi yang baru disisipkan tidak pernah ikut dievict oleh dirinya sendiri.
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_sessions or self._resident_bytes > self.max_bytes
+        ):
+            evicted.append(self._evict(next(iter(self._entries))))
+        return evicted
+
+    def _expire_idle(self) -> List[Tuple[str, Any]]:
+        if self.idle_ttl is None:
+            return []
+        deadline = self._clock() - self.idle_ttl
+        evicted = []
+        # Urutan LRU = urutan akses, jadi cukup periksa dari depan.
+        while self._entries:
+            session_id, (_, _, last_used) = next(iter(self._entries.items()))
+            if last_used > deadline:
+                break
+            evicted.append(self._evict(session_id))
+            self._stats["expired"] += 1
+        return evicted
+
+    def _evict(self, session_id: str) -> Tuple[str, Any]:
+        """Drop ``session_id`` from memory (lock held); the caller spills it after unlocking."""
+        state, size, _ = self._entries.pop(session_id)
+        self._resident_bytes -= size
+        if self.spill_dir:
+            self._spilling[session_id] = state
+        return session_id, state
+
+    def _spill(self, evicted: List[Tuple[str, Any]]) -> None:
+        for session_id, state in evicted:
+            path = self._spill_path(session_id)
+            if path is None:
+                continue
+            payload = zlib.compress(dump_state({**state, "__session_id__": session_id}).encode("utf-8"))
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as handle:
+                handle.write(payload)
+            with self._lock:
+                # Kalau sesi sudah kembali ke memori selama file ditulis, file itu basi.
+                if self._spilling.get(session_id) is not state:
+                    os.remove(tmp_path)
+                    continue
+                os.replace(tmp_path, path)
+                del self._spilling[session_id]
+                self._stats["spills"] += 1
+
+    def _reload(self, session_id: str) -> Any:
+        path = self._spill_path(session_id)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as handle:
+                state = load_state(zlib.decompress(handle.read()).decode("utf-8"))
+            stored_id = state.pop("__session_id__")
+        except (OSError, zlib.error, UnicodeDecodeError, ValueError, KeyError, TypeError, AttributeError) as exc:
+            self._quarantine(path, session_id, exc)
+            return None
+        if stored_id != session_id:
+            return None
+        # Baru dihapus setelah berhasil dimuat; sesi kini resident lagi.
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return state
+
+    def _quarantine(self, path: str, session_id: str, error: BaseException) -> None:
+        """Move an unreadable spill file aside (``*.corrupt``) instead of deleting it."""
+        with self._lock:
+            self._stats["corrupt"] += 1
+        try:
+            os.replace(path, path + ".corrupt")
+            where = f"dipindah ke {path}.corrupt"
+        except OSError:
+            where = "tetap di tempat"
+        print(f"   > Peringatan: file sesi {session_id} tidak terbaca ({error!r}), {where}.")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["resident_sessions"] = len(self._entries)
+            stats["resident_bytes"] = self._resident_bytes
+        if self.spill_dir and os.path.isdir(self.spill_dir):
+            stats["spilled_sessions"] = sum(1 for name in os.listdir(self.spill_dir) if name.endswith(SPILL_SUFFIX))
+        return stats
+
+
+def create_session_store(checkpointer: Any = None) -> SessionStore:
+    """Build the store from ``TIKETA_SESSION_*`` env vars.
+
+    ``TIKETA_SESSION_MAX`` (sessions), ``TIKETA_SESSION_MEMORY_MB``,
+    ``TIKETA_SESSION_IDLE_TTL`` (seconds, ``0`` disables) and
+    ``TIKETA_SESSION_SPILL_DIR`` (empty disables spilling). With a
+    ``checkpointer`` nothing is spilled: evicted sessions are rehydrated from
+    the checkpoint instead.
+    """
+    idle_ttl = float(os.getenv("TIKETA_SESSION_IDLE_TTL", DEFAULT_IDLE_TTL))
+    spill_dir = None if checkpointer is not None else os.getenv("TIKETA_SESSION_SPILL_DIR", DEFAULT_SPILL_DIR)
+    return SessionStore(
+        max_sessions=int(os.getenv("TIKETA_SESSION_MAX", DEFAULT_MAX_SESSIONS)),
+        max_bytes=int(float(os.getenv("TIKETA_SESSION_MEMORY_MB", DEFAULT_MAX_BYTES / (1024 * 1024))) * 1024 * 1024),
+        idle_ttl=idle_ttl or None,
+        spill_dir=spill_dir or None,
+    )
@@ -0,0 +1,259 @@
+"""Resolve a user's showtime phrase against the listed showtimes.
+
+The phrase is parsed exactly once into a :class:`TimeConstraint` (explicit id,
+ordinal, weekday, date, hour, part of day). The available showtimes are put
+into a :class:`ShowtimeIndex` once per list: hash lookups by id, date, weekday,
+day and month, plus a sorted minute-of-day array that hour and part-of-day
+ranges are matched against with ``bisect``. Scoring follows the weights the
+old per-showtime ``strftime`` scan used.
+"""
+from __future__ import annotations
+
+import re
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+
+from agent.index_cache import CatalogueIndexCache
+
+DAY_ALIASES = {
+    "monday": {"senin", "monday"},
+    "tuesday": {"selasa", "tuesday"},
+    "wednesday": {"rabu", "rabo", "wednesday"},
+    "thursday": {"kamis", "kemis", "thursday"},
+    "friday": {"jumat", "jum'at", "friday"},
+    "saturday": {"sabtu", "saterday", "saturday"},
+    "sunday": {"minggu", "ahad", "sunday"},
+}
+
+MONTH_ALIASES = {
+    "january": {"januari", "jan", "january"},
+    "february": {"februari", "feb", "february"},
+    "march": {"maret", "mar", "march"},
+    "april": {"april", "apr"},
+    "may": {"mei", "may"},
+    "june": {"juni", "jun", "june"},
+    "july": {"juli", "jul", "july"},
+    "august": {"agustus", "agust", "august", "aug"},
+    "september": {"september", "sept", "sep"},
+    "october": {"oktober", "okt", "october", "oct"},
+    "november": {"november", "nov"},
+    "december": {"desember", "des", "december", "dec"},
+}
+
+ORDINAL_WORDS = {
+    "pertama": 0,
+    "kesatu": 0,
+    "kedua": 1,
+    "keduanya": 1,
+    "ketiga": 2,
+    "keempat": 3,
+    "kelima": 4,
+    "keenam": 5,
+    "ketujuh": 6,
+}
+
+# Rentang jam [mulai, selesai) untuk penyebutan bagian hari.
+PARTS_OF_DAY = {
+    "pagi": (0, 12),
+    "siang": (12, 18),
+    "sore": (15, 18),
+    "malam": (18, 24),
+}
+
+RELATIVE_DAYS = {"hari ini": 0, "besok": 1, "lusa": 2}
+
+WEIGHT_EXACT_TIME = 5
+WEIGHT_HOUR = 2
+WEIGHT_PART_OF_DAY = 1
+WEIGHT_WEEKDAY = 3
+WEIGHT_DAY = 2
+WEIGHT_DAY_MONTH = 3
+WEIGHT_MONTH = 2
+WEIGHT_RELATIVE_DAY = 3
+
+_DAY_LOOKUP = {
+    alias: weekday
+    for weekday, name in enumerate(DAY_ALIASES)
+    for alias in DAY_ALIASES[name]
+}
+_MONTH_LOOKUP = {
+    alias: month
+    for month, name in enumerate(MONTH_ALIASES, start=1)
+    for alias in MONTH_ALIASES[name]
+}
+
+
+@dataclass(frozen=True)
+class TimeConstraint:
+    """Normalized, showtime-independent reading of a user's phrase."""
+
+    showtime_ids: Tuple[int, ...] = ()
+    ordinal: Optional[int] = None
+    bare_numbers: Tuple[int, ...] = ()
+    exact_times: Tuple[Tuple[int, int], ...] = ()
+    hours: FrozenSet[int] = frozenset()
+    hour_range: Optional[Tuple[int, int]] = None
+    weekdays: FrozenSet[int] = frozenset()
+    days: FrozenSet[int] = frozenset()
+    day_months: FrozenSet[Tuple[int, int]] = frozenset()
+    months: FrozenSet[int] = frozenset()
+    relative_days: FrozenSet[int] = frozenset()
+    has_time_separator: bool = False
+
+
+@lru_cache(maxsize=1024)
+def parse_time_constraint(text: str) -> TimeConstraint:
+    """Parse ``text`` once into a :class:`TimeConstraint`."""
+    text_lower = (text or "").lower()
+    words = re.findall(r"[a-z']+", text_lower)
+
+    showtime_ids = tuple(int(m) for m in re.findall(r"(?:id|jadwal)\s*(\d+)", text_lower))
+    ordinal = next((index for word, index in ORDINAL_WORDS.items() if word in text_lower), None)
+    clock_hours = [int(raw) for raw in re.findall(r"\b(?:jam|pukul|pkl)\s*(\d{1,2})\b", text_lower)]
+    # Angka setelah "jam"/"pukul" adalah jam, bukan id jadwal atau tanggal.
+    text_without_clock = re.sub(r"\b(?:jam|pukul|pkl)\s*\d{1,2}\b", " ", text_lower)
+    bare_numbers = tuple(int(n) for n in re.findall(r"\b\d{1,4}\b", text_without_clock) if n != "24")
+
+    exact_times = tuple(
+        (int(h), int(m))
+        for h, m in re.findall(r"\b(\d{1,2})[:.](\d{2})\b", text_lower)
+        if int(h) < 24 and int(m) < 60
+    )
+    hour_range = next((PARTS_OF_DAY[word] for word in words if word in PARTS_OF_DAY), None)
+
+    hours: Set[int] = {h for h, _ in exact_times}
+    for hour in clock_hours:
+        if hour >= 24:
+            continue
+        hours.add(hour)
+        # "jam 7" di bioskop hampir selalu berarti 19:00 kecuali disebut pagi.
+        if 1 <= hour < 12 and (hour_range is None or hour_range[0] >= 12):
+            hours.add(hour + 12)
+    if not hours:
+        hours = {n for n in bare_numbers if n < 24}
+
+    day_months = frozenset(
+        (int(d), int(m))
+        for d, m in re.findall(r"\b(\d{1,2})[/-](\d{1,2})\b", text_lower)
+    )
+    relative = frozenset(offset for phrase, offset in RELATIVE_DAYS.items() if phrase in text_lower)
+
+    return TimeConstraint(
+        showtime_ids=showtime_ids,
+        ordinal=ordinal,
+        bare_numbers=bare_numbers,
+        exact_times=exact_times,
+        hours=frozenset(hours),
+        hour_range=hour_range,
+        weekdays=frozenset(_DAY_LOOKUP[word] for word in words if word in _DAY_LOOKUP),
+        days=frozenset(n for n in bare_numbers if 1 <= n <= 31),
+        day_months=day_months,
+        months=frozenset(_MONTH_LOOKUP[word] for word in words if word in _MONTH_LOOKUP),
+        relative_days=relative,
+        has_time_separator=":" in text_lower or "." in text_lower,
+    )
+
+
+class ShowtimeIndex:
+    """Lookup structures over one list of showtime dicts."""
+
+    def __init__(self, showtimes: Sequence[dict]):
+        self._showtimes = list(showtimes)
+        self._by_id: Dict[int, int] = {}
+        self._by_date: Dict[date, Set[int]] = defaultdict(set)
+        self._by_weekday: Dict[int, Set[int]] = defaultdict(set)
+        self._by_day: Dict[int, Set[int]] = defaultdict(set)
+        self._by_month: Dict[int, Set[int]] = defaultdict(set)
+        self._times: Dict[int, datetime] = {}
+        minutes: List[Tuple[int, int]] = []
+
+        for idx, show in enumerate(self._showtimes):
+            show_id = show.get("id")
+            if show_id is not None:
+                self._by_id.setdefault(show_id, idx)
+            dt = show.get("time")
+            if not isinstance(dt, datetime):
+                continue
+            self._times[idx] = dt
+            self._by_date[dt.date()].add(idx)
+            self._by_weekday[dt.weekday()].add(idx)
+            self._by_day[dt.day].add(idx)
+            self._by_month[dt.month].add(idx)
+            minutes.append((dt.hour * 60 + dt.minute, idx))
+
+        minutes.sort()
+        self._minute_keys = [minute for minute, _ in minutes]
+        self._minute_idx = [idx for _, idx in minutes]
+
+    def _in_minutes(self, start: int, end: int) -> Set[int]:
+        """Showtimes whose minute-of-day lies in ``[start, end)``."""
+        lo = bisect_left(self._minute_keys, start)
+        hi = bisect_right(self._minute_keys, end - 1)
+        return set(self._minute_idx[lo:hi])
+
+    def resolve(self, constraint: TimeConstraint, today: Optional[date] = None) -> Optional[dict]:
+        for show_id in constraint.showtime_ids:
+            if show_id in self._by_id:
+                return self._showtimes[self._by_id[show_id]]
+
+        if constraint.ordinal is not None and constraint.ordinal < len(self._showtimes):
+            return self._showtimes[constraint.ordinal]
+
+        if not constraint.has_time_separator:
+            for number in constraint.bare_numbers:
+                if number in self._by_id:
+                    return self._showtimes[self._by_id[number]]
+
+        scores: Dict[int, int] = defaultdict(int)
+
+        def add(indices: Set[int], weight: int) -> None:
+            for idx in indices:
+                scores[idx] += weight
+
+        exact: Set[int] = set()
+        for hour, minute in constraint.exact_times:
+            exact |= self._in_minutes(hour * 60 + minute, hour * 60 + minute + 1)
+        add(exact, WEIGHT_EXACT_TIME)
+        hour_hits: Set[int] = set()
+        for hour in constraint.hours:
+            hour_hits |= self._in_minutes(hour * 60, hour * 60 + 60)
+        add(hour_hits - exact, WEIGHT_HOUR)
+        if constraint.hour_range:
+            start, end = constraint.hour_range
+            add(self._in_minutes(start * 60, end * 60), WEIGHT_PART_OF_DAY)
+
+        for weekday in constraint.weekdays:
+            add(self._by_weekday.get(weekday, set()), WEIGHT_WEEKDAY)
+        for day in constraint.days:
+            add(self._by_day.get(day, set()), WEIGHT_DAY)
+        for day, month in constraint.day_months:
+            add(self._by_day.get(day, set()) & self._by_month.get(month, set()), WEIGHT_DAY_MONTH)
+        for month in constraint.months:
+            add(self._by_month.get(month, set()), WEIGHT_MONTH)
+        if constraint.relative_days:
+            base = today or date.today()
+            for offset in constraint.relative_days:
+                add(self._by_date.get(base + timedelta(days=offset), set()), WEIGHT_RELATIVE_DAY)
+
+        if not scores:
+            return None
+        best = min(scores, key=lambda idx: (-scores[idx], self._times.get(idx, datetime.max), idx))
+        return self._showtimes[best]
+
+
+_INDEX_CACHE: CatalogueIndexCache[ShowtimeIndex] = CatalogueIndexCache(ShowtimeIndex)
+
+
+def showtime_index_for(showtimes: Sequence[dict]) -> ShowtimeIndex:
+    """Return a (cached) index for a list of showtime dicts."""
+    return _INDEX_CACHE.get(showtimes)
+
+
+def resolve_showtime(text: str, showtimes: Optional[Sequence[dict]]) -> Optional[dict]:
+    if not text or not showtimes:
+        return None
+    return showtime_index_for(showtimes).resolve(parse_time_constraint(text))
@@ -0,0 +1,201 @@
+"""Precomputed title index for resolving a user's movie reference.
+
+``_match_movie_from_text`` used to re-tokenize and score every candidate title
+on every turn. :class:`TitleIndex` does that work once per candidate list:
+normalized token sets, character trigrams and title acronyms are put into
+posting lists, so a lookup only scores titles that share at least one token,
+trigram or acronym with the user's text. Trigrams make the match tolerant to
+typos ("interstelar"), acronyms cover abbreviations ("aot"), and a token that
+only one title contains ("gundam") is enough on its own.
+
+Acronyms are at least three letters and only match a whole word of the
+message. Common chat shorthand ("dpt", "yg", "gmn") never counts as an
+acronym, and an acronym's confidence shrinks with every other word of the
+message it does not explain, so "aot jam 7 ada?" still resolves but an
+abbreviation lost in a longer sentence does not.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from agent.index_cache import CatalogueIndexCache
+
+STOPWORDS = {"the", "film", "movie", "saya", "aku", "mau", "dong", "lah", "yang", "itu", "ini"}
+
+MIN_CONFIDENCE = 0.5
+MIN_MARGIN = 0.1
+FUZZY_MIN_SIMILARITY = 0.45
+FUZZY_WEIGHT = 0.9
+ACRONYM_CONFIDENCE = 0.9
+DISTINCTIVE_CONFIDENCE = 0.7
+DISTINCTIVE_MIN_LENGTH = 4
+ACRONYM_MIN_LENGTH = 3
+# Singkatan chat yang sering muncul dan tidak boleh dibaca sebagai akronim judul.
+CHAT_ABBREVIATIONS = {
+    "aja", "bgt", "blm", "bsk", "btw", "dgn", "dmn", "dpt", "dpn", "gak", "gmn", "jgn", "kpn", "krn",
+    "lgi", "mks", "org", "otw", "pls", "sdh", "skrg", "tdk", "tlg", "trs", "udh", "utk", "yuk",
+}
+# Kata pengantar pemesanan yang tidak mengurangi keyakinan akronim ("mau nonton aot").
+ACRONYM_FILLER = {"nonton", "tonton", "tiket", "pesan", "beli", "jam", "jadwal", "kursi", "ada", "berapa", "ya", "yg"}
+
+
+@dataclass(frozen=True)
+class TitleMatch:
+    movie_id: int
+    title: str
+    confidence: float
+
+
+def normalize_text(text: Optional[str]) -> str:
+    return re.sub(r"\s+", " ", (text or "").strip()).lower()
+
+
+def content_tokens(text: Optional[str]) -> List[str]:
+    """Alphanumeric tokens longer than one character, without ``STOPWORDS``."""
+    return [tok for tok in re.findall(r"[a-z0-9]+", (text or "").lower()) if len(tok) > 1 and tok not in STOPWORDS]
+
+
+def trigrams(token: str) -> Set[str]:
+    padded = f"  {token} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _acronyms(normalized_title: str) -> Set[str]:
+    acronyms = set()
+    # "attack on titan: requiem" -> "aotr" dan "aot" (bagian sebelum titik dua).
+    for part in {normalized_title, normalized_title.split(":")[0]}:
+        words = re.findall(r"[a-z0-9]+", part)
+        acronym = "".join(word[0] for word in words)
+        if len(words) >= 2 and len(acronym) >= ACRONYM_MIN_LENGTH and acronym not in CHAT_ABBREVIATIONS:
+            acronyms.add(acronym)
+    return acronyms
+
+
+class TitleIndex:
+    """Token, trigram and acronym postings over a fixed list of movies."""
+
+    def __init__(self, movies: Iterable[Tuple[int, str]]):
+        self._titles: List[Tuple[int, str, str]] = []
+        self._tokens: List[Tuple[str, ...]] = []
+        self._token_postings: Dict[str, Set[int]] = {}
+        self._trigram_postings: Dict[str, Set[int]] = {}
+        self._acronym_postings: Dict[str, Set[int]] = {}
+        self._token_trigrams: Dict[str, Set[str]] = {}
+
+        for movie_id, title in movies:
+            normalized = normalize_text(title)
+            if not normalized:
+                continue
+            idx = len(self._titles)
+            tokens = tuple(dict.fromkeys(content_tokens(normalized)))
+            self._titles.append((movie_id, title.strip(), normalized))
+            self._tokens.append(tokens)
+            for tok in tokens:
+                self._token_postings.setdefault(tok, set()).add(idx)
+                grams = self._token_trigrams.setdefault(tok, trigrams(tok))
+                for gram in grams:
+                    self._trigram_postings.setdefault(gram, set()).add(idx)
+            for acronym in _acronyms(normalized):
+                self._acronym_postings.setdefault(acronym, set()).add(idx)
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    def _similarity(self, title_token: str, text_grams: Dict[str, Set[str]]) -> float:
+        grams = self._token_trigrams[title_token]
+        best = 0.0
+        for other in text_grams.values():
+            union = len(grams | other)
+            if union:
+                best = max(best, len(grams & other) / union)
+        return best
+
+    def search(self, text: str, limit: int = 3) -> List[TitleMatch]:
+        """Return the best scoring titles for ``text`` with a 0..1 confidence."""
+        normalized_text = normalize_text(text)
+        text_tokens = set(content_tokens(normalized_text))
+        raw_words = set(re.findall(r"[a-z0-9]+", normalized_text))
+        if not text_tokens and not raw_words:
+            return []
+
+        candidates: Set[int] = set()
+        for tok in text_tokens:
+            candidates |= self._token_postings.get(tok, set())
+        acronym_hits: Set[int] = set()
+        acronym_words: Set[str] = set()
+        for word in raw_words:
+            hits = self._acronym_postings.get(word)
+            if hits:
+                acronym_hits |= hits
+                acronym_words.add(word)
+        candidates |= acronym_hits
+        text_grams = {tok: trigrams(tok) for tok in text_tokens if len(tok) > 3}
+        for grams in text_grams.values():
+            for gram in grams:
+                candidates |= self._trigram_postings.get(gram, set())
+
+        scored: List[TitleMatch] = []
+        for idx in candidates:
+            movie_id, title, normalized_title = self._titles[idx]
+            tokens = self._tokens[idx]
+            if normalized_title in normalized_text:
+                confidence = 1.0
+            elif not tokens:
+                continue
+            else:
+                matched = 0
+                total = 0.0
+                distinctive = False
+                for tok in tokens:
+                    if tok in text_tokens:
+                        matched += 1
+                        total += 1.0
+                        if len(tok) >= DISTINCTIVE_MIN_LENGTH and len(self._token_postings[tok]) == 1:
+                            distinctive = True
+                    elif text_grams:
+                        similarity = self._similarity(tok, text_grams)
+                        if similarity >= FUZZY_MIN_SIMILARITY:
+                            matched += 1
+                            total += FUZZY_WEIGHT * similarity
+                confidence = total / len(tokens)
+                if matched == 1 and len(tokens) > 2:
+                    confidence *= 0.8
+                if distinctive:
+                    confidence = max(confidence, DISTINCTIVE_CONFIDENCE)
+                if idx in acronym_hits:
+                    unexplained = text_tokens - acronym_words - set(tokens) - ACRONYM_FILLER
+                    acronym_confidence = ACRONYM_CONFIDENCE / (1 + len(unexplained))
+                    if acronym_confidence >= FUZZY_MIN_SIMILARITY:
+                        confidence = max(confidence, acronym_confidence)
+            if confidence > 0:
+                scored.append(TitleMatch(movie_id, title, round(min(confidence, 1.0), 3)))
+
+        scored.sort(key=lambda match: (-match.confidence, match.title))
+        return scored[:limit]
+
+    def resolve(self, text: str) -> Optional[TitleMatch]:
+        """Return the single confident match for ``text``, or ``None`` if ambiguous."""
+        matches = self.search(text, limit=2)
+        if not matches or matches[0].confidence < MIN_CONFIDENCE:
+            return None
+        if len(matches) > 1 and matches[0].confidence - matches[1].confidence < MIN_MARGIN:
+            return None
+        return matches[0]
+
+
+def _build_index(candidates: Sequence[dict]) -> TitleIndex:
+    return TitleIndex(
+        (movie.get("id"), movie.get("title") or "")
+        for movie in candidates
+        if movie.get("id") is not None
+    )
+
+
+_INDEX_CACHE: CatalogueIndexCache[TitleIndex] = CatalogueIndexCache(_build_index)
+
+
+def title_index_for(candidates: Sequence[dict]) -> TitleIndex:
+    """Return a (cached) index for a list of candidate movie dicts."""
+    return _INDEX_CACHE.get(candidates)
@@ -0,0 +1,167 @@
+"""Concurrent execution of the independent tool calls in one LLM response.
+
+When the browsing model asks for several tools at once (e.g. ``get_showtimes``
+for three films), those calls do not depend on each other. Running them one
+after another costs the sum of their latencies; here they run concurrently,
+so a turn costs roughly the slowest call.
+
+* sync: a shared, bounded :class:`ThreadPoolExecutor` (``TIKETA_TOOL_WORKERS``);
+* async: ``asyncio.gather`` over the tools' coroutines.
+
+Outputs come back in the order of the calls. Each call has its own timeout
+(``TIKETA_TOOL_TIMEOUT`` seconds) and its failure is isolated: a call that
+raises or times out yields an error result in its own slot while the other
+results are kept. A single call runs inline without the executor.
+
+A worker thread cannot be stopped, so a sync call that timed out keeps its
+worker until it returns. Those calls are tracked: :func:`stats` reports them,
+and while they occupy every worker new batches run inline on the caller's
+thread instead of queueing behind them. On the async path the tools' own
+coroutines are cancelled on timeout.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+DEFAULT_TOOL_TIMEOUT = 10.0
+DEFAULT_TOOL_WORKERS = 4
+
+# (nama tool, args, tool yang bisa di-invoke) — cukup bagian depan tuple dari
+# _browsing_tool_calls; sisa elemennya diabaikan.
+ToolCall = Tuple[Any, ...]
+
+_executor: Optional[ThreadPoolExecutor] = None
+_workers: Optional[int] = None
+_executor_lock = threading.Lock()
+# Future yang sudah melewati timeout tapi thread-nya masih berjalan.
+_abandoned: Set[Future] = set()
+_counters: Dict[str, int] = {"batches": 0, "inline_batches": 0, "timeouts": 0}
+
+
+def tool_timeout() -> float:
+    """Per-call timeout in seconds, read from ``TIKETA_TOOL_TIMEOUT`` at call time."""
+    return float(os.getenv("TIKETA_TOOL_TIMEOUT", DEFAULT_TOOL_TIMEOUT))
+
+
+def _worker_count() -> int:
+    """Executor size; ``TIKETA_TOOL_WORKERS`` is read once, when the executor is first needed."""
+    global _workers
+    if _workers is None:
+        _workers = max(int(os.getenv("TIKETA_TOOL_WORKERS", DEFAULT_TOOL_WORKERS)), 1)
+    return _workers
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=_worker_count(), thread_name_prefix="tiketa-tool")
+    return _executor
+
+
+def tool_error_result(tool_name: str, error: BaseException) -> dict:
+    if isinstance(error, (FutureTimeoutError, asyncio.TimeoutError)):
+        message = f"Tool {tool_name} tidak merespons tepat waktu. Coba lagi sebentar lagi, ya."
+    else:
+        message = f"Tool {tool_name} gagal dijalankan: {error}"
+    print(f"   > Peringatan: {message}")
+    return {"success": False, "error": type(error).__name__, "message": message}
+
+
+def _unpack(call: ToolCall) -> Tuple[str, dict, Any]:
+    tool_name, tool_args = call[0], call[1]
+    return tool_name, tool_args, call[-1]
+
+
+def _invoke(call: ToolCall) -> Any:
+    tool_name, tool_args, tool_impl = _unpack(call)
+    try:
+        return tool_impl.invoke(tool_args)
+    except Exception as exc:
+        return tool_error_result(tool_name, exc)
+
+
+def _abandon(future: Future) -> None:
+    with _executor_lock:
+        _counters["timeouts"] += 1
+        if future.done():
+            return
+        _abandoned.add(future)
+    future.add_done_callback(_forget)
+
+
+def _forget(future: Future) -> None:
+    with _executor_lock:
+        _abandoned.discard(future)
+
+
+def _pool_saturated() -> bool:
+    with _executor_lock:
+        return len(_abandoned) >= _worker_count()
+
+
+def stats() -> dict:
+    with _executor_lock:
+        return {
+            **_counters,
+            "workers": _worker_count(),
+            "abandoned_running": len(_abandoned),
+        }
+
+
+def run_tool_calls(calls: Sequence[ToolCall], timeout: Optional[float] = None) -> List[Any]:
+    """Run ``calls`` concurrently on the shared executor; outputs in call order."""
+    if len(calls) <= 1:
+        return [_invoke(call) for call in calls]
+    if _pool_saturated():
+        # Semua worker ditempati panggilan yang macet; jangan antre di belakangnya.
+        with _executor_lock:
+            _counters["inline_batches"] += 1
+        print("   > Peringatan: pool tool penuh oleh panggilan yang timeout, dijalankan berurutan.")
+        return [_invoke(call) for call in calls]
+    timeout = tool_timeout() if timeout is None else timeout
+    executor = _get_executor()
+    with _executor_lock:
+        _counters["batches"] += 1
+    submitted_at = time.monotonic()
+    # copy_context per call supaya callback/tracing LangChain ikut ke thread worker.
+    futures = [executor.submit(contextvars.copy_context().run, _invoke, call) for call in calls]
+    outputs = []
+    for call, future in zip(calls, futures):
+        remaining = max(submitted_at + timeout - time.monotonic(), 0.0)
+        try:
+            outputs.append(future.result(timeout=remaining))
+        except FutureTimeoutError as exc:
+            # Thread tidak bisa dihentikan paksa; hasil yang datang belakangan dibuang.
+            if not future.cancel():
+                _abandon(future)
+            outputs.append(tool_error_result(_unpack(call)[0], exc))
+    return outputs
+
+
+async def _ainvoke(call: ToolCall, timeout: float) -> Any:
+    tool_name, tool_args, tool_impl = _unpack(call)
+    try:
+        return await asyncio.wait_for(tool_impl.ainvoke(tool_args), timeout)
+    except asyncio.TimeoutError as exc:
+        with _executor_lock:
+            _counters["timeouts"] += 1
+        return tool_error_result(tool_name, exc)
+    except Exception as exc:
+        return tool_error_result(tool_name, exc)
+
+
+async def arun_tool_calls(calls: Sequence[ToolCall], timeout: Optional[float] = None) -> List[Any]:
+    """Async variant of :func:`run_tool_calls` using ``asyncio.gather``."""
+    timeout = tool_timeout() if timeout is None else timeout
+    if len(calls) <= 1:
+        return [await _ainvoke(call, timeout) for call in calls]
+    return list(await asyncio.gather(*(_ainvoke(call, timeout) for call in calls)))
@@ -2,12 +2,12 @@
 
 from __future__ import annotations
 
-from typing import Any, Callable, MutableMapping
-
-from langgraph.graph import StateGraph, END
+from typing import Any, Awaitable, Callable, MutableMapping, Union
 
 StateDict = MutableMapping[str, Any]
-NodeHandler = Callable[[StateDict], dict[str, Any]]
+# Node boleh menerima argumen kedua ``config`` (RunnableConfig) dari LangGraph,
+# dan boleh berupa coroutine function (dipakai lewat ``app.ainvoke``).
+NodeHandler = Callable[..., Union[dict[str, Any], Awaitable[dict[str, Any]]]]
 
 
 def compile_ticket_agent_workflow(
@@ -21,13 +21,18 @@ def compile_ticket_agent_workflow(
 	select_seats: NodeHandler,
 	confirm_booking: NodeHandler,
 	execute_booking: NodeHandler,
+	cancel_booking: NodeHandler,
 	final_response: NodeHandler,
 ):
 	"""Construct and compile the ticket agent workflow.
 
 	The function wires the provided node callbacks into a :class:`StateGraph`
-	with the expected routing logic for the cinema ticket assistant.
+	with the expected routing logic for the cinema ticket assistant. Sessions
+	are persisted by the callers through :mod:`agent.checkpoint`, not by a
+	LangGraph checkpointer.
 	"""
+	# Import di sini supaya ``import run_tiketa`` tidak ikut memuat LangGraph.
+	from langgraph.graph import StateGraph, END
 
 	workflow = StateGraph(state_type)
 	workflow.add_node("classify_intent", classify_intent)
@@ -37,6 +42,7 @@ def compile_ticket_agent_workflow(
 	workflow.add_node("select_seats", select_seats)
 	workflow.add_node("confirm_booking", confirm_booking)
 	workflow.add_node("execute_booking", execute_booking)
+	workflow.add_node("cancel_booking", cancel_booking)
 	workflow.add_node("final_response", final_response)
 
 	workflow.set_entry_point("classify_intent")
@@ -51,6 +57,7 @@ def compile_ticket_agent_workflow(
 			"select_seats": "select_seats",
 			"confirm_booking": "confirm_booking",
 			"execute_booking": "execute_booking",
+			"cancel_booking": "cancel_booking",
 			"__end__": END,
 		},
 	)
@@ -61,6 +68,7 @@ def compile_ticket_agent_workflow(
 	workflow.add_edge("select_seats", END)
 	workflow.add_edge("confirm_booking", END)
 	workflow.add_edge("execute_booking", "final_response")
+	workflow.add_edge("cancel_booking", END)
 	workflow.add_edge("final_response", END)
 
 	return workflow.compile()
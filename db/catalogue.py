@@ -0,0 +1,375 @@
+"""Shared, process-wide catalogue of movies, showtimes and genres.
+
+Session state only keeps ids (``candidate_movie_ids``,
+``available_showtime_ids``) and a seat bitmask. The film and showtime details
+those ids point to live here once per process instead of once per session, and
+are rendered into dicts only when a prompt, resolver or reply needs them.
+
+The catalogue is a read-through cache. Entries are registered from tool
+results, and ids that are not known yet are loaded from the database in bulk
+(sync or async). Display strings such as ``time_display`` are computed once
+per entry. Each table is LRU-bounded (``TIKETA_CATALOGUE_MAX`` entries per
+table) and counts hits and misses. Writers that change the catalogue (seeding,
+snapshot restore, migrations, admin edits) must call :meth:`Catalogue.clear`
+or one of the ``invalidate_*`` methods. Each of those bumps
+:attr:`Catalogue.version`, which derived indexes (movie search, title and
+showtime resolvers) compare against to know when to rebuild. Registering an
+entry that replaces a cached one with different data bumps it too. Genre
+records back the genre names shown by ``search_movies`` and its ``genreId``
+argument; genre filters themselves are answered by the movie search index.
+"""
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Generic, Hashable, Iterable, List, Optional, Tuple, TypeVar
+
+from sqlalchemy import select
+
+from db.schema import genres_table, get_engine, get_async_engine, movies_table, showtimes_table
+
+SHOWTIME_DISPLAY_FORMAT = "%A, %d %B %Y %H:%M"
+DEFAULT_MAX_ENTRIES = 10000
+
+
+@dataclass(frozen=True)
+class MovieEntry:
+    id: int
+    title: str
+    description: Optional[str]
+
+    def as_dict(self) -> dict:
+        return {"id": self.id, "title": self.title, "description": self.description}
+
+
+@dataclass(frozen=True)
+class ShowtimeEntry:
+    id: int
+    movie_id: int
+    time: datetime
+    time_display: str
+
+    def as_dict(self) -> dict:
+        return {"id": self.id, "movie_id": self.movie_id, "time": self.time, "time_display": self.time_display}
+
+
+@dataclass(frozen=True)
+class GenreEntry:
+    id: int
+    name: str
+
+    def as_dict(self) -> dict:
+        return {"id": self.id, "name": self.name}
+
+
+def showtime_entry(showtime_id: int, movie_id: int, time: datetime) -> ShowtimeEntry:
+    return ShowtimeEntry(showtime_id, movie_id, time, time.strftime(SHOWTIME_DISPLAY_FORMAT))
+
+
+V = TypeVar("V")
+
+
+class _LruTable(Generic[V]):
+    """Bounded id -> entry map with hit/miss counters. Callers hold the catalogue lock.
+
+    Without an explicit ``max_entries`` the bound is read from
+    ``TIKETA_CATALOGUE_MAX`` on first use, not when the module is imported.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self._max_entries = None if max_entries is None else max(max_entries, 1)
+        self.entries: "OrderedDict[Hashable, V]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_entries(self) -> int:
+        if self._max_entries is None:
+            self._max_entries = max(int(os.getenv("TIKETA_CATALOGUE_MAX", DEFAULT_MAX_ENTRIES)), 1)
+        return self._max_entries
+
+    def lookup(self, ids: List[Hashable]) -> Tuple[Dict[Hashable, V], List[Hashable]]:
+        found: Dict[Hashable, V] = {}
+        missing: List[Hashable] = []
+        unique = dict.fromkeys(ids)
+        for key in unique:
+            entry = self.entries.get(key)
+            if entry is None:
+                missing.append(key)
+                continue
+            self.entries.move_to_end(key)
+            found[key] = entry
+        self.hits += len(unique) - len(missing)
+        self.misses += len(missing)
+        return found, missing
+
+    def put(self, key: Hashable, entry: V) -> bool:
+        """Store ``entry``; returns True when it replaced a different cached entry."""
+        previous = self.entries.get(key)
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return previous is not None and previous != entry
+
+    def invalidate(self, keys: Optional[Iterable[Hashable]] = None) -> None:
+        if keys is None:
+            self.entries.clear()
+            return
+        for key in keys:
+            self.entries.pop(key, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+class Catalogue:
+    def __init__(self, bind=None, async_bind=None, max_entries: Optional[int] = None):
+        self._bind = bind
+        self._async_bind = async_bind
+        self._movies: _LruTable[MovieEntry] = _LruTable(max_entries)
+        self._showtimes: _LruTable[ShowtimeEntry] = _LruTable(max_entries)
+        self._genres: _LruTable[GenreEntry] = _LruTable(max_entries)
+        self._version = 0
+        self._lock = threading.Lock()
+
+    @property
+    def bind(self):
+        return self._bind if self._bind is not None else get_engine()
+
+    @property
+    def async_bind(self):
+        return self._async_bind if self._async_bind is not None else get_async_engine()
+
+    @property
+    def version(self) -> int:
+        """Counter bumped by every invalidation; cheap staleness check for derived indexes."""
+        return self._version
+
+    # --- registrasi dari hasil tool ---
+
+    def add_movies(self, movies: Iterable[dict]) -> None:
+        entries = [MovieEntry(m["id"], m["title"], m.get("description")) for m in movies if m.get("id") is not None]
+        with self._lock:
+            self._put_all(self._movies, ((entry.id, entry) for entry in entries))
+
+    def add_showtimes(self, showtimes: Iterable[dict]) -> None:
+        entries = [
+            showtime_entry(s["id"], s["movie_id"], s["time"])
+            for s in showtimes
+            if s.get("id") is not None and isinstance(s.get("time"), datetime)
+        ]
+        with self._lock:
+            self._put_all(self._showtimes, ((entry.id, entry) for entry in entries))
+
+    def register_showtimes(self, movie_id: int, rows: Iterable[Tuple[int, datetime]]) -> List[ShowtimeEntry]:
+        """Entries for fresh ``(id, time)`` rows, reusing cached ones so ``time_display`` is formatted once."""
+        entries = []
+        with self._lock:
+            for showtime_id, time in rows:
+                cached = self._showtimes.entries.get(showtime_id)
+                if cached is None or cached.time != time or cached.movie_id != movie_id:
+                    cached = showtime_entry(showtime_id, movie_id, time)
+                entries.append(cached)
+            self._put_all(self._showtimes, ((entry.id, entry) for entry in entries))
+        return entries
+
+    def _put_all(self, table: "_LruTable", items: Iterable[Tuple[Hashable, object]]) -> None:
+        """Store entries (lock held); bump the version if a cached entry changed.
+
+        An id whose title or time changed in the database would otherwise keep
+        serving the old value from indexes memoized on :attr:`version`.
+        """
+        changed = False
+        for key, entry in items:
+            changed = table.put(key, entry) or changed
+        if changed:
+            self._version += 1
+
+    # --- baca (read-through) ---
+
+    def movies(self, ids: Iterable[int]) -> List[MovieEntry]:
+        """Entries for ``ids`` in the given order (unknown ids are skipped)."""
+        ids = list(ids)
+        with self._lock:
+            found, missing = self._movies.lookup(ids)
+        if missing:
+            with self.bind.connect() as conn:
+                rows = conn.execute(self._movies_stmt(missing)).fetchall()
+            found.update(self._store_movies(rows))
+        return [found[i] for i in ids if i in found]
+
+    async def amovies(self, ids: Iterable[int]) -> List[MovieEntry]:
+        ids = list(ids)
+        with self._lock:
+            found, missing = self._movies.lookup(ids)
+        if missing:
+            async with self.async_bind.connect() as conn:
+                rows = (await conn.execute(self._movies_stmt(missing))).fetchall()
+            found.update(self._store_movies(rows))
+        return [found[i] for i in ids if i in found]
+
+    def showtimes(self, ids: Iterable[int]) -> List[ShowtimeEntry]:
+        ids = list(ids)
+        with self._lock:
+            found, missing = self._showtimes.lookup(ids)
+        if missing:
+            with self.bind.connect() as conn:
+                rows = conn.execute(self._showtimes_stmt(missing)).fetchall()
+            found.update(self._store_showtimes(rows))
+        return [found[i] for i in ids if i in found]
+
+    async def ashowtimes(self, ids: Iterable[int]) -> List[ShowtimeEntry]:
+        ids = list(ids)
+        with self._lock:
+            found, missing = self._showtimes.lookup(ids)
+        if missing:
+            async with self.async_bind.connect() as conn:
+                rows = (await conn.execute(self._showtimes_stmt(missing))).fetchall()
+            found.update(self._store_showtimes(rows))
+        return [found[i] for i in ids if i in found]
+
+    def genres(self, ids: Iterable[int]) -> List[GenreEntry]:
+        ids = list(ids)
+        with self._lock:
+            found, missing = self._genres.lookup(ids)
+        if missing:
+            with self.bind.connect() as conn:
+                rows = conn.execute(self._genres_stmt(missing)).fetchall()
+            found.update(self._store_genres(rows))
+        return [found[i] for i in ids if i in found]
+
+    async def agenres(self, ids: Iterable[int]) -> List[GenreEntry]:
+        ids = list(ids)
+        with self._lock:
+            found, missing = self._genres.lookup(ids)
+        if missing:
+            async with self.async_bind.connect() as conn:
+                rows = (await conn.execute(self._genres_stmt(missing))).fetchall()
+            found.update(self._store_genres(rows))
+        return [found[i] for i in ids if i in found]
+
+    def genre(self, genre_id: Optional[int]) -> Optional[GenreEntry]:
+        if not genre_id:
+            return None
+        found = self.genres([genre_id])
+        return found[0] if found else None
+
+    async def agenre(self, genre_id: Optional[int]) -> Optional[GenreEntry]:
+        if not genre_id:
+            return None
+        found = await self.agenres([genre_id])
+        return found[0] if found else None
+
+    def movie(self, movie_id: Optional[int]) -> Optional[MovieEntry]:
+        if not movie_id:
+            return None
+        found = self.movies([movie_id])
+        return found[0] if found else None
+
+    async def amovie(self, movie_id: Optional[int]) -> Optional[MovieEntry]:
+        if not movie_id:
+            return None
+        found = await self.amovies([movie_id])
+        return found[0] if found else None
+
+    def showtime(self, showtime_id: Optional[int]) -> Optional[ShowtimeEntry]:
+        if not showtime_id:
+            return None
+        found = self.showtimes([showtime_id])
+        return found[0] if found else None
+
+    async def ashowtime(self, showtime_id: Optional[int]) -> Optional[ShowtimeEntry]:
+        if not showtime_id:
+            return None
+        found = await self.ashowtimes([showtime_id])
+        return found[0] if found else None
+
+    def movie_dicts(self, ids: Optional[Iterable[int]]) -> List[dict]:
+        return [entry.as_dict() for entry in self.movies(ids or [])]
+
+    def showtime_dicts(self, ids: Optional[Iterable[int]]) -> List[dict]:
+        return [entry.as_dict() for entry in self.showtimes(ids or [])]
+
+    # --- invalidasi ---
+
+    def invalidate_movies(self, ids: Optional[Iterable[int]] = None) -> None:
+        with self._lock:
+            self._movies.invalidate(ids)
+            self._version += 1
+
+    def invalidate_showtimes(self, ids: Optional[Iterable[int]] = None) -> None:
+        with self._lock:
+            self._showtimes.invalidate(ids)
+            self._version += 1
+
+    def invalidate_genres(self, ids: Optional[Iterable[int]] = None) -> None:
+        with self._lock:
+            self._genres.invalidate(ids)
+            self._version += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._movies.invalidate()
+            self._showtimes.invalidate()
+            self._genres.invalidate()
+            self._version += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "version": self._version,
+                "movies": self._movies.stats(),
+                "showtimes": self._showtimes.stats(),
+                "genres": self._genres.stats(),
+            }
+
+    # --- loader database ---
+
+    @staticmethod
+    def _movies_stmt(ids: List[int]):
+        return select(movies_table.c.id, movies_table.c.title, movies_table.c.description).where(
+            movies_table.c.id.in_(ids)
+        )
+
+    @staticmethod
+    def _showtimes_stmt(ids: List[int]):
+        return select(showtimes_table.c.id, showtimes_table.c.movie_id, showtimes_table.c.time).where(
+            showtimes_table.c.id.in_(ids)
+        )
+
+    @staticmethod
+    def _genres_stmt(ids: List[int]):
+        return select(genres_table.c.id, genres_table.c.name).where(genres_table.c.id.in_(ids))
+
+    def _store_movies(self, rows) -> Dict[int, MovieEntry]:
+        entries = {row.id: MovieEntry(row.id, row.title, row.description) for row in rows}
+        with self._lock:
+            self._put_all(self._movies, entries.items())
+        return entries
+
+    def _store_showtimes(self, rows) -> Dict[int, ShowtimeEntry]:
+        entries = {row.id: showtime_entry(row.id, row.movie_id, row.time) for row in rows}
+        with self._lock:
+            self._put_all(self._showtimes, entries.items())
+        return entries
+
+    def _store_genres(self, rows) -> Dict[int, GenreEntry]:
+        entries = {row.id: GenreEntry(row.id, row.name) for row in rows}
+        with self._lock:
+            self._put_all(self._genres, entries.items())
+        return entries
+
+
+catalogue = Catalogue()
@@ -0,0 +1,201 @@
+"""Database engines (sync + async) configured from the environment.
+
+``TIKETA_DATABASE_URL`` selects the backend:
+
+* unset or ``memory`` (default): a named in-memory SQLite database on the
+  ``memdb`` VFS. Unlike ``sqlite:///:memory:`` every connection, on every
+  thread, sees the same database, and unlike a shared-cache database it uses
+  normal SQLite file locking, so concurrent writers wait on the busy timeout
+  instead of failing with ``database table is locked``;
+* ``sqlite:///path.db``: a file database in WAL mode (readers never block the
+  single writer), with ``synchronous=NORMAL`` and a busy timeout;
+* ``postgresql://...``: a pooled PostgreSQL database laid out like
+  ``docs/schema.sql``. The async engine uses ``asyncpg``.
+
+Pool sizing is explicit for every backend: ``TIKETA_DB_POOL_SIZE``,
+``TIKETA_DB_MAX_OVERFLOW``, ``TIKETA_DB_POOL_TIMEOUT`` and
+``TIKETA_DB_POOL_RECYCLE`` (seconds). ``TIKETA_DB_BUSY_TIMEOUT`` (seconds) is
+how long a SQLite writer waits for the lock.
+
+Nothing is read or connected at import: :func:`get_database_config`,
+:func:`get_engine` and :func:`get_async_engine` build their object on first use.
+"""
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool
+
+# Nama harus diawali "/" agar database memdb dibagi antar koneksi dalam satu proses.
+SQLITE_MEMORY_URI = "file:/tiketa?vfs=memdb"
+MEMORY_URLS = {"", "memory", ":memory:"}
+
+
+@dataclass(frozen=True)
+class DatabaseConfig:
+    url: str = "memory"
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = 1800
+    busy_timeout: float = 5.0
+
+    @classmethod
+    def from_env(cls) -> "DatabaseConfig":
+        defaults = cls()
+        return cls(
+            url=os.getenv("TIKETA_DATABASE_URL", defaults.url).strip(),
+            pool_size=int(os.getenv("TIKETA_DB_POOL_SIZE", defaults.pool_size)),
+            max_overflow=int(os.getenv("TIKETA_DB_MAX_OVERFLOW", defaults.max_overflow)),
+            pool_timeout=float(os.getenv("TIKETA_DB_POOL_TIMEOUT", defaults.pool_timeout)),
+            pool_recycle=int(os.getenv("TIKETA_DB_POOL_RECYCLE", defaults.pool_recycle)),
+            busy_timeout=float(os.getenv("TIKETA_DB_BUSY_TIMEOUT", defaults.busy_timeout)),
+        )
+
+    @property
+    def is_memory(self) -> bool:
+        return self.url.lower() in MEMORY_URLS
+
+    @property
+    def backend(self) -> str:
+        """``"memory"``, ``"sqlite"`` or the dialect name (e.g. ``"postgresql"``)."""
+        if self.is_memory:
+            return "memory"
+        return make_url(self.url).get_backend_name()
+
+    def sync_url(self) -> str:
+        if self.is_memory:
+            return f"sqlite:///{SQLITE_MEMORY_URI}&uri=true"
+        url = make_url(self.url)
+        if url.get_backend_name() == "postgresql" and url.drivername == "postgresql":
+            url = url.set(drivername="postgresql+psycopg2")
+        return url.render_as_string(hide_password=False)
+
+    def async_url(self) -> str:
+        if self.is_memory:
+            return f"sqlite+aiosqlite:///{SQLITE_MEMORY_URI}&uri=true"
+        url = make_url(self.url)
+        drivers = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+        url = url.set(drivername=drivers.get(url.get_backend_name(), url.drivername))
+        return url.render_as_string(hide_password=False)
+
+    def pool_kwargs(self) -> dict:
+        kwargs = {
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout,
+        }
+        if self.is_memory:
+            # Koneksi memdb tidak pernah basi, dan menutup semuanya berarti kehilangan data.
+            return kwargs
+        kwargs["pool_recycle"] = self.pool_recycle
+        kwargs["pool_pre_ping"] = self.backend != "sqlite"
+        return kwargs
+
+
+def _sqlite_connect_args(config: DatabaseConfig) -> dict:
+    return {"check_same_thread": False, "timeout": config.busy_timeout}
+
+
+def _install_sqlite_pragmas(sync_engine: Engine, config: DatabaseConfig) -> None:
+    busy_ms = int(config.busy_timeout * 1000)
+    wal = not config.is_memory
+
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"PRAGMA busy_timeout={busy_ms}")
+            cursor.execute("PRAGMA foreign_keys=ON")
+            if wal:
+                cursor.execute("PRAGMA journal_mode=WAL")
+                cursor.execute("PRAGMA synchronous=NORMAL")
+        finally:
+            cursor.close()
+
+
+_memory_anchor: Optional[sqlite3.Connection] = None
+
+
+def _anchor_memory_database() -> None:
+    """Keep one connection open so the memdb database outlives pool recycling."""
+    global _memory_anchor
+    if _memory_anchor is None:
+        _memory_anchor = sqlite3.connect(SQLITE_MEMORY_URI, uri=True, check_same_thread=False)
+
+
+def create_db_engine(config: Optional[DatabaseConfig] = None) -> Engine:
+    config = config or DatabaseConfig.from_env()
+    if config.backend in {"memory", "sqlite"}:
+        if config.is_memory:
+            _anchor_memory_database()
+        sync_engine = create_engine(
+            config.sync_url(),
+            poolclass=QueuePool,
+            connect_args=_sqlite_connect_args(config),
+            **config.pool_kwargs(),
+        )
+        _install_sqlite_pragmas(sync_engine, config)
+        return sync_engine
+    return create_engine(config.sync_url(), **config.pool_kwargs())
+
+
+def create_async_db_engine(config: Optional[DatabaseConfig] = None):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    config = config or DatabaseConfig.from_env()
+    if config.backend in {"memory", "sqlite"}:
+        if config.is_memory:
+            _anchor_memory_database()
+        async_engine = create_async_engine(
+            config.async_url(),
+            connect_args=_sqlite_connect_args(config),
+            **config.pool_kwargs(),
+        )
+        _install_sqlite_pragmas(async_engine.sync_engine, config)
+        return async_engine
+    return create_async_engine(config.async_url(), **config.pool_kwargs())
+
+
+# Konfigurasi dan engine dibuat saat pertama dipakai, bukan saat import, supaya
+# ``import run_tiketa`` tidak membaca environment atau membuka koneksi database.
+_database_config: Optional[DatabaseConfig] = None
+_engine: Optional[Engine] = None
+_async_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_database_config() -> DatabaseConfig:
+    """Konfigurasi database proses ini, dibaca dari environment saat pertama dipakai."""
+    global _database_config
+    if _database_config is None:
+        with _engine_lock:
+            if _database_config is None:
+                _database_config = DatabaseConfig.from_env()
+    return _database_config
+
+
+def get_engine() -> Engine:
+    """Engine sync bersama, dibuat saat pertama dipakai."""
+    global _engine
+    if _engine is None:
+        config = get_database_config()
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_db_engine(config)
+    return _engine
+
+
+def get_async_engine():
+    """Engine async untuk database yang sama dengan :func:`get_engine`, dibuat saat pertama dipakai."""
+    global _async_engine
+    if _async_engine is None:
+        config = get_database_config()
+        with _engine_lock:
+            if _async_engine is None:
+                _async_engine = create_async_db_engine(config)
+    return _async_engine
@@ -0,0 +1,124 @@
+"""Ordered, idempotent schema migrations for persistent databases.
+
+The in-memory database is built from ``metadata.create_all`` every start, so
+it always has the current schema. A file SQLite or PostgreSQL database
+created by an older version keeps its old layout, however, because
+``create_all`` never alters tables that already exist. Each migration here
+runs once per database. Applied names are recorded in ``schema_migrations``.
+
+Usage::
+
+    python -m db.migrations            # apply pending migrations
+    python -m db.migrations --list     # show applied/pending
+"""
+from __future__ import annotations
+
+import argparse
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, false, insert, inspect, select, text
+
+from db.catalogue import catalogue
+from db.schema import bookings_table, get_engine, metadata, movie_genres_table, showtimes_table
+
+_migration_metadata = MetaData()
+
+schema_migrations_table = Table(
+    "schema_migrations",
+    _migration_metadata,
+    Column("name", String(120), primary_key=True),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def _index(table: Table, name: str):
+    return next(index for index in table.indexes if index.name == name)
+
+
+def _add_query_indexes(conn) -> None:
+    """Secondary indexes for get_showtimes, genre lookups and time-range queries.
+
+    Seat-by-showtime reads are already covered by ``uq_booking_showtime_seat``.
+    """
+    for index in (
+        _index(showtimes_table, "ix_showtimes_movie_id_time"),
+        _index(showtimes_table, "ix_showtimes_time"),
+        _index(movie_genres_table, "ix_movie_genres_genre_id"),
+    ):
+        index.create(conn, checkfirst=True)
+
+
+def _align_with_rds_schema(conn) -> None:
+    """``bookings.user_name`` -> ``"user"`` and ``showtimes.is_archived``, as in docs/schema.sql.
+
+    Databases created from the current schema (or from docs/schema.sql)
+    already have both, so each change only runs when the old layout is found.
+    """
+    quote = conn.dialect.identifier_preparer.quote
+    bookings_columns = {column["name"] for column in inspect(conn).get_columns(bookings_table.name)}
+    user_column = bookings_table.c.user_name.name
+    if "user_name" in bookings_columns and user_column not in bookings_columns:
+        conn.execute(
+            text(f"ALTER TABLE {quote(bookings_table.name)} RENAME COLUMN user_name TO {quote(user_column)}")
+        )
+    showtime_columns = {column["name"] for column in inspect(conn).get_columns(showtimes_table.name)}
+    if "is_archived" not in showtime_columns:
+        default = false().compile(dialect=conn.dialect)
+        conn.execute(
+            text(
+                f"ALTER TABLE {quote(showtimes_table.name)} "
+                f"ADD COLUMN is_archived BOOLEAN NOT NULL DEFAULT {default}"
+            )
+        )
+
+
+MIGRATIONS: List[Tuple[str, Callable]] = [
+    ("0001_query_indexes", _add_query_indexes),
+    ("0002_rds_column_names", _align_with_rds_schema),
+]
+
+
+def applied_migrations(bind=None) -> List[str]:
+    bind = bind or get_engine()
+    _migration_metadata.create_all(bind)
+    with bind.connect() as conn:
+        return list(conn.execute(select(schema_migrations_table.c.name)).scalars())
+
+
+def migrate(bind=None) -> List[str]:
+    """Apply pending migrations in order (one transaction each); return their names."""
+    bind = bind or get_engine()
+    metadata.create_all(bind)
+    done = set(applied_migrations(bind))
+    applied = []
+    for name, step in MIGRATIONS:
+        if name in done:
+            continue
+        with bind.begin() as conn:
+            step(conn)
+            conn.execute(insert(schema_migrations_table).values(name=name, applied_at=datetime.now()))
+        applied.append(name)
+    if applied:
+        # Migrasi boleh mengubah data katalog; cache dan indeks turunannya dibangun ulang.
+        catalogue.clear()
+    return applied
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Jalankan migrasi skema database Tiketa.")
+    parser.add_argument("--list", action="store_true", help="Tampilkan status migrasi tanpa menjalankannya.")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        done = set(applied_migrations())
+        for name, _ in MIGRATIONS:
+            print(f"{'x' if name in done else ' '} {name}")
+        return 0
+    applied = migrate()
+    print(f"Migrasi diterapkan: {', '.join(applied)}" if applied else "Skema sudah terbaru.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,136 @@
+"""Query-plan audit for the statements issued by ``tools/bookings.py``.
+
+Runs every booking tool once against the configured database (see
+``db/engine.py``), records each SELECT it sends through the engine, and
+prints the ``EXPLAIN`` output for it. Exits with status 1 when any plan
+contains a full scan: a SQLite ``SCAN`` (table or whole index) or a
+PostgreSQL ``Seq Scan``.
+
+The bookings tools read through the seat bitmap index, so the bitmap is
+cleared first to force its load query to run as well. ``book_tickets`` is
+not called: its INSERT and the seat query that follows are run inside a
+transaction that is rolled back, so the audit never writes a booking.
+
+Usage::
+
+    python -m db.query_plan
+"""
+from __future__ import annotations
+
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event, insert, select, text
+
+from db.schema import bookings_table, get_engine, movies_table, showtimes_table
+from db.snapshot import load_database
+
+FULL_SCAN = {
+    "sqlite": re.compile(r"^\s*SCAN\b"),
+    "postgresql": re.compile(r"\bSeq Scan\b"),
+}
+
+AUDIT_USER = "query-plan-audit"
+
+
+def _sample_ids() -> Tuple[int, int]:
+    with get_engine().connect() as conn:
+        movie_id = conn.execute(select(movies_table.c.id).limit(1)).scalar()
+        showtime_id = conn.execute(
+            select(showtimes_table.c.id).where(showtimes_table.c.movie_id == movie_id).limit(1)
+        ).scalar()
+    return movie_id, showtime_id
+
+
+def _exercise_tools(movie_id: int, showtime_id: int) -> None:
+    from tools.bookings import (
+        _booking_rows,
+        find_adjacent_seats,
+        get_available_seats,
+        get_showtimes,
+        hold_seats,
+        release_seat_holds,
+        search_movies,
+    )
+    from tools.seat_index import seat_index
+
+    seat_index.invalidate()
+    search_movies.invoke({"title": "a"})
+    get_showtimes.invoke({"movie_id": movie_id})
+    get_available_seats.invoke({"showtime_id": showtime_id})
+    find_adjacent_seats.invoke({"showtime_id": showtime_id, "count": 2})
+    hold_seats(showtime_id, ["A1"], AUDIT_USER)
+    release_seat_holds(AUDIT_USER)
+    # Statement yang sama dengan book_tickets, tetapi di-rollback.
+    with get_engine().connect() as conn:
+        transaction = conn.begin()
+        try:
+            conn.execute(insert(bookings_table), _booking_rows(showtime_id, ["A1"], AUDIT_USER))
+            conn.execute(
+                select(bookings_table.c.seat).where(
+                    bookings_table.c.showtime_id == showtime_id, bookings_table.c.user_name == AUDIT_USER
+                )
+            )
+        finally:
+            transaction.rollback()
+
+
+def capture_statements() -> List[Tuple[str, object]]:
+    """Run the booking tools and return the distinct SELECTs they issued."""
+    engine = get_engine()
+    movie_id, showtime_id = _sample_ids()
+    captured: List[Tuple[str, object]] = []
+    seen = set()
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and statement not in seen:
+            seen.add(statement)
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        _exercise_tools(movie_id, showtime_id)
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+    return captured
+
+
+def explain(statement: str, parameters) -> List[str]:
+    engine = get_engine()
+    dialect = engine.dialect.name
+    with engine.connect() as conn:
+        if dialect == "sqlite":
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            return [row[-1] for row in rows]
+        if dialect == "postgresql":
+            # Tabel kecil di lingkungan dev membuat planner memilih seq scan walau index ada.
+            # SET LOCAL hanya berlaku di dalam transaksi, jadi EXPLAIN ikut di blok yang sama.
+            with conn.begin():
+                conn.execute(text("SET LOCAL enable_seqscan = off"))
+                rows = conn.exec_driver_sql(f"EXPLAIN {statement}", parameters).fetchall()
+            return [row[0] for row in rows]
+    raise ValueError(f"EXPLAIN untuk dialect '{dialect}' belum didukung.")
+
+
+def audit() -> int:
+    full_scan = FULL_SCAN.get(get_engine().dialect.name)
+    statements = capture_statements()
+    failures = 0
+    for statement, parameters in statements:
+        plan = explain(statement, parameters)
+        scans = [line for line in plan if full_scan and full_scan.search(line)]
+        failures += bool(scans)
+        print(("FULL SCAN" if scans else "OK") + f": {' '.join(statement.split())}")
+        for line in plan:
+            print(f"    {line}")
+    print(f"{len(statements)} query diperiksa, {failures} memakai full scan.")
+    return 1 if failures else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    load_database()
+    return audit()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
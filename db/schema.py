@@ -1,5 +1,4 @@
 from sqlalchemy import (
-    create_engine,
     MetaData,
     Table,
     Column,
@@ -8,13 +7,17 @@ from sqlalchemy import (
     Text,
     Date,
     DateTime,
+    Boolean,
     ForeignKey,
+    Index,
     UniqueConstraint,
     func,
+    false,
 )
 
-# In-memory SQLite engine (sama seperti sebelumnya)
-engine = create_engine("sqlite:///:memory:")
+# Engine dan pool-nya dikonfigurasi lewat environment, lihat db/engine.py.
+from db.engine import get_engine, get_async_engine  # noqa: F401
+
 metadata = MetaData()
 
 genres_table = Table(
@@ -41,6 +44,8 @@ movie_genres_table = Table(
     metadata,
     Column("movie_id", Integer, ForeignKey("movies.id"), primary_key=True),
     Column("genre_id", Integer, ForeignKey("genres.id"), primary_key=True),
+    # PK (movie_id, genre_id) hanya melayani lookup per film; ini untuk arah sebaliknya.
+    Index("ix_movie_genres_genre_id", "genre_id", "movie_id"),
 )
 
 showtimes_table = Table(
@@ -49,16 +54,23 @@ showtimes_table = Table(
     Column("id", Integer, primary_key=True, autoincrement=True),
     Column("movie_id", Integer, ForeignKey("movies.id"), nullable=False),
     Column("time", DateTime, nullable=False),
+    Column("is_archived", Boolean, nullable=False, default=False, server_default=false()),
     Column("created_at", DateTime, default=func.now()),
+    # get_showtimes: filter movie_id, urut time (di SQLite rowid ikut di index, jadi covering).
+    Index("ix_showtimes_movie_id_time", "movie_id", "time"),
+    Index("ix_showtimes_time", "time"),
 )
 
 bookings_table = Table(
     "bookings",
     metadata,
     Column("id", Integer, primary_key=True, autoincrement=True),
-    Column("user_name", String(255), nullable=False),
+    # Kolom di RDS bernama "user" (lihat docs/schema.sql); di kode tetap user_name.
+    Column("user", String(255), key="user_name", nullable=False),
     Column("seat", String(10), nullable=False),
     Column("showtime_id", Integer, ForeignKey("showtimes.id"), nullable=False),
     Column("created_at", DateTime, default=func.now()),
+    # Index unik (showtime_id, seat) sekaligus covering index untuk "kursi per jadwal".
     UniqueConstraint("showtime_id", "seat", name="uq_booking_showtime_seat"),
-)
\ No newline at end of file
+)
+
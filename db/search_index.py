@@ -0,0 +1,270 @@
+"""In-memory inverted index over movie titles, descriptions and genre names.
+
+Replaces ``ILIKE '%...%'`` scans in ``search_movies``: the index is built at
+seed time (or lazily on first search) and queries are answered from posting
+lists with BM25 ranking. Title matches weigh more than genre matches, which
+weigh more than description matches. Query terms of three or more characters
+also match as prefixes ("knig" -> "knight") through a sorted vocabulary.
+When no token matches, the search falls back to the old case-insensitive
+substring match on titles, so mid-word queries ("pirit") still find films.
+
+A title-only postings view sits next to the weighted one. ``search_movies``
+matches its ``title`` argument on that view (``field="title"``), so a title
+lookup never returns a film whose description or genre merely contains the
+word. Its free-text ``query`` argument ranks on the weighted view with
+``boost_field="title"``: films whose title matches come before films that only
+mention the words in their description or genres. A genre-only search is
+ranked on the genre name instead of returned in id order.
+
+The index remembers the :attr:`db.catalogue.Catalogue.version` it was built
+at and rebuilds itself on the next search after the catalogue is invalidated.
+"""
+import math
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+
+from db.catalogue import catalogue
+from db.schema import get_engine, movies_table, genres_table, movie_genres_table
+
+FIELD_WEIGHTS = {"title": 3.0, "genre": 2.0, "description": 1.0}
+INDEX_STOPWORDS = {"the", "a", "an", "of", "and", "in", "on", "to", "film", "movie", "yang", "dan", "di"}
+PREFIX_MIN_LENGTH = 3
+PREFIX_PENALTY = 0.5
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return re.findall(r"[a-z0-9]+", (text or "").lower())
+
+
+def _query_terms(text: str) -> List[str]:
+    tokens = tokenize(text)
+    terms = [tok for tok in tokens if tok not in INDEX_STOPWORDS]
+    # Kalau query hanya berisi stopword (mis. "The"), tetap pakai token mentahnya.
+    return list(dict.fromkeys(terms or tokens))
+
+
+class _Postings:
+    """Posting lists, document lengths and sorted vocabulary of one searchable view."""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self.doc_lengths: Dict[int, float] = {}
+        self.avg_length = 0.0
+        self.vocabulary: List[str] = []
+
+    def add(self, movie_id: int, weighted: Dict[str, float]) -> None:
+        for tok, weight in weighted.items():
+            self.postings[tok][movie_id] = weight
+        self.doc_lengths[movie_id] = sum(weighted.values())
+
+    def finish(self) -> None:
+        if self.doc_lengths:
+            self.avg_length = sum(self.doc_lengths.values()) / len(self.doc_lengths)
+        self.vocabulary = sorted(self.postings)
+        self.postings = dict(self.postings)
+
+
+class _Snapshot:
+    """Immutable index contents; searches never see a half-built index."""
+
+    def __init__(self):
+        self.docs: Dict[int, Tuple[str, Optional[str]]] = {}
+        # Id genre per film; namanya dibaca lewat ``catalogue.genres``.
+        self.genre_ids: Dict[int, Tuple[int, ...]] = {}
+        # None = semua field berbobot (FIELD_WEIGHTS); "title" = judul saja.
+        self.fields: Dict[Optional[str], _Postings] = {None: _Postings(), "title": _Postings()}
+        self.genres: Dict[str, Set[int]] = {}
+
+
+class MovieSearchIndex:
+    def __init__(self, bind=None):
+        self._bind = bind
+        self._snapshot: Optional[_Snapshot] = None
+        self._built_version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def bind(self):
+        return self._bind if self._bind is not None else get_engine()
+
+    @property
+    def is_built(self) -> bool:
+        return self._snapshot is not None
+
+    @property
+    def is_stale(self) -> bool:
+        return self._snapshot is None or self._built_version != catalogue.version
+
+    def rebuild(self, conn=None) -> int:
+        """(Re)build the index from the database; returns the number of movies."""
+        if conn is None:
+            with self.bind.connect() as own_conn:
+                return self.rebuild(own_conn)
+        # Dibaca sebelum query: invalidasi selama rebuild memicu rebuild berikutnya.
+        version = catalogue.version
+        movies = conn.execute(
+            select(movies_table.c.id, movies_table.c.title, movies_table.c.description)
+        ).fetchall()
+        genre_rows = conn.execute(
+            select(movie_genres_table.c.movie_id, genres_table.c.id, genres_table.c.name).select_from(
+                movie_genres_table.join(genres_table)
+            )
+        ).fetchall()
+        genres_by_movie: Dict[int, List[Tuple[int, str]]] = defaultdict(list)
+        for row in genre_rows:
+            genres_by_movie[row.movie_id].append((row.id, row.name))
+        self._snapshot = self._build(
+            ((row.id, row.title, row.description, genres_by_movie.get(row.id, [])) for row in movies)
+        )
+        self._built_version = version
+        return len(self._snapshot.docs)
+
+    def _build(self, movies: Iterable[Tuple[int, str, Optional[str], List[Tuple[int, str]]]]) -> _Snapshot:
+        snapshot = _Snapshot()
+        for movie_id, title, description, genres in movies:
+            snapshot.docs[movie_id] = (title, description)
+            snapshot.genre_ids[movie_id] = tuple(sorted(genre_id for genre_id, _ in genres))
+            genre_names = [name for _, name in genres]
+            weighted: Dict[str, float] = defaultdict(float)
+            title_only: Dict[str, float] = defaultdict(float)
+            fields = {"title": title, "description": description, "genre": " ".join(genre_names)}
+            for field, text in fields.items():
+                for tok in tokenize(text):
+                    weighted[tok] += FIELD_WEIGHTS[field]
+                    if field == "title":
+                        title_only[tok] += 1.0
+            snapshot.fields[None].add(movie_id, weighted)
+            snapshot.fields["title"].add(movie_id, title_only)
+            for name in genre_names:
+                snapshot.genres.setdefault(name.lower(), set()).add(movie_id)
+        for view in snapshot.fields.values():
+            view.finish()
+        return snapshot
+
+    def _ensure_built(self) -> _Snapshot:
+        if self.is_stale:
+            with self._lock:
+                if self.is_stale:
+                    self.rebuild()
+        return self._snapshot
+
+    def genre_movie_ids(self, genre_name: str) -> Set[int]:
+        """Movie ids whose genre name contains ``genre_name`` (case-insensitive)."""
+        snapshot = self._ensure_built()
+        needle = genre_name.strip().lower()
+        ids: Set[int] = set()
+        for name, movie_ids in snapshot.genres.items():
+            if needle in name:
+                ids |= movie_ids
+        return ids
+
+    def _expand(self, view: _Postings, term: str) -> List[Tuple[str, float]]:
+        matches = [(term, 1.0)] if term in view.postings else []
+        if len(term) >= PREFIX_MIN_LENGTH:
+            pos = bisect_left(view.vocabulary, term)
+            while pos < len(view.vocabulary) and view.vocabulary[pos].startswith(term):
+                candidate = view.vocabulary[pos]
+                if candidate != term:
+                    matches.append((candidate, PREFIX_PENALTY))
+                pos += 1
+        return matches
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        genre_name: Optional[str] = None,
+        limit: int = 10,
+        field: Optional[str] = None,
+        boost_field: Optional[str] = None,
+    ) -> List[dict]:
+        """Return up to ``limit`` movies ranked by relevance.
+
+        Only movies covering the largest number of distinct query terms are
+        kept, so multi-word queries behave like AND when any movie matches
+        every term and degrade gracefully otherwise. ``field="title"`` matches
+        the query against titles only; ``boost_field="title"`` keeps ranking on
+        ``field`` but puts movies matching in that field first. Without a
+        query, movies of ``genre_name`` are ranked on the genre name itself.
+        """
+        snapshot = self._ensure_built()
+        view = snapshot.fields[field]
+        allowed = self.genre_movie_ids(genre_name) if genre_name else None
+        terms = _query_terms(query) if query else []
+        by_genre = not terms and field is None and allowed is not None
+        if by_genre:
+            terms = _query_terms(genre_name)
+
+        if not terms:
+            ids = sorted(allowed if allowed is not None else snapshot.docs)[:limit]
+            return [self._as_result(snapshot, movie_id, 0.0) for movie_id in ids]
+
+        scores, coverage = self._score(snapshot, view, terms, allowed)
+        if not scores:
+            if by_genre:
+                # Substring genre ("nima") tanpa token yang cocok: urutan id seperti dulu.
+                return [self._as_result(snapshot, movie_id, 0.0) for movie_id in sorted(allowed)[:limit]]
+            return self._substring_matches(snapshot, query, allowed, limit)
+        boosted: Dict[int, int] = {}
+        if boost_field is not None and not by_genre:
+            _, boosted = self._score(snapshot, snapshot.fields[boost_field], terms, allowed)
+        best_coverage = max(coverage.values())
+        ranked = sorted(
+            (movie_id for movie_id in scores if coverage[movie_id] == best_coverage),
+            key=lambda movie_id: (-boosted.get(movie_id, 0), -scores[movie_id], movie_id),
+        )
+        return [self._as_result(snapshot, movie_id, scores[movie_id]) for movie_id in ranked[:limit]]
+
+    def _score(
+        self, snapshot: _Snapshot, view: _Postings, terms: List[str], allowed: Optional[Set[int]]
+    ) -> Tuple[Dict[int, float], Dict[int, int]]:
+        """BM25 scores and number of distinct query terms matched, per movie."""
+        scores: Dict[int, float] = defaultdict(float)
+        coverage: Dict[int, int] = defaultdict(int)
+        total_docs = len(snapshot.docs)
+        for term in terms:
+            matched_docs: Set[int] = set()
+            for vocab_term, boost in self._expand(view, term):
+                postings = view.postings[vocab_term]
+                idf = math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for movie_id, tf in postings.items():
+                    if allowed is not None and movie_id not in allowed:
+                        continue
+                    norm = 1 - BM25_B + BM25_B * view.doc_lengths[movie_id] / (view.avg_length or 1.0)
+                    scores[movie_id] += boost * idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+                    matched_docs.add(movie_id)
+            for movie_id in matched_docs:
+                coverage[movie_id] += 1
+        return scores, coverage
+
+    def _substring_matches(self, snapshot: _Snapshot, query: str, allowed: Optional[Set[int]], limit: int) -> List[dict]:
+        """Fallback matching the old ``title ILIKE '%query%'`` behaviour."""
+        needle = query.strip().lower()
+        if not needle:
+            return []
+        ids = [
+            movie_id
+            for movie_id, (title, _) in sorted(snapshot.docs.items())
+            if needle in title.lower() and (allowed is None or movie_id in allowed)
+        ]
+        return [self._as_result(snapshot, movie_id, 0.0) for movie_id in ids[:limit]]
+
+    @staticmethod
+    def _as_result(snapshot: _Snapshot, movie_id: int, score: float) -> dict:
+        title, description = snapshot.docs[movie_id]
+        return {
+            "id": movie_id,
+            "title": title,
+            "description": description,
+            "genre_ids": list(snapshot.genre_ids.get(movie_id, ())),
+            "score": round(score, 4),
+        }
+
+
+movie_search_index = MovieSearchIndex()
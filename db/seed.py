@@ -1,67 +1,101 @@
-from datetime import datetime, timedelta
-from sqlalchemy import insert, select
-from sqlalchemy.exc import IntegrityError
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+
+from sqlalchemy import insert, text
 
 from db.schema import (
-    engine,
+    get_engine,
     metadata,
+    bookings_table,
     genres_table,
     movies_table,
     movie_genres_table,
     showtimes_table,
 )
+from db.search_index import movie_search_index
+from db.catalogue import catalogue
 from data.movies import SAMPLE_MOVIES
 
+BULK_CHUNK_SIZE = 10_000
+
+# Jadwal harian tiap film relatif ke tanggal seed: (offset hari, jam, menit).
+SHOWTIME_SLOTS = ((0, 19, 0), (0, 21, 30), (1, 16, 0))
+
+
+def chunked(rows: Iterable[dict], size: int = BULK_CHUNK_SIZE) -> Iterator[List[dict]]:
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def bulk_insert(conn, table, rows: Iterable[dict], chunk_size: int = BULK_CHUNK_SIZE) -> int:
+    """executemany ``rows`` into ``table`` in chunks (rows may be a lazy generator)."""
+    total = 0
+    for chunk in chunked(rows, chunk_size):
+        conn.execute(insert(table), chunk)
+        total += len(chunk)
+    return total
+
+
+def _sync_serial_sequences(conn, tables) -> None:
+    """Majukan sequence ``serial`` PostgreSQL setelah insert dengan id eksplisit."""
+    for table in tables:
+        conn.execute(
+            text(f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), COALESCE(MAX(id), 1)) FROM {table.name}")
+        )
+
+
+def seed_database(today: Optional[date] = None):
+    """Buat tabel dan isi SAMPLE_MOVIES -> genres, movies, showtimes dalam satu transaksi.
+
+    Id dihitung di muka (bukan ``RETURNING`` per baris) supaya setiap tabel cukup
+    satu executemany.
+    """
+    metadata.create_all(get_engine())
+    today = today or datetime.now().date()
+
+    genre_ids = {
+        name: genre_id
+        for genre_id, name in enumerate(sorted({g for movie in SAMPLE_MOVIES for g in movie.get("genres", [])}), start=1)
+    }
+    genre_rows = [{"id": genre_id, "name": name} for name, genre_id in genre_ids.items()]
+    movie_rows = []
+    movie_genre_rows = []
+    showtime_rows = []
+    for movie_id, movie in enumerate(SAMPLE_MOVIES, start=1):
+        movie_rows.append(
+            {
+                "id": movie_id,
+                "title": movie["title"],
+                "description": movie.get("description"),
+                "studio_number": movie["studio_number"],
+                "release_date": movie.get("release_date"),
+            }
+        )
+        movie_genre_rows.extend({"movie_id": movie_id, "genre_id": genre_ids[g]} for g in movie.get("genres", []))
+        showtime_rows.extend(
+            {"movie_id": movie_id, "time": datetime(today.year, today.month, today.day, hour, minute) + timedelta(days=days)}
+            for days, hour, minute in SHOWTIME_SLOTS
+        )
+    for showtime_id, row in enumerate(showtime_rows, start=1):
+        row["id"] = showtime_id
+
+    with get_engine().begin() as conn:
+        bulk_insert(conn, genres_table, genre_rows)
+        bulk_insert(conn, movies_table, movie_rows)
+        bulk_insert(conn, movie_genres_table, movie_genre_rows)
+        bulk_insert(conn, showtimes_table, showtime_rows)
+        if conn.dialect.name == "postgresql":
+            _sync_serial_sequences(conn, (genres_table, movies_table, showtimes_table, bookings_table))
+
+    # Isi katalog berubah; entri cache lama (mis. dari seed sebelumnya) tidak berlaku lagi.
+    # clear() menaikkan versi katalog, jadi indeks pencarian dibangun sesudahnya.
+    catalogue.clear()
+    with get_engine().connect() as conn:
+        movie_search_index.rebuild(conn)
 
-def seed_database():
-    """Buat tabel dan isi SAMPLE_MOVIES -> genres, movies, showtimes (sama logika seperti run_tiketa)."""
-    metadata.create_all(engine)
-
-    with engine.connect() as conn:
-        all_genres = set()
-        for movie in SAMPLE_MOVIES:
-            all_genres.update(movie.get("genres", []))
-
-        genre_map = {}
-        for genre_name in all_genres:
-            result = conn.execute(insert(genres_table).values(name=genre_name).returning(genres_table.c.id))
-            genre_map[genre_name] = result.fetchone()[0]
-
-        today = datetime.now().date()
-        movie_id_map = {}
-        showtime_data = []
-        movie_genre_data = []
-
-        for movie in SAMPLE_MOVIES:
-            result = conn.execute(
-                insert(movies_table)
-                .values(
-                    title=movie["title"],
-                    description=movie.get("description"),
-                    studio_number=movie["studio_number"],
-                    release_date=movie.get("release_date"),
-                )
-                .returning(movies_table.c.id)
-            )
-            movie_id = result.fetchone()[0]
-            movie_id_map[movie["title"]] = movie_id
-
-            showtime_data.extend(
-                [
-                    {"movie_id": movie_id, "time": datetime(today.year, today.month, today.day, 19, 0)},
-                    {"movie_id": movie_id, "time": datetime(today.year, today.month, today.day, 21, 30)},
-                    {"movie_id": movie_id, "time": datetime(today.year, today.month, today.day, 16, 0) + timedelta(days=1)},
-                ]
-            )
-
-            for g in movie.get("genres", []):
-                movie_genre_data.append({"movie_id": movie_id, "genre_id": genre_map[g]})
-
-        if showtime_data:
-            conn.execute(insert(showtimes_table), showtime_data)
-        if movie_genre_data:
-            conn.execute(insert(movie_genres_table), movie_genre_data)
-
-        conn.commit()
-
-    print("Database seeded.")
\ No newline at end of file
+    print("Database seeded.")
@@ -0,0 +1,149 @@
+"""Warm-start snapshots of the seeded database.
+
+The in-memory database is empty at every process start, so without a snapshot
+``seed_database()`` has to rebuild all rows each boot. :func:`load_database`
+seeds once and copies the result into a SQLite file with the backup API. Later
+starts copy that file straight back into memory, which takes a single page
+copy instead of one insert per row.
+
+Snapshots are versioned. The file name carries a hash of ``SAMPLE_MOVIES``,
+the schema DDL and the seed date (showtimes are generated relative to
+today). Changing any of them makes the old file stale, and it is reseeded.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import date
+from typing import Callable, Optional
+
+from sqlalchemy import func, inspect, select
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from db.engine import get_database_config
+from db.schema import get_engine, metadata, movies_table
+from db.search_index import movie_search_index
+from db.catalogue import catalogue
+from data.movies import SAMPLE_MOVIES
+
+DEFAULT_SNAPSHOT_DIR = ".tiketa_snapshots"
+
+
+def snapshot_version(seed_date: Optional[date] = None) -> str:
+    ddl = [
+        str(statement.compile(dialect=get_engine().dialect)).strip()
+        for table in metadata.sorted_tables
+        for statement in [CreateTable(table), *(CreateIndex(index) for index in sorted(table.indexes, key=lambda i: i.name))]
+    ]
+    payload = json.dumps(
+        {
+            "movies": SAMPLE_MOVIES,
+            "schema": ddl,
+            "seed_date": (seed_date or date.today()).isoformat(),
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def snapshot_path(snapshot_dir: str, version: str) -> str:
+    return os.path.join(snapshot_dir, f"tiketa-{version[:16]}.sqlite")
+
+
+def _copy(source: sqlite3.Connection, target: sqlite3.Connection) -> None:
+    source.backup(target)
+    target.commit()
+
+
+def restore_snapshot(path: str, bind=None) -> None:
+    """Copy the snapshot file at ``path`` into the database behind ``bind``."""
+    raw = (bind or get_engine()).raw_connection()
+    try:
+        with sqlite3.connect(f"file:{path}?mode=ro", uri=True) as source:
+            _copy(source, raw.driver_connection)
+    finally:
+        raw.close()
+
+
+def write_snapshot(path: str, bind=None) -> None:
+    """Copy the database behind ``bind`` into ``path`` (atomically replaced)."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    raw = (bind or get_engine()).raw_connection()
+    try:
+        target = sqlite3.connect(tmp_path)
+        try:
+            _copy(raw.driver_connection, target)
+        finally:
+            target.close()
+    finally:
+        raw.close()
+    os.replace(tmp_path, path)
+
+
+def _prune(snapshot_dir: str, keep: str) -> None:
+    for name in os.listdir(snapshot_dir):
+        path = os.path.join(snapshot_dir, name)
+        if name.startswith("tiketa-") and name.endswith(".sqlite") and path != keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _is_seeded(bind=None) -> bool:
+    bind = bind or get_engine()
+    if not inspect(bind).has_table(movies_table.name):
+        return False
+    with bind.connect() as conn:
+        return bool(conn.execute(select(func.count()).select_from(movies_table)).scalar())
+
+
+def load_database(seed: Optional[Callable[[], None]] = None, snapshot_dir: Optional[str] = None) -> str:
+    """Restore the seeded database from a snapshot, seeding (and snapshotting) on a miss.
+
+    Returns ``"restored"``, ``"seeded"``, ``"seeded-no-snapshot"`` or, for a
+    persistent database (file SQLite, PostgreSQL) that already holds the
+    catalogue, ``"existing"``. ``TIKETA_DB_SNAPSHOT_DIR`` picks the directory;
+    ``off`` always seeds. Snapshots only apply to the in-memory database.
+    """
+    if seed is None:
+        from db.seed import seed_database as seed
+
+    if not get_database_config().is_memory:
+        from db.migrations import migrate
+
+        if _is_seeded():
+            migrate()
+            movie_search_index.rebuild()
+            return "existing"
+        seed()
+        migrate()
+        return "seeded-no-snapshot"
+
+    snapshot_dir = snapshot_dir if snapshot_dir is not None else os.getenv("TIKETA_DB_SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR)
+    if not snapshot_dir or snapshot_dir.lower() in {"off", "none", "0"}:
+        seed()
+        return "seeded-no-snapshot"
+
+    path = snapshot_path(snapshot_dir, snapshot_version())
+    if os.path.exists(path):
+        try:
+            restore_snapshot(path)
+            catalogue.clear()
+            movie_search_index.rebuild()
+            print(f"Database dipulihkan dari snapshot '{path}'.")
+            return "restored"
+        except sqlite3.Error as exc:
+            print(f"   > Snapshot '{path}' tidak bisa dipakai ({exc}), seed ulang.")
+
+    seed()
+    try:
+        write_snapshot(path)
+        _prune(snapshot_dir, keep=path)
+    except (OSError, sqlite3.Error) as exc:
+        print(f"   > Peringatan: gagal menyimpan snapshot database: {exc}")
+    return "seeded"
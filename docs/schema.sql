@@ -82,3 +82,12 @@ CREATE TABLE public.bookings (
     CONSTRAINT uq_booking_showtime_seat UNIQUE (showtime_id, seat),
     CONSTRAINT bookings_showtime_id_fkey FOREIGN KEY (showtime_id) REFERENCES public.showtimes(id)
 );
+
+
+-- Indexes
+-- Migration 0001_query_indexes (db/migrations.py). Seat-by-showtime lookups
+-- are covered by the unique index behind uq_booking_showtime_seat.
+
+CREATE INDEX ix_showtimes_movie_id_time ON public.showtimes USING btree (movie_id, "time");
+CREATE INDEX ix_showtimes_time ON public.showtimes USING btree ("time");
+CREATE INDEX ix_movie_genres_genre_id ON public.movie_genres USING btree (genre_id, movie_id);
@@ -1,9 +1,13 @@
+import asyncio
 import os
 import operator
 import re
-from copy import deepcopy
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import date, datetime, timedelta
-from typing import TypedDict, List, Optional, Literal, Annotated, Any
+from typing import TypedDict, List, NamedTuple, Optional, Literal, Annotated, Any, AsyncIterator, Iterator
 
 # LangChain & LangGraph
 from langchain_core.messages import (
@@ -11,32 +15,42 @@ from langchain_core.messages import (
     HumanMessage,
     ToolMessage,
     AIMessage,
+    AIMessageChunk,
     SystemMessage,
 )
-from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
-from langchain_google_genai import ChatGoogleGenerativeAI
 
 # Database (SQLAlchemy)
-from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError  # Ini untuk error 'UniqueViolationError'
 
-# Setup Lingkungan
-from dotenv import load_dotenv
-
-load_dotenv()
-
 # Modul internal
 from db.seed import seed_database
-from db.schema import engine, movies_table, showtimes_table
+from db.snapshot import load_database
 from tools.bookings import (
     search_movies,
     get_showtimes,
     get_available_seats,
     book_tickets,
+    find_adjacent_seats,
+    hold_seats,
+    ahold_seats,
+    release_seat_holds,
 )
 from data.seats import ALL_VALID_SEATS
 from agent.workflow import compile_ticket_agent_workflow
+from agent.title_index import STOPWORDS, title_index_for
+from agent.showtime_resolver import resolve_showtime
+from agent.fast_path import detect_confirmation, fast_classify
+from agent.llm_cache import create_classifier_cache
+from agent.context import build_context
+from agent.checkpoint import create_session_checkpointer
+from agent.session_store import create_session_store
+from agent.tool_runner import arun_tool_calls, run_tool_calls
+from agent.tool_runner import stats as tool_runner_stats
+from agent.prefetch import create_prefetcher
+from db.catalogue import catalogue
+from tools.seat_index import seat_index, seats_to_mask
 
 
 def setup_environment():
@@ -69,14 +83,6 @@ def setup_environment():
         print(f"{var} Terload! Value: {mask_value(value)}")
 
 
-setup_environment()
-
-print(f"Total kursi valid yang dikenali: {len(ALL_VALID_SEATS)}")
-
-# Fungsi untuk membuat dan mengisi database
-# Jalankan seeder
-seed_database()
-
 
 class TicketAgentState(TypedDict):
     messages: Annotated[List[AnyMessage], operator.add]
@@ -89,9 +95,11 @@ class TicketAgentState(TypedDict):
     current_showtime_id: Optional[int]
     selected_seats: Optional[List[str]]
     user_name: Optional[str]
-    candidate_movies: Optional[List[dict]]
-    available_showtimes: Optional[List[dict]]
-    available_seats: Optional[List[str]]
+    # Representasi ringkas: id yang menunjuk ke katalog bersama (db.catalogue) dan
+    # bitmask kursi atas posisi SEAT_MAP; detailnya dirender hanya saat dibutuhkan.
+    candidate_movie_ids: Optional[List[int]]
+    available_showtime_ids: Optional[List[int]]
+    available_seat_mask: Optional[int]
 
     current_question: Optional[
         Literal[
@@ -99,20 +107,94 @@ class TicketAgentState(TypedDict):
         ]
     ]
 
+    # Jalur klasifikasi giliran terakhir: "llm", "cache" atau "fast:<jalur>".
+    classifier_path: Optional[str]
+
+    # Ringkasan bergulir untuk pesan lama yang sudah keluar dari jendela konteks.
+    conversation_summary: Optional[str]
+    summarized_message_count: Optional[int]
 
-model = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0)
+    # Mode latensi rendah: tool call browsing (dan/atau jawaban) yang sudah didapat
+    # dari panggilan gabungan di classify_intent, dipakai browsing_agent giliran ini.
+    browsing_plan: Optional[dict]
 
 
+@contextmanager
+def _timed(timings: dict[str, float], phase: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = timings.get(phase, 0.0) + (time.perf_counter() - started)
+
+
+def _format_timings(timings: dict[str, float]) -> str:
+    parts = [f"{phase} {seconds * 1000:.0f}ms" for phase, seconds in timings.items()]
+    return ", ".join(parts) + f" (total {sum(timings.values()) * 1000:.0f}ms)"
+
+
+@dataclass
+class _Models:
+    chat: Any
+    classifier_chain: Any
+    browsing: Any
+    booking: Any
+    combined: Any
+
+
+_models: Optional[_Models] = None
+_models_lock = threading.Lock()
+
+
+def get_models() -> _Models:
+    """Bangun model Gemini (dan import langchain_google_genai) saat pertama kali dipakai."""
+    global _models
+    if _models is None:
+        with _models_lock:
+            if _models is None:
+                timings: dict[str, float] = {}
+                with _timed(timings, "import_genai"):
+                    from langchain_core.prompts import ChatPromptTemplate
+                    from langchain_google_genai import ChatGoogleGenerativeAI
+                with _timed(timings, "models"):
+                    chat = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0)
+                    prompt = ChatPromptTemplate.from_messages(
+                        [("system", CLASSIFIER_SYSTEM_PROMPT), ("user", "{input}")]
+                    )
+                    _models = _Models(
+                        chat=chat,
+                        classifier_chain=prompt | chat.bind_tools([extract_intent_and_entities]),
+                        browsing=chat.bind_tools(browsing_tools),  # Model khusus untuk browsing
+                        booking=chat.bind_tools(booking_tools),  # Model khusus untuk booking
+                        # Mode latensi rendah: klasifikasi + tool browsing dalam satu panggilan
+                        combined=chat.bind_tools([extract_intent_and_entities] + browsing_tools),
+                    )
+                print(f"   > Model siap: {_format_timings(timings)}")
+    return _models
+
+
+# Judul film dan detail jadwal dibaca lewat katalog bersama (read-through cache,
+# lihat db/catalogue.py), jadi pemanggilan berulang dalam satu giliran tidak
+# membuka koneksi baru ke database.
 def _get_movie_title(movie_id: Optional[int]) -> Optional[str]:
     if not movie_id:
         return None
     try:
-        with engine.connect() as conn:
-            row = conn.execute(
-                select(movies_table.c.title).where(movies_table.c.id == movie_id)
-            ).fetchone()
-        if row and row.title:
-            return row.title
+        entry = catalogue.movie(movie_id)
+        if entry and entry.title:
+            return entry.title
+    except Exception as exc:  # pragma: no cover - defensive logging
+        print(f"   > Peringatan: gagal mengambil judul film {movie_id}: {exc}")
+    return None
+
+
+async def _aget_movie_title(movie_id: Optional[int]) -> Optional[str]:
+    if not movie_id:
+        return None
+    try:
+        entry = await catalogue.amovie(movie_id)
+        if entry and entry.title:
+            return entry.title
     except Exception as exc:  # pragma: no cover - defensive logging
         print(f"   > Peringatan: gagal mengambil judul film {movie_id}: {exc}")
     return None
@@ -122,21 +204,19 @@ def _get_showtime_info(showtime_id: Optional[int]) -> Optional[dict]:
     if not showtime_id:
         return None
     try:
-        with engine.connect() as conn:
-            row = conn.execute(
-                select(
-                    showtimes_table.c.id,
-                    showtimes_table.c.movie_id,
-                    showtimes_table.c.time,
-                ).where(showtimes_table.c.id == showtime_id)
-            ).fetchone()
-        if row:
-            return {
-                "id": row.id,
-                "movie_id": row.movie_id,
-                "time": row.time,
-                "time_display": row.time.strftime("%A, %d %B %Y %H:%M"),
-            }
+        entry = catalogue.showtime(showtime_id)
+        return entry.as_dict() if entry else None
+    except Exception as exc:  # pragma: no cover
+        print(f"   > Peringatan: gagal mengambil jadwal {showtime_id}: {exc}")
+    return None
+
+
+async def _aget_showtime_info(showtime_id: Optional[int]) -> Optional[dict]:
+    if not showtime_id:
+        return None
+    try:
+        entry = await catalogue.ashowtime(showtime_id)
+        return entry.as_dict() if entry else None
     except Exception as exc:  # pragma: no cover
         print(f"   > Peringatan: gagal mengambil jadwal {showtime_id}: {exc}")
     return None
@@ -164,64 +244,81 @@ def extract_intent_and_entities(
     }
 
 
-classifier_model = model.bind_tools([extract_intent_and_entities])
+_classifier_cache = None
+
+
+def get_classifier_cache():
+    global _classifier_cache
+    if _classifier_cache is None:
+        _classifier_cache = create_classifier_cache()
+    return _classifier_cache
+
+
+_prefetcher = None
+
+
+def get_prefetcher():
+    global _prefetcher
+    if _prefetcher is None:
+        _prefetcher = create_prefetcher()
+    return _prefetcher
+
+
+def cache_stats() -> dict:
+    """Statistik (termasuk hit ratio) cache dalam proses dan pool tool, untuk /health."""
+    return {
+        "catalogue": catalogue.stats(),
+        "classifier": get_classifier_cache().stats(),
+        "prefetch": get_prefetcher().stats(),
+        "tools": tool_runner_stats(),
+    }
 
 # --- 5. Kumpulan Tool untuk Agen ---
-booking_tools = [search_movies, get_showtimes, get_available_seats, book_tickets]
-booking_model = model.bind_tools(booking_tools)  # Model khusus untuk booking
-browsing_tools = [search_movies, get_showtimes, get_available_seats]
-browsing_model = model.bind_tools(browsing_tools)  # Model khusus untuk browsing
+booking_tools = [search_movies, get_showtimes, get_available_seats, find_adjacent_seats, book_tickets]
+browsing_tools = [search_movies, get_showtimes, get_available_seats, find_adjacent_seats]
 
 
-def _message_from_tool_result(result: Any) -> str:
-    if isinstance(result, dict):
-        message = result.get("message")
-        if isinstance(message, str):
-            return message
-    return str(result)
+# Tool yang menerima session_id tersembunyi (InjectedToolArg) untuk seat hold.
+SESSION_AWARE_TOOLS = {"get_available_seats", "find_adjacent_seats", "book_tickets"}
 
 
-DAY_ALIASES = {
-    "monday": {"senin", "monday"},
-    "tuesday": {"selasa", "tuesday"},
-    "wednesday": {"rabu", "rabo", "wednesday"},
-    "thursday": {"kamis", "kemis", "thursday"},
-    "friday": {"jumat", "jum'at", "friday"},
-    "saturday": {"sabtu", "saterday", "saturday"},
-    "sunday": {"minggu", "ahad", "sunday"},
-}
+def _session_id_from_config(config: Optional[RunnableConfig]) -> Optional[str]:
+    configurable = (config or {}).get("configurable") or {}
+    return configurable.get("session_id")
 
-MONTH_ALIASES = {
-    "january": {"januari", "jan", "january"},
-    "february": {"februari", "feb", "february"},
-    "march": {"maret", "mar", "march"},
-    "april": {"april", "apr"},
-    "may": {"mei", "may"},
-    "june": {"juni", "jun", "june"},
-    "july": {"juli", "jul", "july"},
-    "august": {"agustus", "agust", "august", "aug"},
-    "september": {"september", "sept", "sep"},
-    "october": {"oktober", "okt", "october", "oct"},
-    "november": {"november", "nov"},
-    "december": {"desember", "des", "december", "dec"},
-}
 
-ORDINAL_WORDS = {
-    "pertama": 0,
-    "kesatu": 0,
-    "kedua": 1,
-    "keduanya": 1,
-    "ketiga": 2,
-    "keempat": 3,
-    "kelima": 4,
-    "keenam": 5,
-    "ketujuh": 6,
-}
+# Maksimal kandidat (film/jadwal) yang datanya di-prefetch per langkah.
+PREFETCH_FANOUT = 5
+
+
+def _prefetch_next_step(session_id: Optional[str], updates: dict) -> None:
+    """Mulai query langkah berikutnya di background selagi pengguna mengetik jawabannya.
+
+    Film sudah tampil -> jadwal tiap film; jadwal sudah tampil -> bitmap kursi tiap jadwal.
+    """
+    prefetcher = get_prefetcher()
+    if not prefetcher.enabled or not session_id:
+        return
+    movie_ids = [updates["current_movie_id"]] if updates.get("current_movie_id") else updates.get("candidate_movie_ids") or []
+    for movie_id in movie_ids[:PREFETCH_FANOUT]:
+        prefetcher.schedule(
+            session_id, "get_showtimes", movie_id, lambda movie_id=movie_id: get_showtimes.invoke({"movie_id": movie_id})
+        )
+    showtime_ids = (
+        [updates["current_showtime_id"]] if updates.get("current_showtime_id") else updates.get("available_showtime_ids") or []
+    )
+    for showtime_id in showtime_ids[:PREFETCH_FANOUT]:
+        prefetcher.schedule(
+            session_id, "seat_occupancy", showtime_id, lambda showtime_id=showtime_id: seat_index.occupied(showtime_id)
+        )
 
-YES_WORDS = {"ya", "iyah", "iya", "yes", "ok", "oke", "sip", "lanjut", "gas"}
-NO_WORDS = {"tidak", "gak", "ga", "enggak", "no", "ntar", "nanti", "belum"}
 
-STOPWORDS = {"the", "film", "movie", "saya", "aku", "mau", "dong", "lah", "yang", "itu", "itu", "itu", "ini"}
+def _message_from_tool_result(result: Any) -> str:
+    if isinstance(result, dict):
+        message = result.get("message")
+        if isinstance(message, str):
+            return message
+    return str(result)
 
 
 def _match_movie_from_text(text: str, candidates: Optional[List[dict]]) -> tuple[Optional[int], Optional[str]]:
@@ -238,134 +335,16 @@ def _match_movie_from_text(text: str, candidates: Optional[List[dict]]) -> tuple
         except ValueError:
             pass
 
-    text_tokens = set(
-        tok for tok in re.findall(r"[a-z0-9]+", text_lower)
-        if len(tok) > 1 and tok not in STOPWORDS
-    )
-
-    best_movie = None
-    best_score = 0
-
-    for movie in candidates:
-        title = (movie.get("title") or "").strip()
-        if not title:
-            continue
-        normalized_title = re.sub(r"\s+", " ", title).lower()
-        if normalized_title in text_lower:
-            score = 100
-        else:
-            title_tokens = [
-                tok
-                for tok in re.findall(r"[a-z0-9]+", normalized_title)
-                if len(tok) > 1 and tok not in STOPWORDS
-            ]
-            if not title_tokens:
-                continue
-            token_matches = sum(1 for tok in title_tokens if tok in text_tokens)
-            longest_overlap = max((len(tok) for tok in title_tokens if tok in text_tokens), default=0)
-            score = token_matches * 10 + longest_overlap
-            if normalized_title.split() and normalized_title.split()[0] in {"the", "a", "an"}:
-                score += token_matches
-            if title_tokens and token_matches == len(title_tokens):
-                score += 15
-            if token_matches == 1 and len(title_tokens) > 2:
-                score -= 5
-
-        if score > best_score:
-            best_score = score
-            best_movie = movie
-
-    if best_movie and best_score >= 15:
-        return best_movie.get("id"), best_movie.get("title")
+    match = title_index_for(candidates).resolve(text)
+    if match:
+        print(f"   > Judul cocok: {match.title} (confidence {match.confidence})")
+        return match.movie_id, match.title
 
     return None, None
 
 
 def _match_showtime_from_text(text: str, showtimes: Optional[List[dict]]) -> Optional[dict]:
-    if not text or not showtimes:
-        return None
-    text_lower = text.lower()
-
-    id_matches = re.findall(r"(?:id|jadwal)\s*(\d+)", text_lower)
-    for match in id_matches:
-        try:
-            candidate_id = int(match)
-            for show in showtimes:
-                if show.get("id") == candidate_id:
-                    return show
-        except ValueError:
-            continue
-
-    for word, index in ORDINAL_WORDS.items():
-        if word in text_lower and 0 <= index < len(showtimes):
-            return showtimes[index]
-
-    numbers = [n for n in re.findall(r"\b\d{1,4}\b", text_lower) if n not in {"24"}]
-    for number in numbers:
-        try:
-            candidate_id = int(number)
-        except ValueError:
-            continue
-        if any(value in text_lower for value in (":", ".")):
-            break
-        for show in showtimes:
-            if show.get("id") == candidate_id:
-                return show
-
-    best_match = None
-    best_score = 0
-    for show in showtimes:
-        dt = show.get("time")
-        if not isinstance(dt, datetime):
-            continue
-        score = 0
-        hm = dt.strftime("%H:%M").lower()
-        hm_alt = dt.strftime("%H.%M").lower()
-        hour = dt.strftime("%H").lower()
-        if hm in text_lower or hm_alt in text_lower:
-            score += 5
-        elif f"{hour}" in text_lower:
-            score += 2
-        if "malam" in text_lower and 18 <= int(hour) <= 23:
-            score += 1
-        if "siang" in text_lower and 12 <= int(hour) < 18:
-            score += 1
-        if "pagi" in text_lower and int(hour) < 12:
-            score += 1
-        day_tokens = DAY_ALIASES.get(dt.strftime("%A").lower(), {dt.strftime("%A").lower()})
-        if any(token in text_lower for token in day_tokens):
-            score += 3
-        date_token = dt.strftime("%d").lstrip("0")
-        if date_token and re.search(rf"\b{date_token}\b", text_lower):
-            score += 2
-        date_combo = dt.strftime("%d/%m")
-        if date_combo in text_lower:
-            score += 3
-        date_combo_dash = dt.strftime("%d-%m")
-        if date_combo_dash in text_lower:
-            score += 3
-        month_tokens = MONTH_ALIASES.get(dt.strftime("%B").lower(), {dt.strftime("%B").lower()})
-        if any(token in text_lower for token in month_tokens):
-            score += 2
-        if score > best_score:
-            best_score = score
-            best_match = show
-
-    if best_match and best_score > 0:
-        return best_match
-
-    return None
-
-
-def _detect_confirmation(text: str) -> Optional[bool]:
-    if not text:
-        return None
-    lowered = text.strip().lower()
-    if lowered in YES_WORDS:
-        return True
-    if lowered in NO_WORDS:
-        return False
-    return None
+    return resolve_showtime(text, showtimes)
 
 
 def _format_showtime_label(show: Optional[dict]) -> str:
@@ -394,10 +373,29 @@ def _format_seat_rows(seats: Optional[List[str]]) -> List[str]:
     return formatted
 
 
-def node_classify_intent(state: TicketAgentState):
-    """Node pertama: Mengklasifikasikan niat DAN mengekstrak entitas."""
-    print("--- NODE: Classify Intent ---")
+# Mode latensi rendah (TIKETA_LOW_LATENCY=1): klasifikasi dan pemilihan tool browsing
+# berbagi satu panggilan LLM, dan hasil tool sederhana dirender dari template
+# alih-alih meminta Gemini menulis jawaban akhir.
+def low_latency_mode() -> bool:
+    return os.getenv("TIKETA_LOW_LATENCY", "").lower() in {"1", "true", "yes"}
+
+
+# Tool yang field ``message``-nya sudah berupa jawaban lengkap untuk pengguna.
+TEMPLATED_TOOLS = {"search_movies", "get_showtimes", "get_available_seats", "find_adjacent_seats"}
 
+COMBINED_SYSTEM_PROMPT = (
+    "Anda adalah asisten resepsionis bioskop. Untuk pesan terakhir pengguna, SELALU panggil "
+    "'extract_intent_and_entities' untuk mengembalikan niat dan entitasnya. Jika pengguna bertanya "
+    "tentang film, jadwal, atau kursi, panggil juga tool yang relevan (search_movies, get_showtimes, "
+    "get_available_seats, find_adjacent_seats) dalam respons yang sama. Jika pertanyaannya bisa "
+    "dijawab tanpa tool, tulis jawabannya langsung."
+)
+
+CLASSIFIER_SYSTEM_PROMPT = "Anda adalah asisten resepsionis. Tugas Anda adalah menganalisis pesan terakhir pengguna dan mengekstrak niat serta informasi (entitas) yang relevan. Gunakan tool 'extract_intent_and_entities' untuk mengembalikan hasilnya."
+
+
+def _classify_without_llm(state: TicketAgentState) -> Optional[dict]:
+    """Hasil klasifikasi tanpa memanggil LLM (pesan kosong, fast-path, cache), atau None."""
     messages = state.get("messages", [])
     print(f"   > State keys: {list(state.keys())}")
     if messages:
@@ -409,26 +407,103 @@ def node_classify_intent(state: TicketAgentState):
         return {"intent": "other"}
 
     latest_message_raw = messages[-1].content
-    latest_message = latest_message_raw.lower()
+    fast_result = fast_classify(latest_message_raw, state)
+    if fast_result:
+        print(f"   > Fast-path '{fast_result.path}': classifier LLM dilewati -> {fast_result.updates}")
+        return {**fast_result.updates, "classifier_path": f"fast:{fast_result.path}"}
+
+    tool_call_args = get_classifier_cache().get(latest_message_raw, _classifier_cache_context(state))
+    if tool_call_args is None:
+        return None
+    print(f"   > Cache classifier hit: {get_classifier_cache().stats()}")
+    return _apply_classifier_args(state, tool_call_args, "cache")
 
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            (
-                "system",
-                "Anda adalah asisten resepsionis. Tugas Anda adalah menganalisis pesan terakhir pengguna dan mengekstrak niat serta informasi (entitas) yang relevan. Gunakan tool 'extract_intent_and_entities' untuk mengembalikan hasilnya.",
-            ),
-            ("user", "{input}"),
-        ]
-    )
-    classifier_chain = prompt | classifier_model
-    response = classifier_chain.invoke({"input": messages[-1].content})
 
+def _classifier_cache_context(state: TicketAgentState) -> dict:
+    return {"current_question": state.get("current_question")}
+
+
+def _classify_from_response(state: TicketAgentState, response: AIMessage) -> dict:
     if not response.tool_calls:
         print("   > Classifier gagal, kembali ke 'other'")
-        return {"intent": "other"}
+        return {"intent": "other", "classifier_path": "llm"}
 
     tool_call_args = response.tool_calls[0]["args"]
-    updates = {"intent": tool_call_args.get("intent", "other")}
+    get_classifier_cache().put(state["messages"][-1].content, _classifier_cache_context(state), tool_call_args)
+    return _apply_classifier_args(state, tool_call_args, "llm")
+
+
+def _combined_messages(context) -> List[AnyMessage]:
+    header, *window = context.messages
+    return [SystemMessage(content=f"{COMBINED_SYSTEM_PROMPT}\n\n{header.content}")] + window
+
+
+def _classify_from_combined(state: TicketAgentState, response: AIMessage) -> dict:
+    """Pisahkan respons gabungan menjadi hasil klasifikasi + ``browsing_plan``."""
+    extract_name = extract_intent_and_entities.name
+    tool_calls = response.tool_calls or []
+    extract = next((call for call in tool_calls if call["name"] == extract_name), None)
+    browsing_calls = [
+        {"name": call["name"], "args": call.get("args", {}), "id": call.get("id")}
+        for call in tool_calls
+        if call["name"] != extract_name
+    ]
+    content = response.content if isinstance(response.content, str) else ""
+
+    if extract is not None:
+        # Tidak dimasukkan ke cache classifier: model gabungan melihat seluruh jendela
+        # riwayat, sedangkan kunci cache hanya pesan terakhir + current_question, jadi
+        # entitas hasil tebakan dari riwayat sesi ini bisa terpakai di sesi lain.
+        updates = _apply_classifier_args(state, extract["args"], "llm:combined")
+    else:
+        print("   > Respons gabungan tanpa klasifikasi, anggap browsing.")
+        updates = {"intent": "browsing" if browsing_calls or content else "other", "classifier_path": "llm:combined"}
+    updates["browsing_plan"] = {"tool_calls": browsing_calls, "content": content} if browsing_calls or content else None
+    return updates
+
+
+def _without_browsing_plan(updates: dict) -> dict:
+    return {**updates, "browsing_plan": None} if low_latency_mode() else updates
+
+
+def node_classify_intent(state: TicketAgentState):
+    """Node pertama: Mengklasifikasikan niat DAN mengekstrak entitas."""
+    print("--- NODE: Classify Intent ---")
+
+    updates = _classify_without_llm(state)
+    if updates is not None:
+        return _without_browsing_plan(updates)
+    if low_latency_mode():
+        context, context_updates = _browsing_context(state)
+        response = get_models().combined.invoke(_combined_messages(context))
+        return {**_classify_from_combined(state, response), **context_updates}
+    response = get_models().classifier_chain.invoke({"input": state["messages"][-1].content})
+    return _classify_from_response(state, response)
+
+
+async def anode_classify_intent(state: TicketAgentState):
+    """Versi async dari :func:`node_classify_intent`."""
+    print("--- NODE: Classify Intent (async) ---")
+
+    # Fast-path, cache classifier (bisa SQLite) dan heuristik di _apply_classifier_args
+    # membaca katalog secara sync; jalankan di thread agar event loop tidak ikut
+    # menunggu database saat cache katalog meleset.
+    updates = await asyncio.to_thread(_classify_without_llm, state)
+    if updates is not None:
+        return _without_browsing_plan(updates)
+    if low_latency_mode():
+        context, context_updates = _browsing_context(state)
+        response = await get_models().combined.ainvoke(_combined_messages(context))
+        return {**await asyncio.to_thread(_classify_from_combined, state, response), **context_updates}
+    response = await get_models().classifier_chain.ainvoke({"input": state["messages"][-1].content})
+    return await asyncio.to_thread(_classify_from_response, state, response)
+
+
+def _apply_classifier_args(state: TicketAgentState, tool_call_args: dict, classifier_path: str) -> dict:
+    """Petakan argumen tool classifier ke update state, lalu terapkan heuristik alur booking."""
+    latest_message_raw = state["messages"][-1].content
+    latest_message = latest_message_raw.lower()
+    updates = {"intent": tool_call_args.get("intent", "other"), "classifier_path": classifier_path}
 
     key_mapping = {
         "movie_id": "current_movie_id",
@@ -537,7 +612,7 @@ def node_classify_intent(state: TicketAgentState):
     ):
         print("    > Heuristik: Terdeteksi pertanyaan jadwal, memaksa intent 'booking'.")
         updates["intent"] = "booking"
-        available_showtimes = state.get("available_showtimes")
+        available_showtimes = catalogue.showtime_dicts(state.get("available_showtime_ids"))
         if available_showtimes:
             match = _match_showtime_from_text(latest_message_raw, available_showtimes)
             if match:
@@ -563,10 +638,8 @@ def node_classify_intent(state: TicketAgentState):
     # --- AKHIR TAMBAHAN ---
 
     current_question = state.get("current_question")
-    candidate_movies = updates.get("candidate_movies") or state.get("candidate_movies")
-    available_showtimes = updates.get("available_showtimes") or state.get("available_showtimes")
-
     if current_question == "ask_movie" and not updates.get("current_movie_id"):
+        candidate_movies = catalogue.movie_dicts(state.get("candidate_movie_ids"))
         movie_id, movie_name = _match_movie_from_text(latest_message_raw, candidate_movies)
         if movie_id:
             updates["current_movie_id"] = movie_id
@@ -579,6 +652,7 @@ def node_classify_intent(state: TicketAgentState):
             updates["intent"] = "answering_question"
 
     if current_question == "ask_showtime" and not updates.get("current_showtime_id"):
+        available_showtimes = catalogue.showtime_dicts(state.get("available_showtime_ids"))
         match = _match_showtime_from_text(latest_message_raw, available_showtimes)
         if match:
             updates["current_showtime_id"] = match.get("id")
@@ -610,18 +684,25 @@ def node_classify_intent(state: TicketAgentState):
     return updates
 
 
-def node_browsing_agent(state: TicketAgentState):
-    """Agen ReAct loop sederhana untuk Q&A (tapi diimplementasikan sbg 1 langkah)."""
-    print("--- NODE: Browsing Agent ---")
+def _browsing_context(state: TicketAgentState):
+    context = build_context(state)
+    print(
+        f"   > Konteks: {len(context.messages)} pesan (~{context.estimated_tokens} token), "
+        f"{context.summarized_count} pesan lama diringkas"
+    )
+    context_updates: dict[str, Any] = {}
+    if context.summarized_count != (state.get("summarized_message_count") or 0):
+        context_updates = {
+            "conversation_summary": context.summary,
+            "summarized_message_count": context.summarized_count,
+        }
+    return context, context_updates
 
-    response = browsing_model.invoke(state["messages"])
-    tool_calls = getattr(response, "tool_calls", []) or []
-    if not tool_calls:
-        return {"messages": [response]}
 
-    tool_outputs: List[ToolMessage] = []
-    resolved_calls: List[tuple[str, dict, Any]] = []
-    for tool_call in tool_calls:
+def _browsing_tool_calls(response: AIMessage, session_id: Optional[str]) -> List[tuple[str, dict, Optional[str], Any]]:
+    """Normalisasi tool call dari LLM menjadi (nama, args, id, tool) yang bisa dijalankan."""
+    calls = []
+    for tool_call in getattr(response, "tool_calls", []) or []:
         if isinstance(tool_call, dict):
             tool_name = tool_call.get("name")
             tool_args = tool_call.get("args", {})
@@ -640,32 +721,139 @@ def node_browsing_agent(state: TicketAgentState):
             print(f"   > Peringatan: tool '{tool_name}' tidak dikenal, diabaikan.")
             continue
 
-        output = tool_impl.invoke(tool_args)
-        message_text = _message_from_tool_result(output)
-        tool_outputs.append(
-            ToolMessage(
-                content=message_text,
-                name=tool_name,
-                tool_call_id=tool_id or f"{tool_name}__manual",
-            )
+        if session_id and tool_name in SESSION_AWARE_TOOLS:
+            tool_args = {**tool_args, "session_id": session_id}
+        calls.append((tool_name, tool_args, tool_id, tool_impl))
+    return calls
+
+
+def _tool_messages(calls, outputs: List[Any]) -> List[ToolMessage]:
+    return [
+        ToolMessage(
+            content=_message_from_tool_result(output),
+            name=tool_name,
+            tool_call_id=tool_id or f"{tool_name}__manual",
         )
-        resolved_calls.append((tool_name, tool_args, output))
+        for (tool_name, _, tool_id, _), output in zip(calls, outputs)
+    ]
+
+
+def _planned_response(state: TicketAgentState) -> Optional[AIMessage]:
+    """AIMessage dari ``browsing_plan`` (mode latensi rendah), atau None bila harus memanggil model."""
+    plan = state.get("browsing_plan") if low_latency_mode() else None
+    if not plan:
+        return None
+    known = {t.name for t in browsing_tools}
+    if not plan.get("content") and not any(call["name"] in known for call in plan["tool_calls"]):
+        return None
+    print(f"   > Memakai rencana dari classifier gabungan: {[call['name'] for call in plan['tool_calls']]}")
+    return AIMessage(content=plan.get("content") or "", tool_calls=plan["tool_calls"])
+
+
+def _templated_movie_ids(calls) -> Optional[List[Optional[int]]]:
+    """Film yang judulnya jadi kepala tiap bagian jawaban templat, atau None bila LLM yang menjawab."""
+    if not low_latency_mode() or any(tool_name not in TEMPLATED_TOOLS for tool_name, *_ in calls):
+        return None
+    movie_ids: List[Optional[int]] = []
+    for tool_name, tool_args, _, _ in calls:
+        movie_id = None
+        if tool_name == "get_showtimes" and len(calls) > 1:
+            # Beberapa film sekaligus: beri judul di atas tiap daftar jadwal.
+            try:
+                movie_id = int(tool_args.get("movie_id") or tool_args.get("id"))
+            except (TypeError, ValueError):
+                pass
+        movie_ids.append(movie_id)
+    return movie_ids
 
-    if not tool_outputs:
-        return {"messages": [response]}
 
-    messages_with_tool_results = state.get("messages", []) + [response] + tool_outputs
-    final_response = model.invoke(messages_with_tool_results)
-    state_updates: dict = {"messages": [response] + tool_outputs + [final_response]}
+def _templated_message(outputs: List[Any], titles: List[Optional[str]]) -> AIMessage:
+    sections = []
+    for output, title in zip(outputs, titles):
+        text = _message_from_tool_result(output)
+        sections.append(f"{title}\n{text}" if title else text)
+    return AIMessage(content="\n\n".join(sections))
 
-    for tool_name, tool_args, tool_output in resolved_calls:
+
+def _templated_reply(calls, outputs: List[Any]) -> Optional[AIMessage]:
+    """Jawaban akhir langsung dari ``message`` tool (mode latensi rendah), tanpa generasi LLM."""
+    movie_ids = _templated_movie_ids(calls)
+    if movie_ids is None:
+        return None
+    return _templated_message(outputs, [_get_movie_title(movie_id) for movie_id in movie_ids])
+
+
+async def _atemplated_reply(calls, outputs: List[Any]) -> Optional[AIMessage]:
+    """Versi async dari :func:`_templated_reply` (judul dibaca lewat katalog async)."""
+    movie_ids = _templated_movie_ids(calls)
+    if movie_ids is None:
+        return None
+    return _templated_message(outputs, [await _aget_movie_title(movie_id) for movie_id in movie_ids])
+
+
+def node_browsing_agent(state: TicketAgentState, config: RunnableConfig = None):
+    """Agen ReAct loop sederhana untuk Q&A (tapi diimplementasikan sbg 1 langkah)."""
+    print("--- NODE: Browsing Agent ---")
+
+    context, context_updates = _browsing_context(state)
+    if low_latency_mode():
+        context_updates["browsing_plan"] = None
+    response = _planned_response(state) or get_models().browsing.invoke(context.messages)
+    calls = _browsing_tool_calls(response, _session_id_from_config(config))
+    if not calls:
+        return {"messages": [response], **context_updates}
+
+    outputs = run_tool_calls(calls)
+    tool_outputs = _tool_messages(calls, outputs)
+    final_response = _templated_reply(calls, outputs) or get_models().chat.invoke(
+        context.messages + [response] + tool_outputs
+    )
+    state_updates = _browsing_updates(calls, outputs)
+    _prefetch_next_step(_session_id_from_config(config), state_updates)
+    if "available_showtime_ids" in state_updates and not state_updates.get("movie_title"):
+        title = _get_movie_title(state_updates.get("current_movie_id"))
+        if title:
+            state_updates["movie_title"] = title
+    return {"messages": [response] + tool_outputs + [final_response], **context_updates, **state_updates}
+
+
+async def anode_browsing_agent(state: TicketAgentState, config: RunnableConfig = None):
+    """Versi async dari :func:`node_browsing_agent`."""
+    print("--- NODE: Browsing Agent (async) ---")
+
+    context, context_updates = _browsing_context(state)
+    if low_latency_mode():
+        context_updates["browsing_plan"] = None
+    response = _planned_response(state) or await get_models().browsing.ainvoke(context.messages)
+    calls = _browsing_tool_calls(response, _session_id_from_config(config))
+    if not calls:
+        return {"messages": [response], **context_updates}
+
+    outputs = await arun_tool_calls(calls)
+    tool_outputs = _tool_messages(calls, outputs)
+    final_response = await _atemplated_reply(calls, outputs) or await get_models().chat.ainvoke(
+        context.messages + [response] + tool_outputs
+    )
+    state_updates = _browsing_updates(calls, outputs)
+    _prefetch_next_step(_session_id_from_config(config), state_updates)
+    if "available_showtime_ids" in state_updates and not state_updates.get("movie_title"):
+        title = await _aget_movie_title(state_updates.get("current_movie_id"))
+        if title:
+            state_updates["movie_title"] = title
+    return {"messages": [response] + tool_outputs + [final_response], **context_updates, **state_updates}
+
+
+def _browsing_updates(calls, outputs: List[Any]) -> dict:
+    """Update slot state dari hasil tool browsing (tanpa pesan)."""
+    state_updates: dict = {}
+    for (tool_name, tool_args, _, _), tool_output in zip(calls, outputs):
         if tool_name == "search_movies":
             state_updates.setdefault("intent", "browsing")
             state_updates.setdefault("current_question", "ask_movie")
             if isinstance(tool_output, dict):
                 movies = tool_output.get("movies")
                 if movies is not None:
-                    state_updates["candidate_movies"] = movies
+                    state_updates["candidate_movie_ids"] = [movie.get("id") for movie in movies]
                     if len(movies) == 1:
                         only_movie = movies[0]
                         state_updates["current_movie_id"] = only_movie.get("id")
@@ -682,13 +870,9 @@ def node_browsing_agent(state: TicketAgentState):
             if isinstance(tool_output, dict):
                 showtimes = tool_output.get("showtimes")
                 if showtimes is not None:
-                    state_updates["available_showtimes"] = showtimes
+                    state_updates["available_showtime_ids"] = [show.get("id") for show in showtimes]
                     if len(showtimes) == 1:
                         state_updates["current_showtime_id"] = showtimes[0].get("id")
-                    if not state_updates.get("movie_title"):
-                        title = _get_movie_title(state_updates.get("current_movie_id"))
-                        if title:
-                            state_updates["movie_title"] = title
         elif tool_name == "get_available_seats":
             state_updates["intent"] = "booking"
             state_updates["current_question"] = "ask_seats"
@@ -705,97 +889,122 @@ def node_browsing_agent(state: TicketAgentState):
             if isinstance(tool_output, dict):
                 avail = tool_output.get("available_seats")
                 if avail is not None:
-                    state_updates["available_seats"] = avail
+                    state_updates["available_seat_mask"] = seats_to_mask(avail)
                 if tool_output.get("showtime_id") and not state_updates.get("current_showtime_id"):
                     state_updates["current_showtime_id"] = tool_output.get("showtime_id")
+        elif tool_name == "find_adjacent_seats":
+            state_updates["intent"] = "booking"
+            state_updates["current_question"] = "ask_seats"
+            if isinstance(tool_output, dict) and tool_output.get("showtime_id"):
+                state_updates["current_showtime_id"] = tool_output.get("showtime_id")
 
     return state_updates
 
 
-def node_find_movie(state: TicketAgentState):
-    """Langkah 1 Pemesanan: Mengidentifikasi film."""
-    print("--- NODE: Find Movie ---")
-
-    title = state.get("movie_title")
-    genre = state.get("genre")
-
+def _search_movie_args(state: TicketAgentState) -> dict:
     tool_args = {}
-    if title:
-        tool_args["title"] = title
-    if genre:
-        tool_args["genre_name"] = genre
-
-    if tool_args:
-        print(f"    > Mencari film dengan args: {tool_args}")
-        result = search_movies.invoke(tool_args)
-        message_text = _message_from_tool_result(result)
-        movies = result.get("movies") if isinstance(result, dict) else None
-        tool_msg = ToolMessage(
-            content=message_text,
-            name="search_movies",
-            tool_call_id="search_movies__manual",
-        )
+    if state.get("movie_title"):
+        tool_args["title"] = state.get("movie_title")
+    if state.get("genre"):
+        tool_args["genre_name"] = state.get("genre")
+    return tool_args
 
-        if movies:
-            lines = []
-            for idx, movie in enumerate(movies, start=1):
-                snippet = (movie.get("description") or "").strip()
-                if snippet:
-                    snippet = snippet[:120] + ("..." if len(snippet) > 120 else "")
-                lines.append(f"{idx}. {movie.get('title', 'Tanpa Judul')} — {snippet or 'Deskripsi tidak tersedia'}")
-            response_text = (
-                "Berikut daftar film yang cocok:\n"
-                + "\n".join(lines)
-                + "\nSilakan pilih dengan menyebut judul atau nomor urutnya."
-            )
-        else:
-            response_text = message_text + " Mau coba cari genre atau judul lain?"
 
-        ai_response = AIMessage(content=response_text)
+def _find_movie_updates(result: Any) -> dict[str, Any]:
+    message_text = _message_from_tool_result(result)
+    movies = result.get("movies") if isinstance(result, dict) else None
+    tool_msg = ToolMessage(
+        content=message_text,
+        name="search_movies",
+        tool_call_id="search_movies__manual",
+    )
 
-        updates: dict[str, Any] = {
-            "messages": [tool_msg, ai_response],
-            "current_question": "ask_movie",
-        }
-        if movies is not None:
-            updates["candidate_movies"] = movies
-            if len(movies) == 1:
-                only_movie = movies[0]
-                updates["current_movie_id"] = only_movie.get("id")
-                updates["movie_title"] = only_movie.get("title")
+    if movies:
+        lines = []
+        for idx, movie in enumerate(movies, start=1):
+            snippet = (movie.get("description") or "").strip()
+            if snippet:
+                snippet = snippet[:120] + ("..." if len(snippet) > 120 else "")
+            lines.append(f"{idx}. {movie.get('title', 'Tanpa Judul')} — {snippet or 'Deskripsi tidak tersedia'}")
+        response_text = (
+            "Berikut daftar film yang cocok:\n"
+            + "\n".join(lines)
+            + "\nSilakan pilih dengan menyebut judul atau nomor urutnya."
+        )
+    else:
+        response_text = message_text + " Mau coba cari genre atau judul lain?"
+
+    ai_response = AIMessage(content=response_text)
 
-        if not updates.get("movie_title") and state.get("current_movie_id"):
-            title_lookup = _get_movie_title(state.get("current_movie_id"))
-            if title_lookup:
-                updates["movie_title"] = title_lookup
+    updates: dict[str, Any] = {
+        "messages": [tool_msg, ai_response],
+        "current_question": "ask_movie",
+    }
+    if movies is not None:
+        updates["candidate_movie_ids"] = [movie.get("id") for movie in movies]
+        if len(movies) == 1:
+            only_movie = movies[0]
+            updates["current_movie_id"] = only_movie.get("id")
+            updates["movie_title"] = only_movie.get("title")
+    return updates
 
-        return updates
 
+def _ask_movie_updates() -> dict:
     return {
         "messages": [AIMessage(content="Tentu, mau cari film apa atau genre apa?")],
         "current_question": "ask_movie",
     }
 
 
-def node_find_showtime(state: TicketAgentState):
-    """Langkah 2 Pemesanan: Mengidentifikasi jadwal."""
-    print("--- NODE: Find Showtime ---")
-    movie_id = state.get("current_movie_id")
+def node_find_movie(state: TicketAgentState, config: RunnableConfig = None):
+    """Langkah 1 Pemesanan: Mengidentifikasi film."""
+    print("--- NODE: Find Movie ---")
 
-    # 1. Penanganan Error: Jika user entah bagaimana sampai di sini tanpa ID film
-    if not movie_id:
-        return {
-            "messages": [
-                AIMessage(
-                    content="Ups, sepertinya saya belum tahu Anda mau film apa. Bisa sebutkan judul filmnya?"
-                )
-            ],
-            "intent": "booking",  # Paksa kembali ke booking (meskipun seharusnya sudah)
-            "current_question": "ask_movie",  # Set pertanyaan kembali ke film
-        }
+    tool_args = _search_movie_args(state)
+    if not tool_args:
+        return _ask_movie_updates()
+
+    print(f"    > Mencari film dengan args: {tool_args}")
+    updates = _find_movie_updates(search_movies.invoke(tool_args))
+    _prefetch_next_step(_session_id_from_config(config), updates)
+    if not updates.get("movie_title") and state.get("current_movie_id"):
+        title_lookup = _get_movie_title(state.get("current_movie_id"))
+        if title_lookup:
+            updates["movie_title"] = title_lookup
+    return updates
+
+
+async def anode_find_movie(state: TicketAgentState, config: RunnableConfig = None):
+    """Versi async dari :func:`node_find_movie`."""
+    print("--- NODE: Find Movie (async) ---")
+
+    tool_args = _search_movie_args(state)
+    if not tool_args:
+        return _ask_movie_updates()
+
+    print(f"    > Mencari film dengan args: {tool_args}")
+    updates = _find_movie_updates(await search_movies.ainvoke(tool_args))
+    _prefetch_next_step(_session_id_from_config(config), updates)
+    if not updates.get("movie_title") and state.get("current_movie_id"):
+        title_lookup = await _aget_movie_title(state.get("current_movie_id"))
+        if title_lookup:
+            updates["movie_title"] = title_lookup
+    return updates
 
-    # 2. Panggil Tool untuk mendapatkan data mentah
-    result = get_showtimes.invoke({"movie_id": movie_id})
+
+def _missing_movie_updates() -> dict:
+    return {
+        "messages": [
+            AIMessage(
+                content="Ups, sepertinya saya belum tahu Anda mau film apa. Bisa sebutkan judul filmnya?"
+            )
+        ],
+        "intent": "booking",  # Paksa kembali ke booking (meskipun seharusnya sudah)
+        "current_question": "ask_movie",  # Set pertanyaan kembali ke film
+    }
+
+
+def _find_showtime_updates(state: TicketAgentState, result: Any, movie_title: Optional[str]) -> dict[str, Any]:
     message_text = _message_from_tool_result(result)
     showtimes = result.get("showtimes") if isinstance(result, dict) else None
     tool_msg = ToolMessage(
@@ -804,7 +1013,6 @@ def node_find_showtime(state: TicketAgentState):
         tool_call_id="get_showtimes__manual",
     )
 
-    movie_title = state.get("movie_title") or _get_movie_title(movie_id)
     if showtimes:
         lines = [
             f"{idx}. {item.get('time_display')}"
@@ -827,7 +1035,7 @@ def node_find_showtime(state: TicketAgentState):
         "current_question": "ask_showtime",
     }
     if showtimes is not None:
-        updates["available_showtimes"] = showtimes
+        updates["available_showtime_ids"] = [show.get("id") for show in showtimes]
         if len(showtimes) == 1:
             updates["current_showtime_id"] = showtimes[0].get("id")
     if movie_title and movie_title != state.get("movie_title"):
@@ -836,25 +1044,56 @@ def node_find_showtime(state: TicketAgentState):
     return updates
 
 
-def node_select_seats(state: TicketAgentState):
-    """Langkah 3 Pemesanan: Mengidentifikasi kursi."""
-    print("--- NODE: Select Seats ---")
-    showtime_id = state.get("current_showtime_id")
+def node_find_showtime(state: TicketAgentState, config: RunnableConfig = None):
+    """Langkah 2 Pemesanan: Mengidentifikasi jadwal."""
+    print("--- NODE: Find Showtime ---")
+    movie_id = state.get("current_movie_id")
 
-    # 1. Penanganan Error: Jika user sampai di sini tanpa ID jadwal
-    if not showtime_id:
-        return {
-            "messages": [
-                AIMessage(
-                    content="Ups, sepertinya saya belum tahu Anda mau jadwal jam berapa. Bisa pilih salah satu jadwalnya?"
-                )
-            ],
-            "intent": "booking",
-            "current_question": "ask_showtime",  # Kembalikan ke pertanyaan jadwal
-        }
+    # 1. Penanganan Error: Jika user entah bagaimana sampai di sini tanpa ID film
+    if not movie_id:
+        return _missing_movie_updates()
+
+    # 2. Ambil data mentah: hasil prefetch kalau ada, kalau tidak panggil tool
+    session_id = _session_id_from_config(config)
+    result = get_prefetcher().get(session_id, "get_showtimes", movie_id)
+    if result is None:
+        result = get_showtimes.invoke({"movie_id": movie_id})
+    movie_title = state.get("movie_title") or _get_movie_title(movie_id)
+    updates = _find_showtime_updates(state, result, movie_title)
+    _prefetch_next_step(session_id, updates)
+    return updates
+
+
+async def anode_find_showtime(state: TicketAgentState, config: RunnableConfig = None):
+    """Versi async dari :func:`node_find_showtime`."""
+    print("--- NODE: Find Showtime (async) ---")
+    movie_id = state.get("current_movie_id")
+    if not movie_id:
+        return _missing_movie_updates()
+
+    session_id = _session_id_from_config(config)
+    result = await get_prefetcher().aget(session_id, "get_showtimes", movie_id)
+    if result is None:
+        result = await get_showtimes.ainvoke({"movie_id": movie_id})
+    movie_title = state.get("movie_title") or await _aget_movie_title(movie_id)
+    updates = _find_showtime_updates(state, result, movie_title)
+    _prefetch_next_step(session_id, updates)
+    return updates
 
-    # 2. Panggil Tool untuk mendapatkan data mentah
-    result = get_available_seats.invoke({"showtime_id": showtime_id})
+
+def _missing_showtime_updates() -> dict:
+    return {
+        "messages": [
+            AIMessage(
+                content="Ups, sepertinya saya belum tahu Anda mau jadwal jam berapa. Bisa pilih salah satu jadwalnya?"
+            )
+        ],
+        "intent": "booking",
+        "current_question": "ask_showtime",  # Kembalikan ke pertanyaan jadwal
+    }
+
+
+def _select_seats_updates(result: Any) -> dict[str, Any]:
     message_text = _message_from_tool_result(result)
     available_seats = result.get("available_seats") if isinstance(result, dict) else None
     tool_msg = ToolMessage(
@@ -889,35 +1128,81 @@ def node_select_seats(state: TicketAgentState):
         "current_question": "ask_seats",
     }
     if available_seats is not None:
-        updates["available_seats"] = available_seats
+        updates["available_seat_mask"] = seats_to_mask(available_seats)
 
     return updates
 
 
-def node_confirm_booking(state: TicketAgentState):
-    """Langkah 4 Pemesanan: Meminta konfirmasi nama & detail."""
-    print("--- NODE: Confirm Booking ---")
+def node_select_seats(state: TicketAgentState, config: RunnableConfig = None):
+    """Langkah 3 Pemesanan: Mengidentifikasi kursi."""
+    print("--- NODE: Select Seats ---")
+    showtime_id = state.get("current_showtime_id")
 
-    if not state.get("user_name"):
-        return {
-            "messages": [AIMessage(content="Baik, pemesanan ini atas nama siapa?")],
-            "current_question": "ask_name",
-        }
+    # 1. Penanganan Error: Jika user sampai di sini tanpa ID jadwal
+    if not showtime_id:
+        return _missing_showtime_updates()
+
+    # 2. Panggil Tool untuk mendapatkan data mentah. Bitmap kursi biasanya sudah
+    # dimuat oleh prefetch; tunggu dulu kalau pemuatannya masih berjalan.
+    session_id = _session_id_from_config(config)
+    get_prefetcher().get(session_id, "seat_occupancy", showtime_id)
+    result = get_available_seats.invoke({"showtime_id": showtime_id, "session_id": session_id})
+    return _select_seats_updates(result)
+
+
+async def anode_select_seats(state: TicketAgentState, config: RunnableConfig = None):
+    """Versi async dari :func:`node_select_seats`."""
+    print("--- NODE: Select Seats (async) ---")
+    showtime_id = state.get("current_showtime_id")
+    if not showtime_id:
+        return _missing_showtime_updates()
 
+    session_id = _session_id_from_config(config)
+    await get_prefetcher().aget(session_id, "seat_occupancy", showtime_id)
+    result = await get_available_seats.ainvoke({"showtime_id": showtime_id, "session_id": session_id})
+    return _select_seats_updates(result)
+
+
+def _hold_failed_updates(hold: dict) -> dict:
+    print(f"   > Hold kursi gagal: {hold.get('unavailable')}")
+    return {
+        "messages": [AIMessage(content=hold["message"])],
+        "selected_seats": None,
+        "current_question": "ask_seats",
+    }
+
+
+def _ask_name_updates() -> dict:
+    return {
+        "messages": [AIMessage(content="Baik, pemesanan ini atas nama siapa?")],
+        "current_question": "ask_name",
+    }
+
+
+def _state_showtime(state: TicketAgentState) -> Optional[dict]:
+    showtime_id = state.get("current_showtime_id")
+    if showtime_id is not None and showtime_id in (state.get("available_showtime_ids") or []):
+        entry = catalogue.showtime(showtime_id)
+        return entry.as_dict() if entry else None
+    return None
+
+
+async def _astate_showtime(state: TicketAgentState) -> Optional[dict]:
+    showtime_id = state.get("current_showtime_id")
+    if showtime_id is not None and showtime_id in (state.get("available_showtime_ids") or []):
+        entry = await catalogue.ashowtime(showtime_id)
+        return entry.as_dict() if entry else None
+    return None
+
+
+def _confirmation_updates(state: TicketAgentState, movie_title: Optional[str], matched_show: Optional[dict]) -> dict:
     seats = state.get("selected_seats") or []
     seat_list = ", ".join(seats) if seats else "(belum dipilih)"
 
     movie_id = state.get("current_movie_id")
-    movie_title = state.get("movie_title") or _get_movie_title(movie_id)
     movie_label = movie_title or (f"Film ID {movie_id}" if movie_id else "(belum dipilih)")
 
     showtime_id = state.get("current_showtime_id")
-    showtimes = state.get("available_showtimes") or []
-    matched_show = None
-    if isinstance(showtimes, list) and showtime_id is not None:
-        matched_show = next((s for s in showtimes if s.get("id") == showtime_id), None)
-    if matched_show is None and showtime_id is not None:
-        matched_show = _get_showtime_info(showtime_id)
     showtime_label = _format_showtime_label(matched_show)
     if showtime_label == "(belum dipilih)" and showtime_id is not None:
         showtime_label = f"Jadwal ID {showtime_id}"
@@ -935,16 +1220,64 @@ def node_confirm_booking(state: TicketAgentState):
     }
 
 
-def node_execute_booking(state: TicketAgentState):
-    """
-    Langkah 5 Pemesanan: Menjalankan tool 'book_tickets'.
-    Fungsi ini sekarang mencakup:
-    1. Validasi data tidak lengkap.
-    2. Validasi bahwa kursi yang dipilih ada di SEAT_MAP.
-    3. Reset state setelah pemesanan (sukses atau gagal) agar alur bisa dimulai dari awal.
-    """
-    print("--- NODE: Execute Booking (FINAL) ---")
+def node_confirm_booking(state: TicketAgentState, config: RunnableConfig = None):
+    """Langkah 4 Pemesanan: Meminta konfirmasi nama & detail."""
+    print("--- NODE: Confirm Booking ---")
+
+    # Tahan kursi begitu dipilih supaya bentrok ketahuan sebelum eksekusi.
+    session_id = _session_id_from_config(config)
+    if session_id and state.get("current_showtime_id") and state.get("selected_seats"):
+        hold = hold_seats(state["current_showtime_id"], state["selected_seats"], session_id)
+        if not hold.get("success"):
+            return _hold_failed_updates(hold)
+
+    if not state.get("user_name"):
+        return _ask_name_updates()
+
+    movie_title = state.get("movie_title") or _get_movie_title(state.get("current_movie_id"))
+    matched_show = _state_showtime(state)
+    if matched_show is None and state.get("current_showtime_id") is not None:
+        matched_show = _get_showtime_info(state.get("current_showtime_id"))
+    return _confirmation_updates(state, movie_title, matched_show)
+
+
+async def anode_confirm_booking(state: TicketAgentState, config: RunnableConfig = None):
+    """Versi async dari :func:`node_confirm_booking`."""
+    print("--- NODE: Confirm Booking (async) ---")
+
+    session_id = _session_id_from_config(config)
+    if session_id and state.get("current_showtime_id") and state.get("selected_seats"):
+        hold = await ahold_seats(state["current_showtime_id"], state["selected_seats"], session_id)
+        if not hold.get("success"):
+            return _hold_failed_updates(hold)
+
+    if not state.get("user_name"):
+        return _ask_name_updates()
+
+    movie_title = state.get("movie_title") or await _aget_movie_title(state.get("current_movie_id"))
+    matched_show = await _astate_showtime(state)
+    if matched_show is None and state.get("current_showtime_id") is not None:
+        matched_show = await _aget_showtime_info(state.get("current_showtime_id"))
+    return _confirmation_updates(state, movie_title, matched_show)
+
+
+# Slot alur booking yang di-reset setelah eksekusi (user_name sengaja dipertahankan
+# agar agen tetap ingat namanya).
+BOOKING_RESET = {
+    "intent": "other",  # Setel ulang niat ke default
+    "movie_title": None,
+    "genre": None,
+    "current_movie_id": None,
+    "current_showtime_id": None,
+    "selected_seats": None,
+    "candidate_movie_ids": None,
+    "available_showtime_ids": None,
+    "available_seat_mask": None,
+    "current_question": None,  # Ini yang paling penting
+}
+
 
+def _booking_validation_error(state: TicketAgentState) -> Optional[dict]:
     showtime_id = state.get("current_showtime_id")
     seats = state.get("selected_seats")
     user_name = state.get("user_name")
@@ -959,16 +1292,7 @@ def node_execute_booking(state: TicketAgentState):
                 )
             ],
             # Reset state di sini juga, untuk menghindari loop error
-            "intent": "other",
-            "movie_title": None,
-            "genre": None,
-            "current_movie_id": None,
-            "current_showtime_id": None,
-            "selected_seats": None,
-            "candidate_movies": None,
-            "available_showtimes": None,
-            "available_seats": None,
-            "current_question": None,
+            **BOOKING_RESET,
         }
 
     # --- PERBAIKAN: Validasi 2 (Kursi Tidak Valid / Z99) ---
@@ -987,41 +1311,89 @@ def node_execute_booking(state: TicketAgentState):
             # Kita JANGAN reset state lain (movie_id, etc.)
             # Kita hanya ingin user mengulang langkah pemilihan kursi.
         }
+    return None
 
-    # --- Jika lolos semua validasi, baru panggil tool ---
-    print(f"   > Mencoba memesan: {user_name} | Jadwal {showtime_id} | Kursi {seats}")
-    result = book_tickets.invoke(
-        {
-            "showtime_id": showtime_id,
-            "seats": seats,
-            "user_name": user_name,
-        }
+
+def _booking_args(state: TicketAgentState, session_id: Optional[str]) -> dict:
+    print(
+        f"   > Mencoba memesan: {state['user_name']} | Jadwal {state['current_showtime_id']} | Kursi {state['selected_seats']}"
     )
-    print(f"   > Hasil Tool: {result}")
-    message_text = _message_from_tool_result(result)
+    return {
+        "showtime_id": state["current_showtime_id"],
+        "seats": state["selected_seats"],
+        "user_name": state["user_name"],
+        "session_id": session_id,
+    }
+
 
+def _booking_result_updates(result: Any) -> dict:
+    print(f"   > Hasil Tool: {result}")
     # --- PERBAIKAN: 3 (Reset State) ---
     # Kembalikan hasil tool DAN reset state agar alur selesai
     return {
         "messages": [
             ToolMessage(
-                content=message_text,
+                content=_message_from_tool_result(result),
                 name="book_tickets",
                 tool_call_id="book_tickets__manual",  # ID manual
             )
         ],
-        # Reset semua state yang berhubungan dengan alur booking ini
-        "intent": "other",  # Setel ulang niat ke default
-        "movie_title": None,
-        "genre": None,
-        "current_movie_id": None,
-        "current_showtime_id": None,
-        "selected_seats": None,
-        "candidate_movies": None,
-        "available_showtimes": None,
-        "available_seats": None,
-        # Kita biarkan user_name agar agen tetap ingat namanya
-        "current_question": None,  # Ini yang paling penting
+        **BOOKING_RESET,
+    }
+
+
+def _end_booking(session_id: Optional[str]) -> None:
+    """Booking selesai atau batal: lepas kursi yang ditahan dan buang hasil prefetch sesi."""
+    if not session_id:
+        return
+    release_seat_holds(session_id)
+    get_prefetcher().discard(session_id)
+
+
+def node_execute_booking(state: TicketAgentState, config: RunnableConfig = None):
+    """
+    Langkah 5 Pemesanan: Menjalankan tool 'book_tickets'.
+    Fungsi ini sekarang mencakup:
+    1. Validasi data tidak lengkap.
+    2. Validasi bahwa kursi yang dipilih ada di SEAT_MAP.
+    3. Reset state setelah pemesanan (sukses atau gagal) agar alur bisa dimulai dari awal.
+    """
+    print("--- NODE: Execute Booking (FINAL) ---")
+
+    error = _booking_validation_error(state)
+    if error:
+        return error
+
+    # --- Jika lolos semua validasi, baru panggil tool ---
+    session_id = _session_id_from_config(config)
+    result = book_tickets.invoke(_booking_args(state, session_id))
+    _end_booking(session_id)
+    return _booking_result_updates(result)
+
+
+async def anode_execute_booking(state: TicketAgentState, config: RunnableConfig = None):
+    """Versi async dari :func:`node_execute_booking`."""
+    print("--- NODE: Execute Booking (FINAL, async) ---")
+
+    error = _booking_validation_error(state)
+    if error:
+        return error
+
+    session_id = _session_id_from_config(config)
+    result = await book_tickets.ainvoke(_booking_args(state, session_id))
+    _end_booking(session_id)
+    return _booking_result_updates(result)
+
+
+def node_cancel_booking(state: TicketAgentState, config: RunnableConfig = None):
+    """Pengguna menolak konfirmasi: lepas kursi yang ditahan dan reset alur booking."""
+    print("--- NODE: Cancel Booking ---")
+
+    session_id = _session_id_from_config(config)
+    _end_booking(session_id)
+    return {
+        "messages": [AIMessage(content="Oke, pemesanan dibatalkan dan kursinya sudah dilepas. Ada yang bisa dibantu lagi?")],
+        **BOOKING_RESET,
     }
 
 
@@ -1049,13 +1421,13 @@ def main_router(state: TicketAgentState):
 
     # --- Prioritas 1: Cek Konfirmasi Booking ---
     if question == "ask_confirmation" and messages and isinstance(messages[-1], HumanMessage):
-        confirmation = _detect_confirmation(messages[-1].content)
+        confirmation = detect_confirmation(messages[-1].content)
         if confirmation is True:
             print("    > Router: Konfirmasi 'ya' terdeteksi. Lanjut eksekusi.")
             return "execute_booking"
         if confirmation is False:
             print("    > Router: Konfirmasi 'tidak' terdeteksi. Batal.")
-            return "__end__"
+            return "cancel_booking"
 
         print("    > Router: Jawaban konfirmasi tidak jelas. Tanya lagi.")
         return "confirm_booking"
@@ -1095,35 +1467,92 @@ def main_router(state: TicketAgentState):
     return "browsing_agent"
 
 
-# Kompilasi graph menggunakan helper modularada film
-app = compile_ticket_agent_workflow(
-    state_type=TicketAgentState,
-    router=main_router,
-    classify_intent=node_classify_intent,
-    browsing_agent=node_browsing_agent,
-    find_movie=node_find_movie,
-    find_showtime=node_find_showtime,
-    select_seats=node_select_seats,
-    confirm_booking=node_confirm_booking,
-    execute_booking=node_execute_booking,
-    final_response=node_final_response,
-)
+def compile_apps():
+    """Kompilasi graph sync dan async dari node yang sama."""
+    app = compile_ticket_agent_workflow(
+        state_type=TicketAgentState,
+        router=main_router,
+        classify_intent=node_classify_intent,
+        browsing_agent=node_browsing_agent,
+        find_movie=node_find_movie,
+        find_showtime=node_find_showtime,
+        select_seats=node_select_seats,
+        confirm_booking=node_confirm_booking,
+        execute_booking=node_execute_booking,
+        cancel_booking=node_cancel_booking,
+        final_response=node_final_response,
+    )
 
-# Tampilkan graph (sekarang seharusnya sudah terhubung)
-print("Graph berhasil di-compile. Menampilkan visualisasi...")
-
-# Kode untuk buat gambar mermaid PNG
-try:
-    print("Mencoba membuat visualisasi graph...")
-    png_data = app.get_graph().draw_mermaid_png()
-    with open("workflow_graph.png", "wb") as f:
-        f.write(png_data)
-    print("Visualisasi graph berhasil disimpan ke 'workflow_graph.png'")
-except Exception as e:
-    print(f"Gagal membuat visualisasi graph. Error: {e}")
-    print(
-        "(Ini tidak menghentikan agen, tapi Anda mungkin perlu 'pip install pygraphviz' atau 'playwright' untuk visualisasi.)"
+    # Graph yang sama dengan node async, dijalankan lewat ``async_app.ainvoke`` sehingga
+    # banyak percakapan bisa menunggu Gemini/DB secara bersamaan dalam satu event loop.
+    async_app = compile_ticket_agent_workflow(
+        state_type=TicketAgentState,
+        router=main_router,
+        classify_intent=anode_classify_intent,
+        browsing_agent=anode_browsing_agent,
+        find_movie=anode_find_movie,
+        find_showtime=anode_find_showtime,
+        select_seats=anode_select_seats,
+        confirm_booking=anode_confirm_booking,
+        execute_booking=anode_execute_booking,
+        cancel_booking=node_cancel_booking,
+        final_response=node_final_response,
     )
+    return app, async_app
+
+
+@dataclass
+class TiketaApp:
+    """Semua yang dibutuhkan untuk melayani percakapan, dibangun oleh :func:`create_app`."""
+
+    app: Any
+    async_app: Any
+    sessions: Any
+    checkpointer: Any
+    timings: dict[str, float] = field(default_factory=dict)
+
+
+def create_app(*, validate_env: bool = True, seed: bool = True) -> TiketaApp:
+    """Application factory: env, database, graph dan penyimpanan sesi.
+
+    Model Gemini tidak dibangun di sini (lihat :func:`get_models`), jadi startup
+    tidak menunggu import ``langchain_google_genai``.
+    """
+    # Import di sini: ``import run_tiketa`` tidak boleh mengubah os.environ.
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    timings: dict[str, float] = {}
+    if validate_env:
+        with _timed(timings, "env"):
+            setup_environment()
+    if seed:
+        with _timed(timings, "database"):
+            load_database(seed_database)
+    with _timed(timings, "compile"):
+        app, async_app = compile_apps()
+    with _timed(timings, "sessions"):
+        # Checkpoint SQLite (TIKETA_CHECKPOINT_PATH) membuat sesi bertahan restart; cache
+        # di memori (LRU/TTL dengan batas memori) memuat ulang sesi yang dievict dari sana.
+        checkpointer = create_session_checkpointer()
+        sessions = create_session_store(checkpointer)
+    print(f"Total kursi valid yang dikenali: {len(ALL_VALID_SEATS)}")
+    print(f"   > Startup: {_format_timings(timings)}")
+    return TiketaApp(app, async_app, sessions, checkpointer, timings)
+
+
+_tiketa_app: Optional[TiketaApp] = None
+_tiketa_app_lock = threading.Lock()
+
+
+def get_app() -> TiketaApp:
+    """Instance :class:`TiketaApp` milik proses ini, dibuat saat pertama dibutuhkan."""
+    global _tiketa_app
+    if _tiketa_app is None:
+        with _tiketa_app_lock:
+            if _tiketa_app is None:
+                _tiketa_app = create_app()
+    return _tiketa_app
 
 
 INITIAL_STATE_TEMPLATE: TicketAgentState = {
@@ -1135,71 +1564,294 @@ INITIAL_STATE_TEMPLATE: TicketAgentState = {
     "current_showtime_id": None,
     "selected_seats": None,
     "user_name": None,
-    "candidate_movies": None,
-    "available_showtimes": None,
-    "available_seats": None,
+    "candidate_movie_ids": None,
+    "available_showtime_ids": None,
+    "available_seat_mask": None,
     "current_question": None,
+    "classifier_path": None,
+    "conversation_summary": None,
+    "summarized_message_count": 0,
+    "browsing_plan": None,
 }
 
-session_states: dict[str, TicketAgentState] = {}
-
-
 def hydrate_state(state: Optional[TicketAgentState]) -> TicketAgentState:
-    base_state = deepcopy(INITIAL_STATE_TEMPLATE)
+    # Nilai template semuanya immutable (None/0), jadi salinan dangkal sudah cukup.
+    base_state: TicketAgentState = {**INITIAL_STATE_TEMPLATE, "messages": []}
     if state:
-        # Gunakan .get untuk menangani state parsial dari graph
+        # List pesan dipakai apa adanya (tidak disalin); pemanggil memberi list milik sesi.
         for key, value in state.items():
-            if key == "messages":
-                base_state["messages"] = list(value or [])
-            else:
-                base_state[key] = value
+            base_state[key] = (value or []) if key == "messages" else value
     return base_state
 
 
-# Jalankan Chat Loop
-print("\n--- Agen Bioskop Siap! ---")
-print("Ketik 'exit' untuk keluar.")
-print(
-    "Contoh: 'Film action apa yang ada?', 'Saya Rafi, mau pesan tiket The Dark Knight', 'Pilih ID 101', 'Kursi D1, D2', 'ya'"
-)
+def _load_session(runtime: TiketaApp, session_id: str) -> Optional[TicketAgentState]:
+    state = runtime.sessions.get(session_id)
+    if state is None and runtime.checkpointer is not None:
+        state = runtime.checkpointer.load(session_id)
+        if state is not None:
+            print(f"   > Sesi {session_id} dipulihkan dari checkpoint ({len(state['messages'])} pesan).")
+            state = hydrate_state(state)
+            runtime.sessions[session_id] = state
+    return state
 
-SESSION_ID = "user_123_notebook"
 
-while True:
-    try:
-        user_input = input("\nAnda: ")
-        if user_input.lower() == "exit":
-            break
+async def _aload_session(runtime: TiketaApp, session_id: str) -> Optional[TicketAgentState]:
+    state = await runtime.sessions.aget(session_id)
+    if state is None and runtime.checkpointer is not None:
+        # Checkpoint memakai sqlite3 biasa; jalankan di thread agar sesi lain tetap jalan.
+        state = await asyncio.to_thread(runtime.checkpointer.load, session_id)
+        if state is not None:
+            print(f"   > Sesi {session_id} dipulihkan dari checkpoint ({len(state['messages'])} pesan).")
+            state = hydrate_state(state)
+            await runtime.sessions.aput(session_id, state)
+    return state
+
+
+class TurnStart(NamedTuple):
+    """State sesi saat giliran dimulai; ``message_count`` dicatat sebelum pesan baru ditambahkan."""
+
+    state: Optional[TicketAgentState]
+    message_count: int
+
+
+def _start_state(
+    session_id: str, user_input: str, previous_state: Optional[TicketAgentState]
+) -> tuple[TicketAgentState, TurnStart, dict]:
+    # Pesan baru ditambahkan langsung ke list yang tersimpan; menyalin riwayat tiap giliran O(n).
+    current_state = previous_state if previous_state is not None else hydrate_state(None)
+    turn = TurnStart(previous_state, len(current_state["messages"]))
+    current_state["messages"].append(HumanMessage(content=user_input))
+    config = {"configurable": {"session_id": session_id}}
+    return current_state, turn, config
+
+
+def _abort_turn(current_state: TicketAgentState, turn: TurnStart) -> None:
+    # Graph gagal/dibatalkan: buang pesan pengguna yang sudah ditambahkan ke riwayat tersimpan.
+    del current_state["messages"][turn.message_count:]
+
+
+def _prepare_turn(
+    runtime: TiketaApp, session_id: str, user_input: str
+) -> tuple[TicketAgentState, TurnStart, dict]:
+    return _start_state(session_id, user_input, _load_session(runtime, session_id))
+
 
-        config = {"configurable": {"session_id": SESSION_ID}}
-        input_message = HumanMessage(content=user_input)
+async def _aprepare_turn(
+    runtime: TiketaApp, session_id: str, user_input: str
+) -> tuple[TicketAgentState, TurnStart, dict]:
+    return _start_state(session_id, user_input, await _aload_session(runtime, session_id))
 
-        current_state = hydrate_state(session_states.get(SESSION_ID))
-        existing_messages = list(current_state.get("messages", []))
-        existing_messages.append(input_message)
-        current_state["messages"] = existing_messages
 
-        messages_before_run = len(existing_messages)
+def _new_replies(new_state: TicketAgentState, turn: TurnStart) -> List[AIMessage]:
+    new_messages = new_state["messages"][turn.message_count + 1:]
+    return [m for m in new_messages if isinstance(m, AIMessage)]
 
-        print("\nAgen:")
-        result_state = app.invoke(current_state, config=config)
-        session_states[SESSION_ID] = hydrate_state(result_state)
 
-        all_messages = list(result_state.get("messages", []))
-        new_messages = all_messages[messages_before_run:]
-        ai_responses = [m for m in new_messages if isinstance(m, AIMessage)]
+def _result_state(result_state: dict) -> TicketAgentState:
+    # List pesan hasil graph sudah baru; cukup lengkapi slot yang belum pernah diisi.
+    for key, value in INITIAL_STATE_TEMPLATE.items():
+        result_state.setdefault(key, value)
+    return result_state
 
-        if not ai_responses:
+
+def _finish_turn(runtime: TiketaApp, session_id: str, result_state: dict, turn: TurnStart) -> List[AIMessage]:
+    new_state = _result_state(result_state)
+    runtime.sessions[session_id] = new_state
+    if runtime.checkpointer is not None:
+        runtime.checkpointer.save(session_id, new_state, turn.state, known_messages=turn.message_count)
+    return _new_replies(new_state, turn)
+
+
+async def _afinish_turn(runtime: TiketaApp, session_id: str, result_state: dict, turn: TurnStart) -> List[AIMessage]:
+    new_state = _result_state(result_state)
+    await runtime.sessions.aput(session_id, new_state)
+    if runtime.checkpointer is not None:
+        await asyncio.to_thread(
+            runtime.checkpointer.save, session_id, new_state, turn.state, known_messages=turn.message_count
+        )
+    return _new_replies(new_state, turn)
+
+
+def run_turn(session_id: str, user_input: str) -> List[AIMessage]:
+    """Jalankan satu giliran percakapan (sync) dan kembalikan balasan AI yang baru."""
+    runtime = get_app()
+    current_state, turn, config = _prepare_turn(runtime, session_id, user_input)
+    try:
+        result_state = runtime.app.invoke(current_state, config=config)
+    except BaseException:
+        _abort_turn(current_state, turn)
+        raise
+    return _finish_turn(runtime, session_id, result_state, turn)
+
+
+async def arun_turn(session_id: str, user_input: str) -> List[AIMessage]:
+    """Versi async dari :func:`run_turn` (memakai ``async_app.ainvoke``)."""
+    runtime = get_app()
+    current_state, turn, config = await _aprepare_turn(runtime, session_id, user_input)
+    try:
+        result_state = await runtime.async_app.ainvoke(current_state, config=config)
+    except BaseException:
+        _abort_turn(current_state, turn)
+        raise
+    return await _afinish_turn(runtime, session_id, result_state, turn)
+
+
+# --- Streaming ---
+# Event yang dikirim ke klien selama satu giliran:
+#   {"type": "node", "node": ..., "status": "start" | "end"}  progres node graph
+#   {"type": "token", "node": ..., "text": ...}              token LLM jawaban browsing
+#   {"type": "message", "node": ..., "text": ...}            balasan utuh (mis. template)
+#   {"type": "done", "replies": [...]}                       akhir giliran, state tersimpan
+STREAM_MODES = ["tasks", "messages", "updates", "values"]
+# Hanya jawaban akhir browsing yang ditulis LLM token demi token; node lain
+# merender balasannya dari template sehingga langsung dikirim utuh.
+TOKEN_STREAM_NODES = {"browsing_agent"}
+
+
+def _stream_events(mode: str, chunk: Any, streamed_ids: set) -> List[dict]:
+    """Terjemahkan satu item ``app.stream(stream_mode=STREAM_MODES)`` menjadi event klien."""
+    if mode == "tasks":
+        status = "start" if "input" in chunk else "end"
+        return [{"type": "node", "node": chunk.get("name"), "status": status}]
+    if mode == "messages":
+        message, metadata = chunk
+        node = (metadata or {}).get("langgraph_node")
+        text = message.content if isinstance(message.content, str) else ""
+        # Mode "messages" juga memutar ulang pesan utuh dari update state; yang diambil
+        # hanya chunk hasil streaming LLM, pesan utuh dikirim lewat mode "updates".
+        if not isinstance(message, AIMessageChunk) or node not in TOKEN_STREAM_NODES:
+            return []
+        if not text or message.tool_call_chunks:
+            return []
+        if message.id:
+            streamed_ids.add(message.id)
+        return [{"type": "token", "node": node, "text": text}]
+    if mode == "updates":
+        events = []
+        for node, update in (chunk or {}).items():
+            for message in (update or {}).get("messages") or []:
+                if isinstance(message, AIMessage) and message.content and message.id not in streamed_ids:
+                    events.append({"type": "message", "node": node, "text": message.content})
+        return events
+    return []
+
+
+def stream_turn(session_id: str, user_input: str) -> Iterator[dict]:
+    """Seperti :func:`run_turn`, tetapi menghasilkan event progres dan token selagi graph berjalan."""
+    runtime = get_app()
+    current_state, turn, config = _prepare_turn(runtime, session_id, user_input)
+    result_state: dict = current_state
+    streamed_ids: set = set()
+    try:
+        for mode, chunk in runtime.app.stream(current_state, config=config, stream_mode=STREAM_MODES):
+            if mode == "values":
+                result_state = chunk
+                continue
+            yield from _stream_events(mode, chunk, streamed_ids)
+    except BaseException:
+        _abort_turn(current_state, turn)
+        raise
+    replies = _finish_turn(runtime, session_id, result_state, turn)
+    yield {"type": "done", "replies": [reply.content for reply in replies]}
+
+
+async def astream_turn(session_id: str, user_input: str) -> AsyncIterator[dict]:
+    """Versi async dari :func:`stream_turn` (memakai ``async_app.astream``)."""
+    runtime = get_app()
+    current_state, turn, config = await _aprepare_turn(runtime, session_id, user_input)
+    result_state: dict = current_state
+    streamed_ids: set = set()
+    try:
+        async for mode, chunk in runtime.async_app.astream(current_state, config=config, stream_mode=STREAM_MODES):
+            if mode == "values":
+                result_state = chunk
+                continue
+            for event in _stream_events(mode, chunk, streamed_ids):
+                yield event
+    except BaseException:
+        _abort_turn(current_state, turn)
+        raise
+    replies = await _afinish_turn(runtime, session_id, result_state, turn)
+    yield {"type": "done", "replies": [reply.content for reply in replies]}
+
+
+def _print_event(event: dict, printed: dict) -> None:
+    if event["type"] == "token":
+        print(event["text"], end="", flush=True)
+        printed["tokens"] = True
+    elif event["type"] == "message":
+        if printed.pop("tokens", False):
+            print()
+        print(event["text"], flush=True)
+        printed["any"] = True
+    elif event["type"] == "done":
+        if printed.pop("tokens", False):
+            print()
+            printed["any"] = True
+        if not printed.get("any"):
             print("(Tidak ada respons dari agen)")
-        else:
-            for message in ai_responses:
-                print(message.content)
 
-    except KeyboardInterrupt:
-        print("\nBerhenti...")
-        break
-    except Exception as e:
-        print(f"\nTerjadi error: {e}")
-        break
+
+def _print_banner() -> None:
+    print("\n--- Agen Bioskop Siap! ---")
+    print("Ketik 'exit' untuk keluar.")
+    print(
+        "Contoh: 'Film action apa yang ada?', 'Saya Rafi, mau pesan tiket The Dark Knight', 'Pilih ID 101', 'Kursi D1, D2', 'ya'"
+    )
+
+
+# Satu sesi untuk chat loop lokal; untuk melayani banyak sesi sekaligus jalankan server.py.
+SESSION_ID = "user_123_notebook"
+
+
+def main():
+    """Chat loop interaktif (sync)."""
+    get_app()
+    _print_banner()
+    while True:
+        try:
+            user_input = input("\nAnda: ")
+            if user_input.lower() == "exit":
+                break
+
+            print("\nAgen:")
+            printed: dict = {}
+            for event in stream_turn(SESSION_ID, user_input):
+                _print_event(event, printed)
+
+        except KeyboardInterrupt:
+            print("\nBerhenti...")
+            break
+        except Exception as e:
+            print(f"\nTerjadi error: {e}")
+            break
+
+
+async def amain():
+    """Chat loop interaktif di atas event loop (``TIKETA_ASYNC=1``)."""
+    get_app()
+    _print_banner()
+    while True:
+        try:
+            user_input = await asyncio.to_thread(input, "\nAnda: ")
+            if user_input.lower() == "exit":
+                break
+
+            print("\nAgen:")
+            printed: dict = {}
+            async for event in astream_turn(SESSION_ID, user_input):
+                _print_event(event, printed)
+
+        except (KeyboardInterrupt, EOFError):
+            print("\nBerhenti...")
+            break
+        except Exception as e:
+            print(f"\nTerjadi error: {e}")
+            break
 
 
+if __name__ == "__main__":
+    if os.getenv("TIKETA_ASYNC", "").lower() in {"1", "true", "yes"}:
+        asyncio.run(amain())
+    else:
+        main()
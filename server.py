@@ -0,0 +1,385 @@
+"""HTTP entry point that serves many chat sessions from one process.
+
+A small asyncio HTTP/1.1 server (stdlib only) in front of
+``run_tiketa.arun_turn``:
+
+* ``POST /chat`` with ``{"session_id": "...", "message": "..."}`` returns
+  ``{"session_id": ..., "replies": [...]}``;
+* ``POST /chat/stream`` takes the same body and answers with
+  ``text/event-stream``: node progress, LLM tokens and template replies are
+  sent as Server-Sent Events the moment they exist, ending with ``done``;
+* ``GET /health`` reports in-flight turns, session store statistics and the
+  hit ratios of the in-process caches.
+
+Messages of one session are serialized with a per-session lock (the graph
+reads and writes that session's state), while different sessions overlap their
+LLM waits on the event loop. A semaphore bounds how many turns run at once.
+Each turn runs in its own task: when ``TIKETA_TURN_TIMEOUT`` expires the
+request gets a 504 (or an ``error`` event) but the turn still runs to the end
+and saves the session, so seat holds and state are never left half-applied.
+The same timeout bounds the wait for the session lock and a slot: a request
+still queued when it runs out gets a 503 and its turn never starts.
+On SIGTERM/SIGINT the listener closes, in-flight turns get a grace period to
+finish, and only then does the process exit.
+
+Configuration: ``TIKETA_HOST`` (default 127.0.0.1), ``TIKETA_PORT`` (8080),
+``TIKETA_MAX_CONCURRENCY`` (32), ``TIKETA_TURN_TIMEOUT`` (60 s),
+``TIKETA_SHUTDOWN_GRACE`` (30 s).
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import signal
+from contextlib import asynccontextmanager
+from http import HTTPStatus
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+MAX_BODY_BYTES = 64 * 1024
+MAX_HEADER_LINES = 100
+READ_TIMEOUT_SECONDS = 15
+
+# Penanda akhir antrean event streaming.
+_END_OF_TURN = object()
+
+TurnHandler = Callable[[str, str], Awaitable[List[Any]]]
+StreamHandler = Callable[[str, str], AsyncIterator[Dict[str, Any]]]
+
+
+class HttpError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class SessionLocks:
+    """One ``asyncio.Lock`` per session, dropped again once nobody holds or waits on it."""
+
+    def __init__(self) -> None:
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._users: Dict[str, int] = {}
+
+    @asynccontextmanager
+    async def hold(self, session_id: str):
+        lock = self._locks.setdefault(session_id, asyncio.Lock())
+        self._users[session_id] = self._users.get(session_id, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._users[session_id] -= 1
+            if not self._users[session_id]:
+                del self._users[session_id]
+                del self._locks[session_id]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+class TiketaServer:
+    def __init__(
+        self,
+        handler: TurnHandler,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        max_concurrency: int = 32,
+        turn_timeout: float = 60.0,
+        shutdown_grace: float = 30.0,
+        session_stats: Optional[Callable[[], Dict[str, Any]]] = None,
+        cache_stats: Optional[Callable[[], Dict[str, Any]]] = None,
+        stream_handler: Optional[StreamHandler] = None,
+    ):
+        self.handler = handler
+        self.stream_handler = stream_handler
+        self.host = host
+        self.port = port
+        self.turn_timeout = turn_timeout
+        self.shutdown_grace = shutdown_grace
+        self._session_stats = session_stats
+        self._cache_stats = cache_stats
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._session_locks = SessionLocks()
+        self._connections: set[asyncio.Task] = set()
+        # Giliran yang sedang berjalan, termasuk yang sudah ditinggal requestnya (timeout).
+        self._turn_tasks: set[asyncio.Task] = set()
+        self._active_turns = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._stopping = asyncio.Event()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        sockets = self._server.sockets or []
+        if sockets:
+            self.port = sockets[0].getsockname()[1]
+        print(f"Server Tiketa berjalan di http://{self.host}:{self.port}")
+
+    def request_shutdown(self) -> None:
+        self._stopping.set()
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        await self._stopping.wait()
+        await self.shutdown()
+
+    async def shutdown(self) -> None:
+        """Stop accepting connections, then give in-flight requests ``shutdown_grace`` seconds."""
+        print(
+            f"   > Server berhenti: menunggu {len(self._connections)} koneksi aktif "
+            f"dan {len(self._turn_tasks)} giliran..."
+        )
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        pending = self._connections | self._turn_tasks
+        if pending:
+            _, still_running = await asyncio.wait(pending, timeout=self.shutdown_grace)
+            for task in still_running:
+                task.cancel()
+            if still_running:
+                await asyncio.gather(*still_running, return_exceptions=True)
+                print(f"   > {len(still_running)} koneksi dibatalkan setelah masa tenggang.")
+        print("   > Server berhenti dengan bersih.")
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "status": "stopping" if self._stopping.is_set() else "ok",
+            "active_turns": self._active_turns,
+            "open_connections": len(self._connections),
+            "locked_sessions": len(self._session_locks),
+        }
+        if self._session_stats is not None:
+            stats["sessions"] = self._session_stats()
+        if self._cache_stats is not None:
+            stats["caches"] = self._cache_stats()
+        return stats
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            try:
+                method, path, body = await asyncio.wait_for(_read_request(reader), READ_TIMEOUT_SECONDS)
+                if path == "/chat/stream" and method == "POST":
+                    await self._chat_stream(body, writer)
+                    return
+                status, payload = await self._dispatch(method, path, body)
+            except HttpError as exc:
+                status, payload = exc.status, {"error": exc.message}
+            except asyncio.TimeoutError:
+                status, payload = HTTPStatus.REQUEST_TIMEOUT, {"error": "Permintaan terlalu lama."}
+            await _write_response(writer, status, payload)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Tuple[HTTPStatus, Dict[str, Any]]:
+        if path == "/health" and method == "GET":
+            return HTTPStatus.OK, self.stats()
+        if path == "/chat" and method == "POST":
+            return await self._chat(body)
+        if path in {"/health", "/chat", "/chat/stream"}:
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, f"Metode {method} tidak didukung untuk {path}.")
+        raise HttpError(HTTPStatus.NOT_FOUND, f"Path {path} tidak dikenal.")
+
+    def _parse_chat(self, body: bytes) -> Tuple[str, str]:
+        if self._stopping.is_set():
+            raise HttpError(HTTPStatus.SERVICE_UNAVAILABLE, "Server sedang berhenti.")
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Body harus berupa JSON.")
+        if not isinstance(data, dict):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Body harus berupa objek JSON.")
+        session_id = data.get("session_id")
+        message = data.get("message")
+        if not isinstance(session_id, str) or not session_id.strip():
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Field 'session_id' wajib diisi.")
+        if not isinstance(message, str) or not message.strip():
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Field 'message' wajib diisi.")
+        return session_id, message
+
+    @asynccontextmanager
+    async def _turn(self, session_id: str):
+        async with self._session_locks.hold(session_id), self._slots:
+            self._active_turns += 1
+            try:
+                yield
+            finally:
+                self._active_turns -= 1
+
+    async def _start_turn(self, session_id: str, run: Callable[[], Awaitable[Any]]) -> Tuple[asyncio.Task, float]:
+        """Run ``run()`` as its own task once the session lock and a slot are held.
+
+        Returns the task as soon as the turn has started, with what is left of
+        ``turn_timeout`` after queueing. A turn still queued when the timeout
+        runs out is cancelled (nothing has run yet) and the request gets a 503.
+        Callers wait on the task through ``asyncio.shield``, so a request that
+        times out or loses its client stops waiting while the turn itself still
+        finishes and persists its state; it is never cancelled between a seat
+        hold and the session save.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.turn_timeout
+        started = asyncio.Event()
+
+        async def turn() -> Any:
+            async with self._turn(session_id):
+                started.set()
+                return await run()
+
+        task = asyncio.create_task(turn())
+        self._turn_tasks.add(task)
+        task.add_done_callback(lambda done: self._turn_finished(session_id, done))
+        try:
+            await asyncio.wait_for(started.wait(), self.turn_timeout)
+        except asyncio.TimeoutError:
+            # Bisa saja giliran mulai tepat saat timeout; yang sudah jalan tidak dibatalkan.
+            if not started.is_set():
+                task.cancel()
+                raise HttpError(HTTPStatus.SERVICE_UNAVAILABLE, "Sesi ini masih memproses pesan lain, coba lagi.")
+        except asyncio.CancelledError:
+            # Belum mulai (masih antre lock/slot): aman dibatalkan.
+            if not started.is_set():
+                task.cancel()
+            raise
+        return task, max(deadline - loop.time(), 0)
+
+    def _turn_finished(self, session_id: str, task: asyncio.Task) -> None:
+        self._turn_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"   > Error sesi {session_id}: {task.exception()}")
+
+    async def _chat(self, body: bytes) -> Tuple[HTTPStatus, Dict[str, Any]]:
+        session_id, message = self._parse_chat(body)
+        turn, remaining = await self._start_turn(session_id, lambda: self.handler(session_id, message))
+        try:
+            replies = await asyncio.wait_for(asyncio.shield(turn), remaining)
+        except asyncio.TimeoutError:
+            raise HttpError(HTTPStatus.GATEWAY_TIMEOUT, "Agen terlalu lama merespons, coba lagi.")
+        except Exception:
+            raise HttpError(HTTPStatus.INTERNAL_SERVER_ERROR, "Terjadi error pada agen.")
+        return HTTPStatus.OK, {
+            "session_id": session_id,
+            "replies": [getattr(reply, "content", str(reply)) for reply in replies],
+        }
+
+    async def _chat_stream(self, body: bytes, writer: asyncio.StreamWriter) -> None:
+        """Kirim event giliran sebagai SSE; error setelah header terkirim menjadi event ``error``."""
+        if self.stream_handler is None:
+            raise HttpError(HTTPStatus.NOT_FOUND, "Streaming tidak diaktifkan di server ini.")
+        session_id, message = self._parse_chat(body)
+        events: "asyncio.Queue[Any]" = asyncio.Queue()
+
+        async def pump() -> None:
+            # Generator dihabiskan oleh task giliran, bukan oleh koneksi, jadi
+            # timeout atau klien yang putus tidak menghentikannya di tengah jalan.
+            try:
+                async for event in self.stream_handler(session_id, message):
+                    events.put_nowait(event)
+            finally:
+                events.put_nowait(_END_OF_TURN)
+
+        turn, remaining = await self._start_turn(session_id, pump)
+        writer.write(
+            (
+                f"HTTP/1.1 {HTTPStatus.OK.value} {HTTPStatus.OK.phrase}\r\n"
+                "Content-Type: text/event-stream; charset=utf-8\r\n"
+                "Cache-Control: no-cache\r\n"
+                "Connection: close\r\n\r\n"
+            ).encode("latin-1")
+        )
+        await writer.drain()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + remaining
+        while True:
+            try:
+                event = await asyncio.wait_for(events.get(), max(deadline - loop.time(), 0))
+            except asyncio.TimeoutError:
+                await _write_event(writer, {"type": "error", "error": "Agen terlalu lama merespons, coba lagi."})
+                return
+            if event is _END_OF_TURN:
+                break
+            await _write_event(writer, event)
+        await asyncio.wait({turn})
+        if turn.cancelled() or turn.exception() is not None:
+            await _write_event(writer, {"type": "error", "error": "Terjadi error pada agen."})
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str, bytes]:
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    parts = request_line.split()
+    if len(parts) != 3:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Request line tidak valid.")
+    method, target, _ = parts
+    headers: Dict[str, str] = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = (await reader.readline()).decode("latin-1")
+        if line in ("\r\n", "\n", ""):
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Header terlalu banyak.")
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Content-Length tidak valid.")
+    if length > MAX_BODY_BYTES:
+        raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Body terlalu besar.")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target.split("?", 1)[0], body
+
+
+async def _write_response(writer: asyncio.StreamWriter, status: HTTPStatus, payload: Dict[str, Any]) -> None:
+    body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n"
+    ).encode("latin-1")
+    writer.write(head + body)
+    await writer.drain()
+
+
+async def _write_event(writer: asyncio.StreamWriter, event: Dict[str, Any]) -> None:
+    data = json.dumps(event, ensure_ascii=False, default=str)
+    writer.write(f"event: {event.get('type', 'message')}\ndata: {data}\n\n".encode("utf-8"))
+    await writer.drain()
+
+
+async def serve() -> None:
+    import run_tiketa
+
+    runtime = run_tiketa.get_app()
+    server = TiketaServer(
+        run_tiketa.arun_turn,
+        host=os.getenv("TIKETA_HOST", "127.0.0.1"),
+        port=int(os.getenv("TIKETA_PORT", "8080")),
+        max_concurrency=int(os.getenv("TIKETA_MAX_CONCURRENCY", "32")),
+        turn_timeout=float(os.getenv("TIKETA_TURN_TIMEOUT", "60")),
+        shutdown_grace=float(os.getenv("TIKETA_SHUTDOWN_GRACE", "30")),
+        session_stats=runtime.sessions.stats,
+        cache_stats=run_tiketa.cache_stats,
+        stream_handler=run_tiketa.astream_turn,
+    )
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, server.request_shutdown)
+        except NotImplementedError:  # pragma: no cover - Windows
+            pass
+    await server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve())
@@ -0,0 +1,69 @@
+import os
+import sys
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, insert
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.schema import (  # noqa: E402
+    genres_table,
+    metadata,
+    movie_genres_table,
+    movies_table,
+    showtimes_table,
+)
+
+MOVIES = [
+    (1, "Spirited Away", "A girl wanders into a world of spirits.", ["Animation", "Fantasy"]),
+    (2, "Attack on Titan: Requiem", "Humanity fights the titans behind the walls.", ["Animation", "Action"]),
+    (3, "Interstellar", "Explorers travel through a wormhole in space.", ["Sci-Fi"]),
+]
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """File SQLite database with the schema and a tiny catalogue (showtime 1 = movie 1)."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'tiketa.db'}")
+    metadata.create_all(engine)
+    genre_ids = {name: idx for idx, name in enumerate(sorted({g for *_, genres in MOVIES for g in genres}), start=1)}
+    with engine.begin() as conn:
+        conn.execute(insert(genres_table), [{"id": gid, "name": name} for name, gid in genre_ids.items()])
+        conn.execute(
+            insert(movies_table),
+            [
+                {"id": movie_id, "title": title, "description": description, "studio_number": movie_id}
+                for movie_id, title, description, _ in MOVIES
+            ],
+        )
+        conn.execute(
+            insert(movie_genres_table),
+            [
+                {"movie_id": movie_id, "genre_id": genre_ids[name]}
+                for movie_id, *_, genres in MOVIES
+                for name in genres
+            ],
+        )
+        conn.execute(
+            insert(showtimes_table),
+            [{"id": movie_id, "movie_id": movie_id, "time": datetime(2026, 10, 16, 19)} for movie_id, *_ in MOVIES],
+        )
+    yield engine
+    engine.dispose()
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
@@ -0,0 +1,54 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, insert, select
+
+import db.engine
+from db.engine import DatabaseConfig, create_db_engine
+from db.schema import bookings_table, metadata, movies_table, showtimes_table
+from tools.bookings import book_tickets
+from tools.seat_index import seat_index
+
+THREADS = 8
+
+
+@pytest.fixture(params=["memory", "file"])
+def booking_db(request, tmp_path, monkeypatch):
+    """Pooled shared engine over the default memdb database or a WAL file (``sqlite:///...``)."""
+    url = "memory" if request.param == "memory" else f"sqlite:///{tmp_path / 'bookings.db'}"
+    config = DatabaseConfig(url=url, busy_timeout=10.0)
+    engine = create_db_engine(config)
+    # memdb dibagi satu proses; mulai dari tabel kosong dan bersihkan lagi sesudahnya.
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(movies_table).values(id=1, title="Spirited Away", studio_number=1))
+        conn.execute(insert(showtimes_table).values(id=1, movie_id=1, time=datetime(2026, 10, 16, 19)))
+    monkeypatch.setattr(db.engine, "_database_config", config)
+    monkeypatch.setattr(db.engine, "_engine", engine)
+    seat_index.invalidate()
+    yield engine
+    seat_index.invalidate()
+    metadata.drop_all(engine)
+    engine.dispose()
+
+
+def test_concurrent_bookings_of_one_seat_store_it_once(booking_db):
+    barrier = threading.Barrier(THREADS)
+
+    def attempt(worker: int) -> dict:
+        barrier.wait()
+        return book_tickets.invoke({"showtime_id": 1, "seats": ["E5", "E6"], "user_name": f"user-{worker}"})
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        results = list(pool.map(attempt, range(THREADS)))
+
+    assert sum(result["success"] for result in results) == 1
+    assert all("terisi" in result["message"] for result in results if not result["success"])
+    with booking_db.connect() as conn:
+        rows = conn.execute(
+            select(bookings_table.c.seat, func.count()).group_by(bookings_table.c.seat).order_by(bookings_table.c.seat)
+        ).all()
+    assert [tuple(row) for row in rows] == [("E5", 1), ("E6", 1)]
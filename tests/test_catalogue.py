@@ -0,0 +1,79 @@
+from datetime import datetime
+
+from db.catalogue import Catalogue
+
+
+def test_replacing_an_entry_with_new_data_bumps_the_version(engine):
+    catalogue = Catalogue(bind=engine)
+    catalogue.add_movies([{"id": 1, "title": "Spirited Away"}])
+    catalogue.register_showtimes(1, [(1, datetime(2026, 10, 16, 19))])
+    version = catalogue.version
+
+    catalogue.add_movies([{"id": 1, "title": "Spirited Away"}])
+    catalogue.register_showtimes(1, [(1, datetime(2026, 10, 16, 19))])
+    assert catalogue.version == version
+
+    catalogue.add_movies([{"id": 1, "title": "Sen to Chihiro"}])
+    assert catalogue.version == version + 1
+    catalogue.register_showtimes(1, [(1, datetime(2026, 10, 16, 21))])
+    assert catalogue.version == version + 2
+    assert catalogue.showtime(1).time_display.endswith("21:00")
+
+
+def test_hits_misses_and_evictions_are_counted(engine):
+    catalogue = Catalogue(bind=engine, max_entries=2)
+    assert [entry.id for entry in catalogue.movies([1, 2, 1])] == [1, 2, 1]
+    catalogue.movies([1, 2])
+    catalogue.movies([3])
+    stats = catalogue.stats()["movies"]
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["size"]) == (2, 3, 1, 2)
+    assert stats["hit_ratio"] == 0.4
+    # Film 1 paling lama tidak dipakai, jadi dia yang dievict dan dimuat ulang.
+    catalogue.movies([1])
+    assert catalogue.stats()["movies"]["misses"] == 4
+
+
+def test_invalidate_drops_entries_and_bumps_the_version(engine):
+    catalogue = Catalogue(bind=engine)
+    catalogue.movies([1, 2])
+    catalogue.showtimes([1])
+    version = catalogue.version
+    catalogue.invalidate_movies([1])
+    assert catalogue.version == version + 1
+    assert catalogue.stats()["movies"]["size"] == 1
+    catalogue.invalidate_showtimes()
+    assert catalogue.version == version + 2
+    assert catalogue.stats()["showtimes"]["size"] == 0
+    catalogue.clear()
+    assert catalogue.version == version + 3
+    assert catalogue.stats()["movies"]["size"] == 0
+
+
+def test_genres_are_cached_and_shown_by_search_movies(engine, monkeypatch):
+    import tools.bookings
+    from db.search_index import MovieSearchIndex
+
+    catalogue = Catalogue(bind=engine)
+    monkeypatch.setattr(tools.bookings, "catalogue", catalogue)
+    monkeypatch.setattr(tools.bookings, "movie_search_index", MovieSearchIndex(bind=engine))
+    result = tools.bookings.search_movies.invoke({"title": "spirited"})
+    assert result["movies"][0]["genres"] == ["Animation", "Fantasy"]
+    assert "Spirited Away (Animation, Fantasy)" in result["message"]
+    # genreId 1 = "Action" di conftest, dibaca dari record genre yang sudah di-cache.
+    result = tools.bookings.search_movies.func(genreId="1")
+    assert [movie["title"] for movie in result["movies"]] == ["Attack on Titan: Requiem"]
+    stats = catalogue.stats()["genres"]
+    assert (stats["hits"], stats["misses"]) == (2, 3)
+
+
+def test_search_movies_genre_id_falls_back_to_name_and_rejects_unknown_ids(engine, monkeypatch):
+    import tools.bookings
+    from db.search_index import MovieSearchIndex
+
+    monkeypatch.setattr(tools.bookings, "catalogue", Catalogue(bind=engine))
+    monkeypatch.setattr(tools.bookings, "movie_search_index", MovieSearchIndex(bind=engine))
+    result = tools.bookings.search_movies.func(genreId="Action")
+    assert [movie["title"] for movie in result["movies"]] == ["Attack on Titan: Requiem"]
+    result = tools.bookings.search_movies.func(genreId=99)
+    assert result["movies"] == []
+    assert result["message"].startswith("Film tidak ditemukan")
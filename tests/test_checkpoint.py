@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent.checkpoint import SessionCheckpointer
+
+
+def _turn(state, user, reply, **slots):
+    return {**state, **slots, "messages": [*state["messages"], HumanMessage(content=user), AIMessage(content=reply)]}
+
+
+def _rows(checkpointer, table):
+    return checkpointer._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_sessions_survive_a_restart(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    checkpointer = SessionCheckpointer(path)
+    first = _turn({"messages": [], "intent": None}, "mau nonton", "Film apa?", intent="booking")
+    checkpointer.save("s1", first)
+    second = _turn(first, "jam 7", "Siap.", selected_showtime_time=datetime(2026, 10, 16, 19, 0))
+    checkpointer.save("s1", second, first)
+    checkpointer.close()
+
+    restored = SessionCheckpointer(path).load("s1")
+    assert restored["intent"] == "booking"
+    assert restored["selected_showtime_time"] == datetime(2026, 10, 16, 19, 0)
+    assert [message.content for message in restored["messages"]] == ["mau nonton", "Film apa?", "jam 7", "Siap."]
+    assert isinstance(restored["messages"][0], HumanMessage)
+    assert SessionCheckpointer(path).load("unknown") is None
+
+
+def test_turn_writes_only_new_messages_and_changed_slots(tmp_path):
+    checkpointer = SessionCheckpointer(str(tmp_path / "sessions.db"))
+    first = _turn({"messages": [], "intent": None, "selected_seats": []}, "halo", "Hai!")
+    assert checkpointer.save("s1", first) == 2 + 2
+
+    second = _turn(first, "kursi A1", "Oke.", selected_seats=["A1"])
+    # Satu slot berubah + dua pesan baru; "intent" yang sama tidak ditulis ulang.
+    assert checkpointer.save("s1", second, first) == 1 + 2
+    assert _rows(checkpointer, "session_messages") == 4
+    assert _rows(checkpointer, "session_slots") == 2
+    assert checkpointer.save("s1", second, second) == 0
@@ -0,0 +1,60 @@
+import asyncio
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+import run_tiketa
+from db.catalogue import MovieEntry, catalogue
+
+
+class RecordingCache:
+    def __init__(self):
+        self.puts = []
+
+    def get(self, text, context):
+        return None
+
+    def put(self, text, context, args):
+        self.puts.append((text, context, args))
+
+
+def test_combined_extraction_is_not_cached(monkeypatch):
+    cache = RecordingCache()
+    monkeypatch.setattr(run_tiketa, "_classifier_cache", cache)
+    state = {"messages": [HumanMessage(content="yang itu")], "current_question": None}
+    response = AIMessage(
+        content="",
+        tool_calls=[
+            {"name": "extract_intent_and_entities", "args": {"intent": "booking", "movie_title": "Spirited Away"}, "id": "c1"}
+        ],
+    )
+    updates = run_tiketa._classify_from_combined(state, response)
+    assert updates["intent"] == "booking"
+    assert updates["classifier_path"] == "llm:combined"
+    assert cache.puts == []
+
+
+def test_classifier_only_extraction_is_cached(monkeypatch):
+    cache = RecordingCache()
+    monkeypatch.setattr(run_tiketa, "_classifier_cache", cache)
+    state = {"messages": [HumanMessage(content="film horor apa aja")], "current_question": None}
+    response = AIMessage(
+        content="", tool_calls=[{"name": "extract_intent_and_entities", "args": {"intent": "browsing"}, "id": "c1"}]
+    )
+    run_tiketa._classify_from_response(state, response)
+    assert [text for text, *_ in cache.puts] == ["film horor apa aja"]
+
+
+def test_async_templated_reply_uses_async_catalogue(monkeypatch):
+    async def amovie(movie_id):
+        return MovieEntry(movie_id, f"Film {movie_id}", None)
+
+    def blocking(movie_id):
+        raise AssertionError("lookup sync dipanggil dari jalur async")
+
+    monkeypatch.setenv("TIKETA_LOW_LATENCY", "1")
+    monkeypatch.setattr(catalogue, "amovie", amovie)
+    monkeypatch.setattr(catalogue, "movie", blocking)
+    calls = [("get_showtimes", {"movie_id": 1}, "c1", None), ("get_showtimes", {"movie_id": 2}, "c2", None)]
+    outputs = [{"message": "19:00"}, {"message": "21:30"}]
+    reply = asyncio.run(run_tiketa._atemplated_reply(calls, outputs))
+    assert reply.content == "Film 1\n19:00\n\nFilm 2\n21:30"
@@ -0,0 +1,57 @@
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from agent.context import build_context
+
+
+def _turns(count, tool_output="ok"):
+    messages = []
+    for turn in range(1, count + 1):
+        messages += [
+            HumanMessage(content=f"pertanyaan {turn}"),
+            AIMessage(content="", tool_calls=[{"name": "search_movies", "args": {}, "id": f"c{turn}"}]),
+            ToolMessage(content=tool_output, name="search_movies", tool_call_id=f"c{turn}"),
+            AIMessage(content=f"jawaban {turn}"),
+        ]
+    return messages
+
+
+def test_turns_outside_the_window_roll_into_the_summary():
+    state = {"messages": _turns(3), "movie_title": "Interstellar"}
+    context = build_context(state, token_budget=10_000, window_turns=2)
+    assert context.summarized_count == 4
+    assert context.summary == "- Pengguna: pertanyaan 1 [tool: search_movies] | Asisten: jawaban 1"
+    assert isinstance(context.messages[0], SystemMessage)
+    assert "Film: Interstellar" in context.messages[0].content
+    assert context.messages[1].content == "pertanyaan 2"
+
+    # Giliran berikutnya hanya meringkas giliran yang baru keluar dari window.
+    state = {**state, "messages": _turns(4), "conversation_summary": context.summary, "summarized_message_count": 4}
+    context = build_context(state, token_budget=10_000, window_turns=2)
+    assert context.summarized_count == 8
+    assert context.summary.splitlines() == [
+        "- Pengguna: pertanyaan 1 [tool: search_movies] | Asisten: jawaban 1",
+        "- Pengguna: pertanyaan 2 [tool: search_movies] | Asisten: jawaban 2",
+    ]
+
+
+def test_token_budget_folds_old_turns_and_clips_old_tool_output():
+    state = {"messages": _turns(3, tool_output="x" * 2000)}
+    unbounded = build_context(state, token_budget=100_000, window_turns=10)
+    assert unbounded.summarized_count == 0
+
+    context = build_context(state, token_budget=700, window_turns=10)
+    assert context.estimated_tokens <= 700
+    assert 0 < context.summarized_count < len(state["messages"])
+    assert context.summarized_count % 4 == 0
+    tool_messages = [m for m in context.messages if isinstance(m, ToolMessage)]
+    # Output tool giliran terakhir tetap utuh, yang lebih lama dipotong.
+    assert len(tool_messages[-1].content) == 2000
+    assert all(len(m.content) <= 300 for m in tool_messages[:-1])
+
+
+def test_latest_turn_is_sent_even_when_it_exceeds_the_budget():
+    state = {"messages": _turns(1, tool_output="x" * 4000)}
+    context = build_context(state, token_budget=100, window_turns=4)
+    assert context.summarized_count == 0
+    assert context.estimated_tokens > 100
+    assert context.messages[-1].content == "jawaban 1"
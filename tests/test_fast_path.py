@@ -0,0 +1,69 @@
+import pytest
+from langchain_core.messages import HumanMessage
+
+import agent.fast_path
+import run_tiketa
+from agent.fast_path import detect_confirmation, fast_classify
+from db.catalogue import Catalogue
+
+
+@pytest.fixture
+def booking_state(engine, monkeypatch):
+    monkeypatch.setattr(agent.fast_path, "catalogue", Catalogue(bind=engine))
+    return {"intent": "booking", "candidate_movie_ids": [1, 2, 3], "available_showtime_ids": [1]}
+
+
+@pytest.mark.parametrize(
+    "question, text, path, updates",
+    [
+        ("ask_confirmation", "ya", "confirmation", {"intent": "booking"}),
+        ("ask_confirmation", "Oke!", "confirmation", {"intent": "booking"}),
+        ("ask_confirmation", "  ya. ", "confirmation", {"intent": "booking"}),
+        ("ask_confirmation", "tidak", "confirmation", {"intent": "booking"}),
+        ("ask_confirmation", "Gak!", "confirmation", {"intent": "booking"}),
+        ("ask_seats", "D7, D8", "seats", {"selected_seats": ["D7", "D8"]}),
+        ("ask_movie", "yang kedua", "movie", {"current_movie_id": 2}),
+        ("ask_movie", "3", "movie", {"current_movie_id": 3}),
+        ("ask_movie", "interstellar", "movie", {"current_movie_id": 3}),
+        ("ask_showtime", "jam 7 malam", "showtime", {"current_showtime_id": 1}),
+        ("ask_name", "atas nama budi santoso", "name", {"user_name": "Budi Santoso"}),
+    ],
+)
+def test_replies_explained_by_the_question_skip_the_llm(booking_state, question, text, path, updates):
+    result = fast_classify(text, {**booking_state, "current_question": question})
+    assert result is not None and result.path == path
+    assert updates.items() <= result.updates.items()
+
+
+@pytest.mark.parametrize(
+    "question, text",
+    [
+        (None, "ya"),
+        ("ask_confirmation", "halo"),
+        ("ask_confirmation", "ya tapi ganti kursi"),
+        ("ask_confirmation", "?!"),
+        ("ask_seats", "halo, selamat malam"),
+        ("ask_seats", "D7 dan kursi paling depan"),
+        ("ask_movie", "halo"),
+        ("ask_movie", "film yang ke 9"),
+        ("ask_movie", "ada film horor yang bagus nggak ya"),
+        ("ask_showtime", "7"),
+        ("ask_showtime", "yang paling malam dong tapi besok"),
+        ("ask_name", "namanya nanti aja"),
+    ],
+)
+def test_near_misses_fall_through_to_the_llm(booking_state, question, text):
+    assert fast_classify(text, {**booking_state, "current_question": question}) is None
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [("ya", True), ("Oke!", True), ("ya.", True), ("IYA ", True), ("tidak.", False), ("Nanti!", False), ("ya dong", None)],
+)
+def test_router_reads_confirmations_like_the_fast_path(booking_state, text, expected):
+    assert detect_confirmation(text) is expected
+    state = {**booking_state, "current_question": "ask_confirmation", "messages": [HumanMessage(content=text)]}
+    fast = fast_classify(text, state)
+    assert (fast is not None) == (expected is not None)
+    route = run_tiketa.main_router(state)
+    assert route == {True: "execute_booking", False: "cancel_booking", None: "confirm_booking"}[expected]
@@ -0,0 +1,48 @@
+from typing import TypedDict
+
+from langgraph.graph import END, START, StateGraph
+
+import run_tiketa
+from agent.graph_render import render_graph
+from agent.workflow import compile_ticket_agent_workflow
+
+
+def _node(state):
+    return {}
+
+
+def _workflow():
+    nodes = dict.fromkeys(
+        [
+            "classify_intent",
+            "browsing_agent",
+            "find_movie",
+            "find_showtime",
+            "select_seats",
+            "confirm_booking",
+            "execute_booking",
+            "cancel_booking",
+            "final_response",
+        ],
+        _node,
+    )
+    return compile_ticket_agent_workflow(state_type=run_tiketa.TicketAgentState, router=lambda state: "find_movie", **nodes)
+
+
+def test_render_is_skipped_until_the_topology_changes_or_forced(tmp_path):
+    output = str(tmp_path / "workflow_graph.mmd")
+    app = _workflow()
+    assert render_graph(app, output=output) is True
+    assert "cancel_booking" in open(output, encoding="utf-8").read()
+
+    assert render_graph(_workflow(), output=output) is False
+    assert render_graph(app, output=output, force=True) is True
+
+    class State(TypedDict):
+        intent: str
+
+    builder = StateGraph(State)
+    builder.add_node("classify_intent", _node)
+    builder.add_edge(START, "classify_intent")
+    builder.add_edge("classify_intent", END)
+    assert render_graph(builder.compile(), output=output) is True
@@ -0,0 +1,37 @@
+from agent.llm_cache import ClassifierCache, MemoryBackend, SqliteBackend
+
+CONTEXT = {"current_question": "ask_movie"}
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = ClassifierCache(ttl_seconds=60, clock=clock)
+    cache.put("Film horor apa aja?", CONTEXT, {"intent": "browsing"})
+    clock.advance(59)
+    assert cache.get("film horor apa aja", CONTEXT) == {"intent": "browsing"}
+    assert cache.get("film horor apa aja", {"current_question": None}) is None
+    clock.advance(2)
+    assert cache.get("film horor apa aja", CONTEXT) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expired"], stats["size"]) == (1, 2, 1, 0)
+
+
+def test_least_recently_used_entry_is_evicted_at_maxsize(clock):
+    cache = ClassifierCache(MemoryBackend(max_entries=2), clock=clock)
+    cache.put("a", CONTEXT, 1)
+    cache.put("b", CONTEXT, 2)
+    assert cache.get("a", CONTEXT) == 1
+    cache.put("c", CONTEXT, 3)
+    assert cache.get("b", CONTEXT) is None
+    assert (cache.get("a", CONTEXT), cache.get("c", CONTEXT)) == (1, 3)
+    assert cache.stats()["evicted"] == 1
+    assert cache.stats()["size"] == 2
+
+
+def test_sqlite_backend_survives_a_new_instance(tmp_path, clock):
+    path = str(tmp_path / "classifier.db")
+    ClassifierCache(SqliteBackend(path), clock=clock).put("yang kedua", CONTEXT, {"intent": "answering_question"})
+    reopened = ClassifierCache(SqliteBackend(path), ttl_seconds=60, clock=clock)
+    assert reopened.get("Yang kedua!", CONTEXT) == {"intent": "answering_question"}
+    clock.advance(61)
+    assert reopened.get("yang kedua", CONTEXT) is None
+    assert len(reopened.backend) == 0
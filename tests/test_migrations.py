@@ -0,0 +1,37 @@
+from sqlalchemy import create_engine, inspect, select, text
+
+from db.migrations import applied_migrations, migrate
+from db.schema import bookings_table, showtimes_table
+
+OLD_SCHEMA = [
+    "CREATE TABLE movies (id INTEGER PRIMARY KEY, title VARCHAR(255) NOT NULL, description TEXT, "
+    "studio_number INTEGER NOT NULL UNIQUE, release_date DATE, created_at DATETIME)",
+    "CREATE TABLE showtimes (id INTEGER PRIMARY KEY, movie_id INTEGER NOT NULL REFERENCES movies(id), "
+    "time DATETIME NOT NULL, created_at DATETIME)",
+    "CREATE TABLE bookings (id INTEGER PRIMARY KEY, user_name VARCHAR(255) NOT NULL, seat VARCHAR(10) NOT NULL, "
+    "showtime_id INTEGER NOT NULL REFERENCES showtimes(id), created_at DATETIME, "
+    "CONSTRAINT uq_booking_showtime_seat UNIQUE (showtime_id, seat))",
+    "INSERT INTO movies (id, title, studio_number) VALUES (1, 'Spirited Away', 1)",
+    "INSERT INTO showtimes (id, movie_id, time) VALUES (1, 1, '2026-10-16 19:00:00')",
+    "INSERT INTO bookings (user_name, seat, showtime_id) VALUES ('Budi', 'A1', 1)",
+]
+
+
+def test_migrate_upgrades_a_database_built_from_the_old_schema(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        for statement in OLD_SCHEMA:
+            conn.execute(text(statement))
+
+    assert migrate(engine) == ["0001_query_indexes", "0002_rds_column_names"]
+    assert {column["name"] for column in inspect(engine).get_columns("bookings")} >= {"user", "seat"}
+    with engine.connect() as conn:
+        assert conn.execute(select(bookings_table.c.user_name)).scalar() == "Budi"
+        assert conn.execute(select(showtimes_table.c.is_archived)).scalar() is False
+    assert migrate(engine) == []
+    engine.dispose()
+
+
+def test_migrate_on_current_schema_only_records_migrations(engine):
+    assert migrate(engine) == ["0001_query_indexes", "0002_rds_column_names"]
+    assert applied_migrations(engine) == ["0001_query_indexes", "0002_rds_column_names"]
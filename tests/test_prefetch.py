@@ -0,0 +1,57 @@
+import run_tiketa
+from agent.prefetch import Prefetcher
+
+
+class RecordingPrefetcher(Prefetcher):
+    def __init__(self):
+        super().__init__()
+        self.scheduled = []
+
+    def schedule(self, session_id, kind, key, fn):
+        self.scheduled.append((kind, key))
+
+
+def test_entries_expire_after_the_ttl(clock):
+    prefetcher = Prefetcher(ttl=30, clock=clock)
+    prefetcher.schedule("s1", "get_showtimes", 1, lambda: {"showtimes": [1]})
+    assert prefetcher.get("s1", "get_showtimes", 1) == {"showtimes": [1]}
+    assert prefetcher.get("s2", "get_showtimes", 1) is None
+    clock.advance(31)
+    assert prefetcher.get("s1", "get_showtimes", 1) is None
+    stats = prefetcher.stats()
+    assert (stats["scheduled"], stats["hits"], stats["misses"]) == (1, 1, 2)
+
+
+def test_failed_prefetch_falls_back_to_none(clock):
+    prefetcher = Prefetcher(clock=clock)
+
+    def fail():
+        raise RuntimeError("db down")
+
+    prefetcher.schedule("s1", "get_showtimes", 1, fail)
+    assert prefetcher.get("s1", "get_showtimes", 1) is None
+    assert prefetcher.stats()["misses"] == 1
+
+
+def test_booking_end_discards_the_session_prefetches(clock, monkeypatch):
+    prefetcher = Prefetcher(clock=clock)
+    monkeypatch.setattr(run_tiketa, "_prefetcher", prefetcher)
+    monkeypatch.setattr(run_tiketa, "release_seat_holds", lambda session_id: None)
+    prefetcher.schedule("s1", "get_showtimes", 1, lambda: "s1")
+    prefetcher.schedule("s2", "get_showtimes", 1, lambda: "s2")
+    run_tiketa._end_booking("s1")
+    assert prefetcher.get("s1", "get_showtimes", 1) is None
+    assert prefetcher.get("s2", "get_showtimes", 1) == "s2"
+    assert prefetcher.stats()["sessions"] == 1
+
+
+def test_prefetch_fanout_is_capped(monkeypatch):
+    prefetcher = RecordingPrefetcher()
+    monkeypatch.setattr(run_tiketa, "_prefetcher", prefetcher)
+    run_tiketa._prefetch_next_step("s1", {"candidate_movie_ids": list(range(1, 9))})
+    assert prefetcher.scheduled == [("get_showtimes", movie_id) for movie_id in range(1, run_tiketa.PREFETCH_FANOUT + 1)]
+
+    prefetcher.scheduled.clear()
+    run_tiketa._prefetch_next_step("s1", {"current_movie_id": 7, "available_showtime_ids": list(range(10, 20))})
+    assert prefetcher.scheduled[0] == ("get_showtimes", 7)
+    assert [key for kind, key in prefetcher.scheduled if kind == "seat_occupancy"] == list(range(10, 15))
@@ -0,0 +1,35 @@
+import pytest
+from sqlalchemy import func, select
+
+import db.engine
+import tools.bookings
+from db.catalogue import Catalogue
+from db.query_plan import FULL_SCAN, capture_statements, explain
+from db.schema import bookings_table
+from db.search_index import MovieSearchIndex
+from tools.seat_index import seat_index
+
+
+@pytest.fixture
+def audit_db(engine, monkeypatch):
+    monkeypatch.setattr(db.engine, "_engine", engine)
+    monkeypatch.setattr(tools.bookings, "catalogue", Catalogue(bind=engine))
+    # load_database membangun indeks pencarian saat start; query build-nya memang membaca semua film.
+    index = MovieSearchIndex(bind=engine)
+    index.rebuild()
+    monkeypatch.setattr(tools.bookings, "movie_search_index", index)
+    seat_index.invalidate()
+    yield engine
+    seat_index.invalidate()
+
+
+def test_booking_tool_queries_never_scan_a_whole_table(audit_db):
+    statements = capture_statements()
+    assert any("FROM bookings" in statement for statement, _ in statements)
+    for statement, parameters in statements:
+        plan = explain(statement, parameters)
+        assert plan
+        assert not [line for line in plan if FULL_SCAN["sqlite"].search(line)], (statement, plan)
+    # Insert booking audit di-rollback, jadi database tetap kosong.
+    with audit_db.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(bookings_table)).scalar() == 0
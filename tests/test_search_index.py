@@ -0,0 +1,85 @@
+from sqlalchemy import insert
+
+from db.catalogue import catalogue
+from db.schema import movie_genres_table, movies_table
+from db.search_index import MovieSearchIndex
+
+
+def _titles(results):
+    return [result["title"] for result in results]
+
+
+def test_bm25_ranks_title_matches_first(engine):
+    index = MovieSearchIndex(bind=engine)
+    assert _titles(index.search("titan"))[0] == "Attack on Titan: Requiem"
+    assert _titles(index.search("spirit world")) == ["Spirited Away"]
+
+
+def test_prefix_and_genre_filter(engine):
+    index = MovieSearchIndex(bind=engine)
+    assert _titles(index.search("interstel")) == ["Interstellar"]
+    assert _titles(index.search(genre_name="anim")) == ["Spirited Away", "Attack on Titan: Requiem"]
+    assert index.search("wormhole", genre_name="animation") == []
+
+
+def test_substring_fallback_when_no_term_matches(engine):
+    index = MovieSearchIndex(bind=engine)
+    assert _titles(index.search("pirit")) == ["Spirited Away"]
+
+
+def test_catalogue_change_triggers_rebuild(engine):
+    index = MovieSearchIndex(bind=engine)
+    assert index.search("gundam") == []
+    with engine.begin() as conn:
+        conn.execute(insert(movies_table).values(id=4, title="Gundam Seed", studio_number=4))
+    assert index.search("gundam") == []
+    catalogue.invalidate_movies()
+    assert index.is_stale
+    assert _titles(index.search("gundam")) == ["Gundam Seed"]
+
+
+def test_title_field_ignores_description_and_genre_words(engine):
+    index = MovieSearchIndex(bind=engine)
+    assert _titles(index.search("wormhole")) == ["Interstellar"]
+    assert index.search("wormhole", field="title") == []
+    assert index.search("action", field="title") == []
+    assert _titles(index.search("titan", field="title")) == ["Attack on Titan: Requiem"]
+    assert _titles(index.search("interstel", field="title")) == ["Interstellar"]
+
+
+def test_description_matches_rank_after_title_matches(engine):
+    with engine.begin() as conn:
+        conn.execute(insert(movies_table).values(id=4, title="Wormhole", studio_number=4))
+    index = MovieSearchIndex(bind=engine)
+    assert _titles(index.search("wormhole", boost_field="title")) == ["Wormhole", "Interstellar"]
+    assert _titles(index.search("spirits", boost_field="title")) == ["Spirited Away"]
+
+
+def test_genre_only_search_is_ranked(engine):
+    with engine.begin() as conn:
+        conn.execute(insert(movies_table).values(id=4, title="Up", studio_number=4))
+        conn.execute(insert(movie_genres_table).values(movie_id=4, genre_id=2))
+    index = MovieSearchIndex(bind=engine)
+    results = index.search(genre_name="animation")
+    assert _titles(results) == ["Up", "Spirited Away", "Attack on Titan: Requiem"]
+    assert results[0]["score"] > 0
+    assert _titles(index.search(genre_name="nima")) == ["Spirited Away", "Attack on Titan: Requiem", "Up"]
+
+
+def test_search_movies_title_matches_titles_only_and_query_matches_everything(engine, monkeypatch):
+    import tools.bookings
+    from db.catalogue import Catalogue
+
+    with engine.begin() as conn:
+        conn.execute(
+            insert(movies_table).values(id=4, title="Totoro", description="A spirited forest titan.", studio_number=4)
+        )
+    monkeypatch.setattr(tools.bookings, "catalogue", Catalogue(bind=engine))
+    monkeypatch.setattr(tools.bookings, "movie_search_index", MovieSearchIndex(bind=engine))
+    # Judul parsial tetap menghasilkan tepat satu film, walau katanya ada di deskripsi film lain.
+    assert _titles(tools.bookings.search_movies.invoke({"title": "spirit"})["movies"]) == ["Spirited Away"]
+    assert _titles(tools.bookings.search_movies.invoke({"title": "titan"})["movies"]) == ["Attack on Titan: Requiem"]
+    assert tools.bookings.search_movies.invoke({"title": "action"})["movies"] == []
+    assert _titles(tools.bookings.search_movies.invoke({"query": "wormhole"})["movies"]) == ["Interstellar"]
+    assert _titles(tools.bookings.search_movies.invoke({"query": "titan"})["movies"]) == ["Attack on Titan: Requiem", "Totoro"]
+    assert len(tools.bookings.search_movies.invoke({"query": "action"})["movies"]) == 1
@@ -0,0 +1,50 @@
+import pytest
+
+from tools.seat_holds import SeatHoldRegistry
+from tools.seat_index import seats_to_mask
+
+
+def test_hold_conflicts_are_all_or_nothing(clock):
+    holds = SeatHoldRegistry(ttl_seconds=60, clock=clock)
+    assert holds.hold(1, ["A1", "A2"], "s1") == []
+    assert holds.hold(1, ["A2", "A3"], "s2") == ["A2"]
+    assert holds.conflicts(1, ["A1", "A2", "A3"], "s2") == ["A1", "A2"]
+    assert holds.held_by_others(1, "s1") == 0
+
+
+def test_new_hold_replaces_previous_one(clock):
+    holds = SeatHoldRegistry(ttl_seconds=60, clock=clock)
+    holds.hold(1, ["A1"], "s1")
+    holds.hold(2, ["B1"], "s1")
+    assert holds.held_by_others(1) == 0
+    assert holds.held_by_others(2) == seats_to_mask(["B1"])
+
+
+def test_holds_expire_and_refreshed_holds_survive_stale_deadlines(clock):
+    holds = SeatHoldRegistry(ttl_seconds=10, clock=clock)
+    holds.hold(1, ["A1"], "s1")
+    clock.advance(8)
+    holds.hold(1, ["A1"], "s1")
+    clock.advance(5)
+    assert holds.held_by_others(1) == seats_to_mask(["A1"])
+    clock.advance(5)
+    assert holds.held_by_others(1) == 0
+    assert holds.hold(1, ["A1"], "s2") == []
+
+
+def test_release_frees_every_showtime_of_a_session(clock):
+    holds = SeatHoldRegistry(clock=clock)
+    holds.hold(1, ["A1", "A2"], "s1")
+    holds.release("s1")
+    assert holds.held_by_others(1) == 0
+    assert holds._session_masks == {}
+
+
+@pytest.mark.parametrize("seats", [[], ["A1", "Z99"]])
+def test_hold_rejects_empty_or_unknown_seats(clock, seats):
+    holds = SeatHoldRegistry(clock=clock)
+    holds.hold(1, ["A1"], "s1")
+    with pytest.raises(ValueError):
+        holds.hold(1, seats, "s1")
+    # Hold lama tidak tersentuh oleh permintaan yang ditolak.
+    assert holds.held_by_others(1) == seats_to_mask(["A1"])
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+from sqlalchemy import delete, insert
+
+import tools.bookings
+from db.schema import bookings_table
+from tools.bookings import MAX_SEATS_PER_BOOKING, find_adjacent_seats
+from tools.seat_holds import SeatHoldRegistry
+from tools.seat_index import ALL_SEATS_MASK, SeatOccupancyIndex, best_runs, mask_to_seats, seats_to_mask
+
+
+def _book(engine, showtime_id, *seats):
+    with engine.begin() as conn:
+        conn.execute(
+            insert(bookings_table),
+            [{"user_name": "Budi", "seat": seat, "showtime_id": showtime_id} for seat in seats],
+        )
+
+
+def test_mask_round_trip_ignores_unknown_codes():
+    mask = seats_to_mask(["A1", "E5", "Z99"])
+    assert mask.bit_count() == 2
+    assert mask_to_seats(mask) == ["A1", "E5"]
+
+
+def test_best_runs_skip_occupied_seats():
+    runs = best_runs(0, 2, top_k=1)
+    assert len(runs) == 1 and len(runs[0]) == 2
+    blocked = best_runs(seats_to_mask(runs[0]), 2, top_k=3)
+    assert runs[0] not in blocked
+    assert best_runs(ALL_SEATS_MASK, 2) == []
+
+
+def test_occupied_loads_bookings_and_marks_commits(engine):
+    _book(engine, 1, "A1", "A2")
+    index = SeatOccupancyIndex(bind=engine)
+    assert index.taken(1, ["A1", "A3"]) == ["A1"]
+    index.mark_booked(1, ["A3"])
+    assert not index.is_available(1, ["A3"])
+    assert index.seats_left(1) == ALL_SEATS_MASK.bit_count() - 3
+
+
+def test_commit_during_load_is_merged(engine):
+    index = SeatOccupancyIndex(bind=engine)
+    token = index._begin_load(1)
+    index.mark_booked(1, ["B2"])
+    assert index._finish_load(1, seats_to_mask(["A1"]), token) == seats_to_mask(["A1", "B2"])
+    assert index.taken(1, ["A1", "B2"]) == ["A1", "B2"]
+
+
+def test_invalidate_clears_pending_and_discards_older_loads(engine):
+    index = SeatOccupancyIndex(bind=engine)
+    token = index._begin_load(1)
+    index.mark_booked(1, ["C3"])
+    index.invalidate(1)
+    assert index._pending == {}
+    index._finish_load(1, seats_to_mask(["C3"]), token)
+    # Load yang dimulai sebelum invalidate tidak dipasang; bacaan berikutnya memuat ulang.
+    assert index.occupied(1) == 0
+
+
+def test_ttl_reloads_rows_deleted_elsewhere(engine, clock):
+    _book(engine, 1, "D4")
+    index = SeatOccupancyIndex(bind=engine, ttl=5.0, clock=clock)
+    assert index.taken(1, ["D4"]) == ["D4"]
+    with engine.begin() as conn:
+        conn.execute(delete(bookings_table))
+    assert index.taken(1, ["D4"]) == ["D4"]
+    clock.advance(5)
+    assert index.taken(1, ["D4"]) == []
+
+
+def test_ttl_may_be_resolved_lazily(engine):
+    index = SeatOccupancyIndex(bind=engine, ttl=lambda: 2.5)
+    assert index.ttl == 2.5
+
+
+@pytest.fixture
+def adjacent_tool(engine, clock, monkeypatch):
+    """``find_adjacent_seats`` over the conftest database with private bitmap and hold registries."""
+    index = SeatOccupancyIndex(bind=engine)
+    holds = SeatHoldRegistry(clock=clock)
+    monkeypatch.setattr(tools.bookings, "seat_index", index)
+    monkeypatch.setattr(tools.bookings, "seat_holds", holds)
+    return index, holds
+
+
+def _seats(result):
+    return {seat for run in result["options"] for seat in run}
+
+
+def test_adjacent_seats_reject_more_than_one_booking(adjacent_tool):
+    result = find_adjacent_seats.func(showtime_id=1, count=MAX_SEATS_PER_BOOKING + 1)
+    assert result["options"] == []
+    assert f"maksimal pemesanan sekaligus adalah {MAX_SEATS_PER_BOOKING}" in result["message"]
+    assert len(find_adjacent_seats.func(showtime_id=1, count=MAX_SEATS_PER_BOOKING)["options"]) == 3
+
+
+def test_adjacent_seats_skip_seats_held_by_another_session(adjacent_tool):
+    _, holds = adjacent_tool
+    best = find_adjacent_seats.func(showtime_id=1, count=2, top_k=1)["options"][0]
+    assert holds.hold(1, best, "s2") == []
+
+    result = find_adjacent_seats.func(showtime_id=1, count=2, session_id="s1")
+    assert result["options"] and not _seats(result) & set(best)
+    # Pemegang hold sendiri tetap ditawari kursinya.
+    assert find_adjacent_seats.func(showtime_id=1, count=2, top_k=1, session_id="s2")["options"] == [best]
+
+
+@pytest.mark.parametrize("top_k, expected", [(50, 10), (-5, 1), ("2", 2), (None, 3)])
+def test_adjacent_seats_clamp_top_k(adjacent_tool, top_k, expected):
+    assert len(find_adjacent_seats.func(showtime_id=1, count=2, top_k=top_k)["options"]) == expected
+
+
+def test_async_adjacent_seats_match_the_sync_tool(engine, adjacent_tool):
+    index, _ = adjacent_tool
+    _book(engine, 1, *find_adjacent_seats.func(showtime_id=1, count=3, top_k=1)["options"][0])
+    # Bitmap dimuat lewat engine sync; varian async membaca cache yang sama.
+    expected = find_adjacent_seats.func(showtime_id=1, count=3)
+    result = asyncio.run(find_adjacent_seats.coroutine(showtime_id=1, count=3))
+    assert result == expected
+    assert not _seats(result) & set(mask_to_seats(index.occupied(1)))
@@ -0,0 +1,71 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.pool import StaticPool
+
+import db.engine
+from data.movies import SAMPLE_MOVIES
+from db.catalogue import catalogue
+from db.schema import bookings_table, genres_table, movie_genres_table, movies_table, showtimes_table
+from db.seed import SHOWTIME_SLOTS, seed_database
+from db.synthetic import SyntheticConfig, generate
+
+TABLES = (genres_table, movies_table, movie_genres_table, showtimes_table, bookings_table)
+
+
+@pytest.fixture(autouse=True)
+def _reset_catalogue():
+    # seed_database membangun indeks pencarian global atas database tes; tandai basi sesudahnya.
+    yield
+    catalogue.clear()
+
+
+def _count(conn, table):
+    return conn.execute(select(func.count()).select_from(table)).scalar()
+
+
+def _dump(engine):
+    with engine.connect() as conn:
+        return {table.name: [tuple(row) for row in conn.execute(select(table).order_by(*table.primary_key))] for table in TABLES}
+
+
+def _synthetic(path, seed=7):
+    engine = create_engine(f"sqlite:///{path}")
+    config = SyntheticConfig(movies=20, showtimes_per_movie=3, seed=seed, start_date=date(2026, 10, 16))
+    return engine, generate(engine, config)
+
+
+def test_seed_database_inserts_every_sample_row_once(monkeypatch):
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    monkeypatch.setattr(db.engine, "_engine", engine)
+    seed_database(today=date(2026, 10, 16))
+    with engine.connect() as conn:
+        assert _count(conn, movies_table) == len(SAMPLE_MOVIES)
+        assert _count(conn, showtimes_table) == len(SAMPLE_MOVIES) * len(SHOWTIME_SLOTS)
+        assert _count(conn, movie_genres_table) == sum(len(movie.get("genres", [])) for movie in SAMPLE_MOVIES)
+        ids = conn.execute(select(showtimes_table.c.id)).scalars().all()
+    assert sorted(ids) == list(range(1, len(ids) + 1))
+    engine.dispose()
+
+
+def test_synthetic_counts_match_the_stored_rows(tmp_path):
+    engine, counts = _synthetic(tmp_path / "a.sqlite")
+    with engine.connect() as conn:
+        assert {table.name: _count(conn, table) for table in TABLES} == counts
+        assert counts["movies"] == 20 and counts["showtimes"] == 60
+        # Setiap kursi paling banyak satu booking per jadwal.
+        pairs = conn.execute(select(bookings_table.c.showtime_id, bookings_table.c.seat)).all()
+    assert len(pairs) == len(set(pairs)) == counts["bookings"]
+
+
+def test_synthetic_data_is_reproducible_with_unique_ids(tmp_path):
+    first, _ = _synthetic(tmp_path / "a.sqlite")
+    second, _ = _synthetic(tmp_path / "b.sqlite")
+    other, _ = _synthetic(tmp_path / "c.sqlite", seed=8)
+    data = _dump(first)
+    assert data == _dump(second)
+    assert data != _dump(other)
+    for table in (genres_table, movies_table, showtimes_table, bookings_table):
+        ids = [row[0] for row in data[table.name]]
+        assert len(ids) == len(set(ids)), table.name
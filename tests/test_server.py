@@ -0,0 +1,159 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import pytest
+
+from server import HttpError, TiketaServer, _read_request, _write_event
+
+
+class FakeWriter:
+    def __init__(self):
+        self.data = b""
+
+    def write(self, data: bytes) -> None:
+        self.data += data
+
+    async def drain(self) -> None:
+        pass
+
+
+async def _echo(session_id, message):
+    return [message]
+
+
+def _server(**kwargs):
+    return TiketaServer(_echo, **kwargs)
+
+
+def test_parse_chat_accepts_valid_body():
+    body = json.dumps({"session_id": "s1", "message": "halo"}).encode()
+    assert _server()._parse_chat(body) == ("s1", "halo")
+
+
+@pytest.mark.parametrize(
+    "body",
+    [b"bukan json", b"[]", b'{"message": "halo"}', b'{"session_id": " ", "message": "halo"}', b'{"session_id": "s1"}'],
+)
+def test_parse_chat_rejects_bad_bodies(body):
+    with pytest.raises(HttpError) as excinfo:
+        _server()._parse_chat(body)
+    assert excinfo.value.status == HTTPStatus.BAD_REQUEST
+
+
+def test_parse_chat_refuses_while_stopping():
+    server = _server()
+    server.request_shutdown()
+    with pytest.raises(HttpError) as excinfo:
+        server._parse_chat(b'{"session_id": "s1", "message": "halo"}')
+    assert excinfo.value.status == HTTPStatus.SERVICE_UNAVAILABLE
+
+
+def test_read_request_parses_line_headers_and_body():
+    async def run():
+        reader = asyncio.StreamReader()
+        body = b'{"session_id": "s1", "message": "halo"}'
+        reader.feed_data(b"POST /chat?x=1 HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body))
+        reader.feed_eof()
+        return await _read_request(reader)
+
+    assert asyncio.run(run()) == ("POST", "/chat", b'{"session_id": "s1", "message": "halo"}')
+
+
+def test_write_event_formats_sse():
+    writer = FakeWriter()
+    asyncio.run(_write_event(writer, {"type": "token", "text": "Hai"}))
+    assert writer.data == b'event: token\ndata: {"type": "token", "text": "Hai"}\n\n'
+
+
+def test_chat_returns_replies():
+    async def run():
+        return await _server()._chat(b'{"session_id": "s1", "message": "halo"}')
+
+    assert asyncio.run(run()) == (HTTPStatus.OK, {"session_id": "s1", "replies": ["halo"]})
+
+
+def test_timed_out_turn_still_finishes():
+    finished = []
+
+    async def slow(session_id, message):
+        await asyncio.sleep(0.05)
+        finished.append(message)
+        return [message]
+
+    async def run():
+        server = TiketaServer(slow, turn_timeout=0.01)
+        with pytest.raises(HttpError) as excinfo:
+            await server._chat(b'{"session_id": "s1", "message": "halo"}')
+        assert excinfo.value.status == HTTPStatus.GATEWAY_TIMEOUT
+        # Pesan berikutnya di sesi yang sama menunggu giliran sebelumnya selesai.
+        server.turn_timeout = 1.0
+        await server._chat(b'{"session_id": "s1", "message": "lagi"}')
+
+    asyncio.run(run())
+    assert finished == ["halo", "lagi"]
+
+
+def test_stream_timeout_keeps_consuming_the_turn():
+    consumed = []
+
+    async def stream(session_id, message):
+        for step in range(3):
+            await asyncio.sleep(0.02)
+            consumed.append(step)
+            yield {"type": "message", "text": str(step)}
+        yield {"type": "done", "replies": []}
+
+    async def run():
+        server = TiketaServer(_echo, turn_timeout=0.03, stream_handler=stream)
+        writer = FakeWriter()
+        await server._chat_stream(b'{"session_id": "s1", "message": "halo"}', writer)
+        await asyncio.gather(*server._turn_tasks)
+        return writer.data
+
+    data = asyncio.run(run())
+    assert b"event: error" in data
+    assert consumed == [0, 1, 2]
+
+
+def test_stream_reports_handler_errors():
+    async def broken(session_id, message):
+        yield {"type": "message", "text": "mulai"}
+        raise RuntimeError("gagal")
+
+    async def run():
+        writer = FakeWriter()
+        await TiketaServer(_echo, stream_handler=broken)._chat_stream(b'{"session_id": "s1", "message": "halo"}', writer)
+        return writer.data
+
+    data = asyncio.run(run())
+    assert b"event: message" in data and data.rstrip().endswith(b'"error": "Terjadi error pada agen."}')
+
+
+def test_request_queued_behind_a_hung_turn_gets_503():
+    ran = []
+    release = None
+
+    async def handler(session_id, message):
+        ran.append(message)
+        if message == "macet":
+            await release.wait()
+        return [message]
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        server = TiketaServer(handler, turn_timeout=0.05)
+        first = asyncio.create_task(server._chat(b'{"session_id": "s1", "message": "macet"}'))
+        await asyncio.sleep(0)
+        with pytest.raises(HttpError) as excinfo:
+            await server._chat(b'{"session_id": "s1", "message": "antre"}')
+        assert excinfo.value.status == HTTPStatus.SERVICE_UNAVAILABLE
+        with pytest.raises(HttpError):
+            await first
+        release.set()
+        await asyncio.gather(*server._turn_tasks, return_exceptions=True)
+        assert len(server._session_locks) == 0
+
+    asyncio.run(run())
+    assert ran == ["macet"]
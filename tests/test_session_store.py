@@ -0,0 +1,68 @@
+import os
+from datetime import datetime
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent.session_store import SPILL_SUFFIX, SessionStore, create_session_store
+
+
+def _state(text="halo"):
+    return {
+        "messages": [HumanMessage(content=text), AIMessage(content="Hai!")],
+        "selected_showtime_time": datetime(2026, 10, 16, 19, 0),
+        "selected_seats": ["A1", "A2"],
+    }
+
+
+def test_lru_eviction_spills_and_reloads(tmp_path, clock):
+    store = SessionStore(max_sessions=2, idle_ttl=None, spill_dir=str(tmp_path), clock=clock)
+    for session_id in ("a", "b", "c"):
+        store.put(session_id, _state(session_id))
+    assert list(store) == ["b", "c"]
+    assert "a" in store
+    restored = store.get("a")
+    assert restored["messages"][0].content == "a"
+    assert restored["selected_showtime_time"] == datetime(2026, 10, 16, 19, 0)
+    assert store.stats()["reloads"] == 1
+    # File dihapus setelah sesi kembali resident; "b" yang kini dievict.
+    assert store.stats()["spilled_sessions"] == 1
+    assert list(store) == ["c", "a"]
+
+
+def test_idle_sessions_expire(tmp_path, clock):
+    store = SessionStore(idle_ttl=60, spill_dir=str(tmp_path), clock=clock)
+    store.put("a", _state())
+    clock.advance(61)
+    store.put("b", _state())
+    assert list(store) == ["b"]
+    assert store.stats()["expired"] == 1
+    assert store.get("a")["selected_seats"] == ["A1", "A2"]
+
+
+def test_memory_budget_keeps_newest_session(clock):
+    store = SessionStore(max_bytes=1, idle_ttl=None, spill_dir=None, clock=clock)
+    store.put("a", _state())
+    store.put("b", _state())
+    assert list(store) == ["b"]
+    assert store.get("a") is None
+
+
+def test_corrupt_spill_file_is_quarantined(tmp_path, clock):
+    store = SessionStore(max_sessions=1, idle_ttl=None, spill_dir=str(tmp_path), clock=clock)
+    store.put("a", _state())
+    store.put("b", _state())
+    path = store._spill_path("a")
+    with open(path, "wb") as handle:
+        handle.write(b"bukan zlib")
+    assert store.get("a", "default") == "default"
+    assert os.path.exists(path + ".corrupt")
+    assert not os.path.exists(path)
+    assert store.stats()["corrupt"] == 1
+
+
+def test_checkpointer_disables_spilling(monkeypatch, tmp_path):
+    monkeypatch.setenv("TIKETA_SESSION_SPILL_DIR", str(tmp_path / "spill"))
+    assert create_session_store(checkpointer=object()).spill_dir is None
+    store = create_session_store()
+    assert store.spill_dir == str(tmp_path / "spill")
+    assert not any(name.endswith(SPILL_SUFFIX) for name in os.listdir(store.spill_dir))
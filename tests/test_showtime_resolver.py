@@ -0,0 +1,49 @@
+from datetime import date, datetime
+
+from agent.showtime_resolver import ShowtimeIndex, parse_time_constraint, resolve_showtime, showtime_index_for
+from agent.title_index import title_index_for
+from db.catalogue import catalogue
+
+SHOWTIMES = [
+    {"id": 10, "time": datetime(2026, 10, 16, 19, 0)},
+    {"id": 11, "time": datetime(2026, 10, 16, 21, 30)},
+    {"id": 12, "time": datetime(2026, 10, 17, 16, 0)},
+]
+
+
+def test_parse_time_constraint():
+    constraint = parse_time_constraint("jadwal kedua jam 21 hari sabtu 17 oktober")
+    assert constraint.ordinal == 1
+    assert 21 in constraint.hours
+    assert constraint.weekdays == {5}
+    assert 17 in constraint.days and 10 in constraint.months
+    assert parse_time_constraint("id 12").showtime_ids == (12,)
+
+
+def test_resolve_by_hour_ordinal_weekday_and_id():
+    assert resolve_showtime("yang jam 21", SHOWTIMES)["id"] == 11
+    assert resolve_showtime("yang pertama", SHOWTIMES)["id"] == 10
+    assert resolve_showtime("hari sabtu", SHOWTIMES)["id"] == 12
+    assert resolve_showtime("jadwal 12", SHOWTIMES)["id"] == 12
+
+
+def test_relative_day_and_part_of_day():
+    index = ShowtimeIndex(SHOWTIMES)
+    assert index.resolve(parse_time_constraint("besok sore"), today=date(2026, 10, 16))["id"] == 12
+    assert index.resolve(parse_time_constraint("malam ini"), today=date(2026, 10, 16))["id"] == 10
+
+
+def test_no_match():
+    assert resolve_showtime("terserah", SHOWTIMES) is None
+    assert resolve_showtime("jam 19", []) is None
+
+
+def test_indexes_are_shared_per_catalogue_version():
+    movies = [{"id": 1, "title": "Spirited Away"}, {"id": 2, "title": "Interstellar"}]
+    titles = title_index_for(movies)
+    showtimes = showtime_index_for(SHOWTIMES)
+    assert title_index_for([dict(movie) for movie in movies]) is titles
+    assert showtime_index_for([dict(show) for show in SHOWTIMES]) is showtimes
+    catalogue.invalidate_showtimes()
+    assert title_index_for(movies) is not titles
+    assert showtime_index_for(SHOWTIMES) is not showtimes
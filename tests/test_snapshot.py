@@ -0,0 +1,72 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.pool import StaticPool
+
+import db.engine
+import db.snapshot
+from db.engine import DatabaseConfig
+from db.schema import metadata, movies_table
+from db.snapshot import load_database, snapshot_path
+
+
+@pytest.fixture
+def memory_db(monkeypatch):
+    """Private in-memory database behind the shared engine, configured as ``memory``."""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    monkeypatch.setattr(db.engine, "_database_config", DatabaseConfig())
+    monkeypatch.setattr(db.engine, "_engine", engine)
+    yield engine
+    engine.dispose()
+
+
+class CountingSeed:
+    def __init__(self, engine):
+        self.engine = engine
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        metadata.drop_all(self.engine)
+        metadata.create_all(self.engine)
+        with self.engine.begin() as conn:
+            conn.execute(insert(movies_table).values(id=1, title="Spirited Away", studio_number=1))
+
+
+def _movie_count(engine):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(movies_table)).scalar()
+
+
+def test_snapshot_is_reused_until_its_key_changes(memory_db, tmp_path, monkeypatch):
+    seed = CountingSeed(memory_db)
+    monkeypatch.setattr(db.snapshot, "snapshot_version", lambda: "a" * 64)
+    assert load_database(seed, snapshot_dir=str(tmp_path)) == "seeded"
+    assert os.path.exists(snapshot_path(str(tmp_path), "a" * 64))
+
+    metadata.drop_all(memory_db)
+    assert load_database(seed, snapshot_dir=str(tmp_path)) == "restored"
+    assert seed.calls == 1
+    assert _movie_count(memory_db) == 1
+
+    monkeypatch.setattr(db.snapshot, "snapshot_version", lambda: "b" * 64)
+    assert load_database(seed, snapshot_dir=str(tmp_path)) == "seeded"
+    assert seed.calls == 2
+    # Snapshot versi lama dibuang setelah snapshot baru ditulis.
+    assert os.listdir(tmp_path) == [os.path.basename(snapshot_path(str(tmp_path), "b" * 64))]
+
+
+def test_corrupt_snapshot_falls_back_to_seeding(memory_db, tmp_path, monkeypatch):
+    seed = CountingSeed(memory_db)
+    monkeypatch.setattr(db.snapshot, "snapshot_version", lambda: "c" * 64)
+    path = snapshot_path(str(tmp_path), "c" * 64)
+    with open(path, "wb") as handle:
+        handle.write(b"bukan database sqlite" * 100)
+
+    assert load_database(seed, snapshot_dir=str(tmp_path)) == "seeded"
+    assert seed.calls == 1
+    assert _movie_count(memory_db) == 1
+    # Snapshot rusak ditimpa snapshot yang valid, jadi start berikutnya restore lagi.
+    assert load_database(seed, snapshot_dir=str(tmp_path)) == "restored"
+    assert seed.calls == 1
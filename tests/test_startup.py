@@ -0,0 +1,25 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, sys
+import run_tiketa, db.engine
+print(json.dumps({
+    "modules": sorted(name for name in sys.modules if name.split(".")[0] in ("langgraph", "langchain_google_genai")),
+    "engine": db.engine._engine is not None or db.engine._async_engine is not None,
+    "app": run_tiketa._tiketa_app is not None,
+}))
+"""
+
+
+def test_importing_run_tiketa_has_no_side_effects():
+    # Proses baru: modul lain di sesi pytest ini mungkin sudah memuat langgraph.
+    env = {key: value for key, value in os.environ.items() if key != "GOOGLE_API_KEY"}
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    assert json.loads(output.splitlines()[-1]) == {"modules": [], "engine": False, "app": False}
@@ -0,0 +1,151 @@
+import asyncio
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+import run_tiketa
+from agent.checkpoint import SessionCheckpointer
+from agent.session_store import SessionStore
+from agent.workflow import compile_ticket_agent_workflow
+
+MODEL_REPLY = "Ada tiga film malam ini."
+
+
+def _unused(state):
+    raise AssertionError("node ini tidak boleh dijalankan")
+
+
+def _classify(state):
+    return {"intent": "browsing" if "film" in state["messages"][-1].content else "booking"}
+
+
+def _router(state):
+    return "browsing_agent" if state["intent"] == "browsing" else "find_movie"
+
+
+def _browsing(state):
+    model = GenericFakeChatModel(messages=iter([AIMessage(content=MODEL_REPLY)]))
+    return {"messages": [model.invoke(state["messages"])]}
+
+
+async def _abrowsing(state):
+    model = GenericFakeChatModel(messages=iter([AIMessage(content=MODEL_REPLY)]))
+    return {"messages": [await model.ainvoke(state["messages"])]}
+
+
+def _find_movie(state):
+    return {"messages": [AIMessage(content="Film apa yang mau ditonton?")], "current_question": "ask_movie"}
+
+
+def _compile(browsing):
+    return compile_ticket_agent_workflow(
+        state_type=run_tiketa.TicketAgentState,
+        router=_router,
+        classify_intent=_classify,
+        browsing_agent=browsing,
+        find_movie=_find_movie,
+        find_showtime=_unused,
+        select_seats=_unused,
+        confirm_booking=_unused,
+        execute_booking=_unused,
+        cancel_booking=_unused,
+        final_response=_unused,
+    )
+
+
+@pytest.fixture
+def runtime(monkeypatch):
+    sessions = SessionStore(idle_ttl=None, spill_dir=None)
+    app = run_tiketa.TiketaApp(_compile(_browsing), _compile(_abrowsing), sessions, None)
+    monkeypatch.setattr(run_tiketa, "_tiketa_app", app)
+    return app
+
+
+def _summary(events):
+    summary = []
+    for event in events:
+        if event["type"] == "node":
+            summary.append((event["node"], event["status"]))
+        elif event["type"] == "token":
+            if summary and summary[-1][0] == "token":
+                continue
+            summary.append(("token", event["node"]))
+        else:
+            summary.append((event["type"],))
+    return summary
+
+
+async def _collect(stream):
+    return [event async for event in stream]
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_templated_reply_is_sent_whole_before_done(runtime, use_async):
+    if use_async:
+        events = asyncio.run(_collect(run_tiketa.astream_turn("s1", "mau pesan tiket")))
+    else:
+        events = list(run_tiketa.stream_turn("s1", "mau pesan tiket"))
+    assert _summary(events) == [
+        ("classify_intent", "start"),
+        ("classify_intent", "end"),
+        ("find_movie", "start"),
+        ("message",),
+        ("find_movie", "end"),
+        ("done",),
+    ]
+    assert [event["text"] for event in events if event["type"] == "message"] == ["Film apa yang mau ditonton?"]
+    assert events[-1]["replies"] == ["Film apa yang mau ditonton?"]
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_browsing_reply_streams_tokens_without_a_duplicate_message(runtime, use_async):
+    if use_async:
+        events = asyncio.run(_collect(run_tiketa.astream_turn("s1", "film apa aja")))
+    else:
+        events = list(run_tiketa.stream_turn("s1", "film apa aja"))
+    assert _summary(events) == [
+        ("classify_intent", "start"),
+        ("classify_intent", "end"),
+        ("browsing_agent", "start"),
+        ("token", "browsing_agent"),
+        ("browsing_agent", "end"),
+        ("done",),
+    ]
+    tokens = [event["text"] for event in events if event["type"] == "token"]
+    assert len(tokens) > 1 and "".join(tokens) == MODEL_REPLY
+    assert events[-1]["replies"] == [MODEL_REPLY]
+    assert runtime.sessions.get("s1")["messages"][-1].content == MODEL_REPLY
+
+
+class RecordingApp:
+    def __init__(self, app, fail=False):
+        self.app = app
+        self.fail = fail
+        self.inputs = []
+
+    def invoke(self, state, config=None):
+        self.inputs.append(state["messages"])
+        if self.fail:
+            raise RuntimeError("LLM down")
+        return self.app.invoke(state, config=config)
+
+
+def test_turns_append_to_the_stored_history_and_checkpoint_only_new_messages(monkeypatch, tmp_path):
+    checkpointer = SessionCheckpointer(str(tmp_path / "sessions.db"))
+    recording = RecordingApp(_compile(_browsing))
+    app = run_tiketa.TiketaApp(recording, None, SessionStore(idle_ttl=None, spill_dir=None), checkpointer)
+    monkeypatch.setattr(run_tiketa, "_tiketa_app", app)
+
+    assert [reply.content for reply in run_tiketa.run_turn("s1", "film apa aja")] == [MODEL_REPLY]
+    stored = app.sessions.get("s1")["messages"]
+    assert [reply.content for reply in run_tiketa.run_turn("s1", "mau pesan tiket")] == ["Film apa yang mau ditonton?"]
+    # Giliran kedua memakai list riwayat milik sesi, bukan salinannya.
+    assert recording.inputs[1] is stored
+    restored = checkpointer.load("s1")["messages"]
+    assert [m.content for m in restored] == ["film apa aja", MODEL_REPLY, "mau pesan tiket", "Film apa yang mau ditonton?"]
+
+    recording.fail = True
+    with pytest.raises(RuntimeError):
+        run_tiketa.run_turn("s1", "jam 7")
+    assert len(app.sessions.get("s1")["messages"]) == 4
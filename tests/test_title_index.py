@@ -0,0 +1,39 @@
+from agent.title_index import TitleIndex
+
+MOVIES = [
+    {"id": 1, "title": "Spirited Away"},
+    {"id": 2, "title": "Attack on Titan: Requiem"},
+    {"id": 3, "title": "Interstellar"},
+    {"id": 4, "title": "Mobile Suit Gundam"},
+]
+
+
+def test_exact_typo_acronym_and_distinctive_token():
+    index = TitleIndex((movie["id"], movie["title"]) for movie in MOVIES)
+    assert index.resolve("mau nonton spirited away dong").movie_id == 1
+    assert index.resolve("interstelar").movie_id == 3
+    assert index.resolve("aot").movie_id == 2
+    assert index.resolve("yang gundam").movie_id == 4
+
+
+def test_unrelated_or_ambiguous_text_does_not_resolve():
+    index = TitleIndex([(1, "Avengers: Endgame"), (2, "Avengers: Ultron")])
+    assert index.resolve("avengers") is None
+    assert index.resolve("halo apa kabar") is None
+
+
+
+def test_short_acronyms_and_chat_abbreviations_do_not_resolve():
+    index = TitleIndex([(1, "Dune: Part Two"), (2, "Top Gun: Maverick"), (3, "Spider-Man: Across the Spider-Verse")])
+    assert index.resolve("dpt tiket jam 7?") is None
+    assert index.resolve("tg") is None
+    assert index.resolve("sa") is None
+    assert index.search("tm") == []
+
+
+def test_acronym_needs_a_whole_word_and_little_else():
+    index = TitleIndex((movie["id"], movie["title"]) for movie in MOVIES)
+    assert index.resolve("mau nonton aot jam 7").movie_id == 2
+    assert index.resolve("aotr").movie_id == 2
+    assert index.resolve("saot") is None
+    assert index.resolve("kemarin aot seru banget katanya") is None
@@ -0,0 +1,61 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from agent import tool_runner
+
+
+class FakeTool:
+    def __init__(self, result=None, release: threading.Event = None):
+        self.result = result
+        self.release = release
+        self.threads = []
+
+    def invoke(self, args):
+        self.threads.append(threading.current_thread())
+        if self.release is not None:
+            self.release.wait(5)
+        return self.result
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="test-tool")
+    monkeypatch.setattr(tool_runner, "_executor", executor)
+    monkeypatch.setattr(tool_runner, "_workers", 2)
+    monkeypatch.setattr(tool_runner, "_abandoned", set())
+    monkeypatch.setattr(tool_runner, "_counters", {"batches": 0, "inline_batches": 0, "timeouts": 0})
+    release = threading.Event()
+    yield release
+    release.set()
+    executor.shutdown(wait=True)
+
+
+def test_hung_tool_times_out_without_losing_the_other_results(runner):
+    first, hung, last = FakeTool({"message": "a"}), FakeTool(release=runner), FakeTool({"message": "b"})
+    calls = [("get_showtimes", {}, first), ("get_showtimes", {}, hung), ("search_movies", {}, last)]
+    outputs = tool_runner.run_tool_calls(calls, timeout=0.2)
+    assert outputs[0] == {"message": "a"}
+    assert outputs[1]["error"] == "TimeoutError" and outputs[1]["success"] is False
+    assert outputs[2] == {"message": "b"}
+    assert tool_runner.stats()["abandoned_running"] == 1
+    assert tool_runner.stats()["timeouts"] == 1
+
+
+def test_batches_run_inline_while_hung_calls_hold_every_worker(runner):
+    hung = FakeTool(release=runner)
+    tool_runner.run_tool_calls([("a", {}, hung), ("b", {}, hung)], timeout=0.1)
+    assert tool_runner.stats()["abandoned_running"] == 2
+
+    first, second = FakeTool(1), FakeTool(2)
+    assert tool_runner.run_tool_calls([("a", {}, first), ("b", {}, second)]) == [1, 2]
+    assert first.threads == second.threads == [threading.current_thread()]
+    assert tool_runner.stats()["inline_batches"] == 1
+
+    runner.set()
+    deadline = time.monotonic() + 5
+    while tool_runner.stats()["abandoned_running"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert tool_runner.stats()["abandoned_running"] == 0
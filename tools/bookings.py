@@ -1,40 +1,103 @@
 import re
-from typing import Iterable, List, Sequence
+from typing import Annotated, Any, Iterable, List, Optional, Sequence
 from sqlalchemy import select, insert
 from sqlalchemy.exc import IntegrityError
-from langchain_core.tools import tool
+from langchain_core.tools import tool, InjectedToolArg
 
-from db.schema import engine, movies_table, movie_genres_table, genres_table, showtimes_table, bookings_table
-from data.seats import SEAT_MAP, ALL_VALID_SEATS
+from db.schema import get_engine, get_async_engine, showtimes_table, bookings_table
+from db.catalogue import catalogue
+from db.search_index import movie_search_index
+from data.seats import ALL_VALID_SEATS
+from tools.seat_index import seat_index, available_rows, best_runs, seats_in_mask, ALL_SEATS_MASK
+from tools.seat_holds import seat_holds
+
+# Setiap tool punya implementasi sync (``invoke``) dan async (``ainvoke``, via
+# ``tool.coroutine``). Keduanya memakai helper parsing/format yang sama di bawah,
+# hanya bagian I/O database yang berbeda.
+
+MAX_SEATS_PER_BOOKING = 5
 
 
 @tool
-def search_movies(title: str = None, genre_name: str = None, **kwargs) -> dict:
-    """Cari film berdasarkan judul atau genre dan kembalikan hasil terstruktur."""
+def search_movies(title: str = None, genre_name: str = None, limit: int = 10, query: str = None, **kwargs) -> dict:
+    """Cari film berdasarkan judul, genre, atau kata kunci bebas (query) dan kembalikan hasil terstruktur."""
+    title, genre_name, genre_id, limit = _search_args(title, genre_name, limit, kwargs)
+    if genre_id is not None:
+        genre = catalogue.genre(genre_id)
+        if genre is None:
+            # Id genre tidak dikenal: jangan diam-diam mencari tanpa filter genre.
+            return _search_result([], [])
+        genre_name = genre.name
+    results = _search_index(title, query, genre_name, limit)
+    genres = catalogue.genres(_genre_ids(results))
+    return _search_result(results, genres)
+
+
+async def _asearch_movies(
+    title: str = None, genre_name: str = None, limit: int = 10, query: str = None, **kwargs
+) -> dict:
+    # Indeks pencarian ada di memori; hanya record genre yang mungkin dibaca dari database.
+    title, genre_name, genre_id, limit = _search_args(title, genre_name, limit, kwargs)
+    if genre_id is not None:
+        genre = await catalogue.agenre(genre_id)
+        if genre is None:
+            # Id genre tidak dikenal: jangan diam-diam mencari tanpa filter genre.
+            return _search_result([], [])
+        genre_name = genre.name
+    results = _search_index(title, query, genre_name, limit)
+    genres = await catalogue.agenres(_genre_ids(results))
+    return _search_result(results, genres)
+
+
+def _search_args(title, genre_name, limit, kwargs: dict):
+    """Normalize search arguments.
+
+    A numeric ``genreId`` is returned as an id to resolve via the catalogue;
+    any other ``genreId`` value is treated as a genre name.
+    """
     title = title or kwargs.get("movie_title") or kwargs.get("movie")
-    genre_name = genre_name or kwargs.get("genre") or kwargs.get("genreId")
-    stmt = select(movies_table.c.id, movies_table.c.title, movies_table.c.description).select_from(movies_table)
-    if genre_name:
-        stmt = stmt.join(movie_genres_table).join(genres_table).where(genres_table.c.name.ilike(f"%{genre_name}%"))
+    genre_name = genre_name or kwargs.get("genre")
+    genre_id = None
+    raw_genre_id = kwargs.get("genreId") or kwargs.get("genre_id")
+    if not genre_name and raw_genre_id is not None:
+        genre_id = _coerce_int(raw_genre_id)
+        if genre_id is None:
+            genre_name = str(raw_genre_id)
+    limit = min(max(_coerce_int(limit) or 10, 1), 50)
+    return title, genre_name, genre_id, limit
+
+
+def _search_index(title: Optional[str], query: Optional[str], genre_name: Optional[str], limit: int) -> List[dict]:
     if title:
-        stmt = stmt.where(movies_table.c.title.ilike(f"%{title}%"))
-    with engine.connect() as conn:
-        results = conn.execute(stmt).fetchall()
+        # Filter judul hanya mencocokkan judul, seperti ``title ILIKE`` dulu.
+        return movie_search_index.search(title, genre_name, limit=limit, field="title")
+    # Kata kunci bebas diperingkat atas judul, genre dan deskripsi; judul yang cocok didahulukan.
+    return movie_search_index.search(query, genre_name, limit=limit, boost_field="title")
+
+
+def _genre_ids(results: Sequence[dict]) -> List[int]:
+    return list(dict.fromkeys(genre_id for item in results for genre_id in item["genre_ids"]))
+
+
+def _search_result(results: Sequence[dict], genres: Sequence[Any]) -> dict:
     if not results:
         return {
             "message": "Film tidak ditemukan. Coba cari dengan genre atau judul lain.",
             "movies": [],
         }
+    genre_names = {genre.id: genre.name for genre in genres}
     movies = [
         {
-            "id": row.id,
-            "title": row.title,
-            "description": row.description,
+            "id": item["id"],
+            "title": item["title"],
+            "description": item["description"],
+            "genres": [genre_names[genre_id] for genre_id in item["genre_ids"] if genre_id in genre_names],
         }
-        for row in results
+        for item in results
     ]
+    catalogue.add_movies(movies)
     summary_lines = [
-        f"{idx + 1}. {item['title']} — {(item['description'] or '')[:80]}..."
+        f"{idx + 1}. {item['title']}{_genre_suffix(item['genres'])} — {(item['description'] or '')[:80]}..."
         for idx, item in enumerate(movies)
     ]
     return {
@@ -47,33 +110,57 @@ def search_movies(title: str = None, genre_name: str = None, **kwargs) -> dict:
     }
 
 
+def _genre_suffix(names: Sequence[str]) -> str:
+    return f" ({', '.join(names)})" if names else ""
+
+
 @tool
 def get_showtimes(movie_id: int = None, **kwargs) -> dict:
     """Ambil jadwal tayang untuk film tertentu dalam format terstruktur."""
-    movie_id = movie_id or kwargs.get("id") or kwargs.get("film_id") or kwargs.get("movie")
-    movie_id = _coerce_int(movie_id)
+    movie_id = _showtime_movie_id(movie_id, kwargs)
     if movie_id is None:
-        return {
-            "message": "Silakan berikan film yang mau dicek jadwalnya dulu, ya.",
-            "showtimes": [],
-        }
-    stmt = select(showtimes_table.c.id, showtimes_table.c.time).where(showtimes_table.c.movie_id == movie_id)
-    with engine.connect() as conn:
-        results = conn.execute(stmt).fetchall()
+        return _missing_movie_result()
+    with get_engine().connect() as conn:
+        results = conn.execute(_showtimes_stmt(movie_id)).fetchall()
+    return _showtimes_result(movie_id, results)
+
+
+async def _aget_showtimes(movie_id: int = None, **kwargs) -> dict:
+    movie_id = _showtime_movie_id(movie_id, kwargs)
+    if movie_id is None:
+        return _missing_movie_result()
+    async with get_async_engine().connect() as conn:
+        results = (await conn.execute(_showtimes_stmt(movie_id))).fetchall()
+    return _showtimes_result(movie_id, results)
+
+
+def _showtime_movie_id(movie_id, kwargs: dict) -> int | None:
+    movie_id = movie_id or kwargs.get("id") or kwargs.get("film_id") or kwargs.get("movie")
+    return _coerce_int(movie_id)
+
+
+def _missing_movie_result() -> dict:
+    return {
+        "message": "Silakan berikan film yang mau dicek jadwalnya dulu, ya.",
+        "showtimes": [],
+    }
+
+
+def _showtimes_stmt(movie_id: int):
+    return (
+        select(showtimes_table.c.id, showtimes_table.c.time)
+        .where(showtimes_table.c.movie_id == movie_id)
+        .order_by(showtimes_table.c.time)
+    )
+
+
+def _showtimes_result(movie_id: int, results: Sequence[Any]) -> dict:
     if not results:
         return {
             "message": "Maaf, belum ada jadwal tayang untuk film ini.",
             "showtimes": [],
         }
-    showtimes = [
-        {
-            "id": row.id,
-            "movie_id": movie_id,
-            "time": row.time,
-            "time_display": row.time.strftime("%A, %d %B %Y %H:%M"),
-        }
-        for row in results
-    ]
+    showtimes = [entry.as_dict() for entry in catalogue.register_showtimes(movie_id, ((row.id, row.time) for row in results))]
     lines = [f"{idx + 1}. {item['time_display']}" for idx, item in enumerate(showtimes)]
     return {
         "message": (
@@ -86,28 +173,38 @@ def get_showtimes(movie_id: int = None, **kwargs) -> dict:
 
 
 @tool
-def get_available_seats(showtime_id: int = None, **kwargs) -> dict:
+def get_available_seats(
+    showtime_id: int = None,
+    session_id: Annotated[Optional[str], InjectedToolArg] = None,
+    **kwargs,
+) -> dict:
     """Daftar kursi yang masih tersedia untuk suatu jadwal tayang."""
-    showtime_id = showtime_id or kwargs.get("schedule_id") or kwargs.get("id")
-    showtime_id = _coerce_int(showtime_id)
+    showtime_id = _showtime_id(showtime_id, kwargs)
     if showtime_id is None:
-        return {
-            "message": "Silakan sebutkan jadwal mana yang mau dicek kursinya.",
-            "available_seats": [],
-        }
-    stmt = select(bookings_table.c.seat).where(bookings_table.c.showtime_id == showtime_id)
-    with engine.connect() as conn:
-        booked = {r.seat for r in conn.execute(stmt).fetchall()}
-    available_rows = []
-    available_flat: List[str] = []
-    for row_letter, row_seats in zip("ABCDEFGHIJKLM", SEAT_MAP):
-        if not any(row_seats):
-            continue
-        available_in_row = [s for s in row_seats if s and s not in booked]
-        if available_in_row:
-            available_rows.append(f"Baris {row_letter}: {', '.join(available_in_row)}")
-            available_flat.extend(available_in_row)
-    if not available_rows:
+        return _missing_showtime_result()
+    return _available_seats_result(showtime_id, seat_index.occupied(showtime_id), session_id)
+
+
+async def _aget_available_seats(showtime_id: int = None, session_id: Optional[str] = None, **kwargs) -> dict:
+    showtime_id = _showtime_id(showtime_id, kwargs)
+    if showtime_id is None:
+        return _missing_showtime_result()
+    return _available_seats_result(showtime_id, await seat_index.aoccupied(showtime_id), session_id)
+
+
+def _missing_showtime_result() -> dict:
+    return {
+        "message": "Silakan sebutkan jadwal mana yang mau dicek kursinya.",
+        "available_seats": [],
+    }
+
+
+def _available_seats_result(showtime_id: int, occupied: int, session_id: Optional[str]) -> dict:
+    free_mask = ALL_SEATS_MASK & ~occupied & ~seat_holds.held_by_others(showtime_id, session_id)
+    rows = available_rows(free_mask)
+    available_rows_text = [f"Baris {row_letter}: {', '.join(row_seats)}" for row_letter, row_seats in rows]
+    available_flat: List[str] = [seat for _, row_seats in rows for seat in row_seats]
+    if not available_rows_text:
         return {
             "message": "Maaf, kursi untuk jadwal ini sudah penuh.",
             "available_seats": [],
@@ -115,7 +212,7 @@ def get_available_seats(showtime_id: int = None, **kwargs) -> dict:
     return {
         "message": (
             "Kursi yang tersedia:\n"
-            + "\n".join(available_rows)
+            + "\n".join(available_rows_text)
             + "\nPilih kursi dengan menyebut kode seperti D7 atau E3."
         ),
         "available_seats": available_flat,
@@ -128,35 +225,89 @@ def book_tickets(
     showtime_id: int = None,
     seats: List[str] | Sequence[str] | str | None = None,
     user_name: str | None = None,
+    session_id: Annotated[Optional[str], InjectedToolArg] = None,
     **kwargs,
 ) -> dict:
     """Pesan kursi untuk pengguna dengan validasi kapasitas dan konflik."""
-    showtime_id = showtime_id or kwargs.get("schedule_id") or kwargs.get("id")
-    showtime_id = _coerce_int(showtime_id)
+    error, request = _booking_request(showtime_id, seats, user_name, kwargs)
+    if error:
+        return error
+    showtime_id, seats, user_name = request
+    error = _booking_conflicts(showtime_id, seats, seat_index.occupied(showtime_id), session_id)
+    if error:
+        return error
+    with get_engine().connect() as conn:
+        try:
+            with conn.begin():
+                conn.execute(insert(bookings_table), _booking_rows(showtime_id, seats, user_name))
+        except IntegrityError:
+            return _booking_integrity_error(showtime_id, seats)
+        except Exception as e:
+            return _booking_failed(e)
+    return _booking_committed(showtime_id, seats, user_name, session_id)
+
+
+async def _abook_tickets(
+    showtime_id: int = None,
+    seats: List[str] | Sequence[str] | str | None = None,
+    user_name: str | None = None,
+    session_id: Optional[str] = None,
+    **kwargs,
+) -> dict:
+    error, request = _booking_request(showtime_id, seats, user_name, kwargs)
+    if error:
+        return error
+    showtime_id, seats, user_name = request
+    error = _booking_conflicts(showtime_id, seats, await seat_index.aoccupied(showtime_id), session_id)
+    if error:
+        return error
+    # Tanpa lock: dua coroutine yang lolos cek bitmap bersamaan diputus oleh
+    # constraint uq_booking_showtime_seat, yang kalah mendapat IntegrityError.
+    try:
+        async with get_async_engine().begin() as conn:
+            await conn.execute(insert(bookings_table), _booking_rows(showtime_id, seats, user_name))
+    except IntegrityError:
+        return _booking_integrity_error(showtime_id, seats)
+    except Exception as e:
+        return _booking_failed(e)
+    return _booking_committed(showtime_id, seats, user_name, session_id)
+
+
+def _booking_request(showtime_id, seats, user_name, kwargs: dict):
+    """Normalisasi argumen booking; kembalikan (error, None) atau (None, (showtime_id, seats, user_name))."""
+    showtime_id = _showtime_id(showtime_id, kwargs)
     if showtime_id is None:
         return {
             "success": False,
             "message": "Masih belum tahu jadwal mana yang mau dibooking. Boleh ulangi?",
-        }
+        }, None
 
     user_name = user_name or kwargs.get("name") or kwargs.get("customer")
     if not user_name:
         return {
             "success": False,
             "message": "Nama pemesan wajib diisi dulu, ya.",
-        }
+        }, None
 
     seats = seats or kwargs.get("seat_codes") or kwargs.get("seat") or kwargs.get("seat_list")
     seats = _normalize_seat_list(seats)
+    error = _seat_list_error(seats)
+    if error:
+        return error, None
+    return None, (showtime_id, seats, user_name)
+
+
+def _seat_list_error(seats: List[str]) -> dict | None:
+    """Validasi daftar kursi yang sama untuk booking dan hold: tidak kosong, maks 5, ada di denah."""
     if not seats:
         return {
             "success": False,
             "message": "Daftar kursi tidak valid. Coba sebutkan lagi kursinya.",
         }
-    if len(seats) > 5:
+    if len(seats) > MAX_SEATS_PER_BOOKING:
         return {
             "success": False,
-            "message": "Maaf, maksimal pemesanan sekaligus adalah 5 kursi.",
+            "message": f"Maaf, maksimal pemesanan sekaligus adalah {MAX_SEATS_PER_BOOKING} kursi.",
         }
     invalid = [s for s in seats if s not in ALL_VALID_SEATS]
     if invalid:
@@ -164,27 +315,181 @@ def book_tickets(
             "success": False,
             "message": f"Kursi tidak valid: {', '.join(invalid)}. Coba pilih kursi lain.",
         }
-    insert_data = [{"showtime_id": showtime_id, "seat": s, "user_name": user_name} for s in seats]
-    with engine.connect() as conn:
-        try:
-            with conn.begin():
-                conn.execute(insert(bookings_table), insert_data)
-            return {
-                "success": True,
-                "message": f"Sukses! Tiket untuk {user_name} di kursi {', '.join(seats)} telah dikonfirmasi.",
-                "seats": seats,
-                "showtime_id": showtime_id,
-            }
-        except IntegrityError:
-            return {
-                "success": False,
-                "message": f"Salah satu kursi ({', '.join(seats)}) sudah terisi. Pilih kursi lain, ya.",
-            }
-        except Exception as e:
-            return {
-                "success": False,
-                "message": f"Gagal memproses pemesanan. {e}",
-            }
+    return None
+
+
+def _booking_conflicts(showtime_id: int, seats: List[str], occupied: int, session_id: Optional[str]) -> dict | None:
+    taken = seats_in_mask(occupied, seats)
+    if taken:
+        return {
+            "success": False,
+            "message": f"Kursi {', '.join(taken)} sudah terisi. Pilih kursi lain, ya.",
+        }
+    held = seat_holds.conflicts(showtime_id, seats, session_id)
+    if held:
+        return {
+            "success": False,
+            "message": f"Kursi {', '.join(held)} sedang ditahan pemesan lain. Pilih kursi lain, ya.",
+        }
+    return None
+
+
+def _booking_rows(showtime_id: int, seats: List[str], user_name: str) -> List[dict]:
+    return [{"showtime_id": showtime_id, "seat": s, "user_name": user_name} for s in seats]
+
+
+def _booking_committed(showtime_id: int, seats: List[str], user_name: str, session_id: Optional[str]) -> dict:
+    seat_index.mark_booked(showtime_id, seats)
+    if session_id:
+        seat_holds.release(session_id, showtime_id)
+    return {
+        "success": True,
+        "message": f"Sukses! Tiket untuk {user_name} di kursi {', '.join(seats)} telah dikonfirmasi.",
+        "seats": seats,
+        "showtime_id": showtime_id,
+    }
+
+
+def _booking_integrity_error(showtime_id: int, seats: List[str]) -> dict:
+    # Bitmap tertinggal dari database (mis. insert dari proses lain); muat ulang nanti.
+    seat_index.invalidate(showtime_id)
+    return {
+        "success": False,
+        "message": f"Salah satu kursi ({', '.join(seats)}) sudah terisi. Pilih kursi lain, ya.",
+    }
+
+
+def _booking_failed(error: Exception) -> dict:
+    return {
+        "success": False,
+        "message": f"Gagal memproses pemesanan. {error}",
+    }
+
+
+@tool
+def find_adjacent_seats(
+    showtime_id: int = None,
+    count: int = None,
+    top_k: int = 3,
+    session_id: Annotated[Optional[str], InjectedToolArg] = None,
+    **kwargs,
+) -> dict:
+    """Cari beberapa pilihan kursi berdampingan (N kursi sebaris, tidak terpotong lorong) yang paling dekat ke tengah studio."""
+    error, request = _adjacent_request(showtime_id, count, top_k, kwargs)
+    if error:
+        return error
+    showtime_id, count, top_k = request
+    return _adjacent_result(showtime_id, count, top_k, seat_index.occupied(showtime_id), session_id)
+
+
+async def _afind_adjacent_seats(
+    showtime_id: int = None,
+    count: int = None,
+    top_k: int = 3,
+    session_id: Optional[str] = None,
+    **kwargs,
+) -> dict:
+    error, request = _adjacent_request(showtime_id, count, top_k, kwargs)
+    if error:
+        return error
+    showtime_id, count, top_k = request
+    return _adjacent_result(showtime_id, count, top_k, await seat_index.aoccupied(showtime_id), session_id)
+
+
+def _adjacent_request(showtime_id, count, top_k, kwargs: dict):
+    showtime_id = _showtime_id(showtime_id, kwargs)
+    if showtime_id is None:
+        return {
+            "message": "Silakan sebutkan jadwal mana yang mau dicarikan kursinya.",
+            "options": [],
+        }, None
+    count = _coerce_int(count or kwargs.get("seat_count") or kwargs.get("n") or kwargs.get("jumlah"))
+    if not count or count < 1:
+        return {
+            "message": "Mau cari berapa kursi yang berdampingan?",
+            "options": [],
+        }, None
+    if count > MAX_SEATS_PER_BOOKING:
+        return {
+            "message": f"Maaf, maksimal pemesanan sekaligus adalah {MAX_SEATS_PER_BOOKING} kursi.",
+            "options": [],
+        }, None
+    top_k = min(max(_coerce_int(top_k) or 3, 1), 10)
+    return None, (showtime_id, count, top_k)
+
+
+def _adjacent_result(showtime_id: int, count: int, top_k: int, occupied: int, session_id: Optional[str]) -> dict:
+    unavailable = occupied | seat_holds.held_by_others(showtime_id, session_id)
+    options = best_runs(unavailable, count, top_k)
+    if not options:
+        return {
+            "message": f"Maaf, tidak ada {count} kursi berdampingan yang masih kosong untuk jadwal ini.",
+            "options": [],
+            "showtime_id": showtime_id,
+        }
+    lines = [f"{idx + 1}. {', '.join(run)}" for idx, run in enumerate(options)]
+    return {
+        "message": (
+            f"Pilihan {count} kursi berdampingan terbaik:\n"
+            + "\n".join(lines)
+            + "\nSebut nomor pilihan atau kode kursinya."
+        ),
+        "options": [list(run) for run in options],
+        "showtime_id": showtime_id,
+    }
+
+
+search_movies.coroutine = _asearch_movies
+get_showtimes.coroutine = _aget_showtimes
+get_available_seats.coroutine = _aget_available_seats
+book_tickets.coroutine = _abook_tickets
+find_adjacent_seats.coroutine = _afind_adjacent_seats
+
+
+def hold_seats(showtime_id: int, seats: Sequence[str], session_id: str) -> dict:
+    """Tahan kursi sementara untuk satu sesi sebelum konfirmasi pemesanan."""
+    return _hold_seats(showtime_id, seats, session_id, seat_index.occupied(showtime_id))
+
+
+async def ahold_seats(showtime_id: int, seats: Sequence[str], session_id: str) -> dict:
+    return _hold_seats(showtime_id, seats, session_id, await seat_index.aoccupied(showtime_id))
+
+
+def _hold_seats(showtime_id: int, seats: Sequence[str], session_id: str, occupied: int) -> dict:
+    seats = _normalize_seat_list(seats)
+    error = _seat_list_error(seats)
+    if error:
+        return error
+    taken = seats_in_mask(occupied, seats)
+    if taken:
+        return {
+            "success": False,
+            "message": f"Kursi {', '.join(taken)} sudah terisi. Pilih kursi lain, ya.",
+            "unavailable": taken,
+        }
+    conflicts = seat_holds.hold(showtime_id, seats, session_id)
+    if conflicts:
+        return {
+            "success": False,
+            "message": f"Kursi {', '.join(conflicts)} sedang ditahan pemesan lain. Pilih kursi lain, ya.",
+            "unavailable": conflicts,
+        }
+    return {
+        "success": True,
+        "message": f"Kursi {', '.join(seats)} ditahan sementara untuk kamu.",
+        "seats": seats,
+        "showtime_id": showtime_id,
+    }
+
+
+def release_seat_holds(session_id: str) -> None:
+    """Lepas semua kursi yang sedang ditahan oleh sesi ini."""
+    seat_holds.release(session_id)
+
+
+def _showtime_id(showtime_id, kwargs: dict) -> int | None:
+    showtime_id = showtime_id or kwargs.get("schedule_id") or kwargs.get("id")
+    return _coerce_int(showtime_id)
 
 
 def _normalize_seat_list(value: Iterable[str] | str | None) -> List[str]:
@@ -221,4 +526,4 @@ def _coerce_int(value) -> int | None:
             return int(value.strip())
         except ValueError:
             return None
-    return None
\ No newline at end of file
+    return None
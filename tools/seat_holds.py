@@ -0,0 +1,126 @@
+"""Short-lived seat holds so concurrent sessions stop racing on the same seats.
+
+A hold reserves seats for one session until it expires or is confirmed by a
+booking. Expiry is driven by a min-heap of deadlines with lazy deletion: every
+read pops only the entries whose deadline has passed, so there is no background
+timer thread and each expiry costs ``O(log n)``.
+"""
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from tools.seat_index import SEAT_BITS, mask_to_seats
+
+DEFAULT_HOLD_SECONDS = 300.0
+
+
+class SeatHoldRegistry:
+    """In-process registry of seat holds keyed by showtime and session."""
+
+    def __init__(self, ttl_seconds: float = DEFAULT_HOLD_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        # showtime_id -> seat -> (session_id, expires_at)
+        self._holds: Dict[int, Dict[str, Tuple[str, float]]] = {}
+        self._masks: Dict[int, int] = {}
+        # session_id -> showtime_id -> bitmap kursi yang ditahan sesi tersebut
+        self._session_masks: Dict[str, Dict[int, int]] = {}
+        self._deadlines: List[Tuple[float, int, int, str, str]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def hold(
+        self,
+        showtime_id: int,
+        seats: Iterable[str],
+        session_id: str,
+        ttl_seconds: Optional[float] = None,
+    ) -> List[str]:
+        """Hold ``seats`` for ``session_id``, replacing its previous holds.
+
+        Holding is all-or-nothing: the seats held by other sessions are
+        returned and nothing changes. An empty list means the hold succeeded.
+        Raises ``ValueError`` for an empty selection or codes outside the seat
+        map; use :meth:`release` to drop a session's holds.
+        """
+        seats = list(seats)
+        if not seats:
+            raise ValueError("hold() butuh minimal satu kursi; pakai release() untuk melepas.")
+        unknown = [seat for seat in seats if seat not in SEAT_BITS]
+        if unknown:
+            raise ValueError(f"Kursi tidak ada di denah: {', '.join(unknown)}")
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            held = self._holds.get(showtime_id, {})
+            conflicts = [s for s in seats if s in held and held[s][0] != session_id]
+            if conflicts:
+                return conflicts
+            self._release(session_id)
+            expires_at = now + ttl
+            held = self._holds.setdefault(showtime_id, {})
+            for seat in seats:
+                held[seat] = (session_id, expires_at)
+                bit = SEAT_BITS[seat]
+                self._masks[showtime_id] = self._masks.get(showtime_id, 0) | bit
+                per_showtime = self._session_masks.setdefault(session_id, {})
+                per_showtime[showtime_id] = per_showtime.get(showtime_id, 0) | bit
+                heapq.heappush(self._deadlines, (expires_at, next(self._seq), showtime_id, seat, session_id))
+            return []
+
+    def held_by_others(self, showtime_id: int, session_id: Optional[str] = None) -> int:
+        """Bitmap of seats in ``showtime_id`` held by sessions other than ``session_id``."""
+        with self._lock:
+            self._expire(self._clock())
+            mask = self._masks.get(showtime_id, 0)
+            if session_id is not None:
+                mask &= ~self._session_masks.get(session_id, {}).get(showtime_id, 0)
+            return mask
+
+    def conflicts(self, showtime_id: int, seats: Iterable[str], session_id: Optional[str] = None) -> List[str]:
+        """Return the seats of ``seats`` that another session is holding."""
+        others = self.held_by_others(showtime_id, session_id)
+        return [seat for seat in seats if others & SEAT_BITS.get(seat, 0)]
+
+    def release(self, session_id: str, showtime_id: Optional[int] = None) -> None:
+        with self._lock:
+            self._release(session_id, showtime_id)
+
+    def _release(self, session_id: str, showtime_id: Optional[int] = None) -> None:
+        per_showtime = self._session_masks.get(session_id, {})
+        targets = list(per_showtime) if showtime_id is None else [showtime_id]
+        for target in targets:
+            for seat in mask_to_seats(per_showtime.get(target, 0)):
+                self._drop(target, seat)
+
+    def _expire(self, now: float) -> None:
+        while self._deadlines and self._deadlines[0][0] <= now:
+            expires_at, _, showtime_id, seat, session_id = heapq.heappop(self._deadlines)
+            # Entri heap bisa basi kalau hold sudah diperbarui atau dilepas.
+            if self._holds.get(showtime_id, {}).get(seat) == (session_id, expires_at):
+                self._drop(showtime_id, seat)
+
+    def _drop(self, showtime_id: int, seat: str) -> None:
+        held = self._holds.get(showtime_id)
+        if not held or seat not in held:
+            return
+        session_id, _ = held.pop(seat)
+        bit = SEAT_BITS.get(seat, 0)
+        self._masks[showtime_id] = self._masks.get(showtime_id, 0) & ~bit
+        per_showtime = self._session_masks.get(session_id, {})
+        remaining = per_showtime.get(showtime_id, 0) & ~bit
+        if remaining:
+            per_showtime[showtime_id] = remaining
+        else:
+            per_showtime.pop(showtime_id, None)
+            if not per_showtime:
+                self._session_masks.pop(session_id, None)
+        if not held:
+            self._holds.pop(showtime_id, None)
+            self._masks.pop(showtime_id, None)
+
+
+seat_holds = SeatHoldRegistry()
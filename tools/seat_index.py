@@ -0,0 +1,289 @@
+"""In-process seat occupancy bitmaps, one per showtime.
+
+Every seat in ``SEAT_MAP`` owns a fixed bit (``row * width + column``), so the
+occupancy of a whole showtime fits in a single Python ``int``. Bitmaps are
+loaded lazily from ``bookings_table`` and patched in place after each booking
+commit, which turns availability checks into a single ``&``/``~`` operation.
+On a database other processes also write to, bitmaps are reloaded after
+``TIKETA_SEAT_INDEX_TTL`` seconds.
+"""
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from sqlalchemy import select
+
+from db.engine import get_database_config
+from db.schema import bookings_table, get_async_engine, get_engine
+from data.seats import SEAT_MAP
+
+SEAT_MAP_WIDTH = max(len(row) for row in SEAT_MAP)
+DEFAULT_TTL_SECONDS = 5.0
+
+
+def _build_seat_bits() -> Dict[str, int]:
+    bits: Dict[str, int] = {}
+    for row_idx, row_seats in enumerate(SEAT_MAP):
+        for col_idx, seat in enumerate(row_seats):
+            if seat:
+                bits[seat] = 1 << (row_idx * SEAT_MAP_WIDTH + col_idx)
+    return bits
+
+
+SEAT_BITS: Dict[str, int] = _build_seat_bits()
+ALL_SEATS_MASK = sum(SEAT_BITS.values())
+
+# (huruf baris, [(kode kursi, bit), ...]) untuk baris yang memiliki kursi.
+_ROW_LAYOUT: List[Tuple[str, List[Tuple[str, int]]]] = [
+    (next(s for s in row_seats if s)[0], [(s, SEAT_BITS[s]) for s in row_seats if s])
+    for row_seats in SEAT_MAP
+    if any(row_seats)
+]
+
+
+def _build_row_segments() -> List[Tuple[int, List[Tuple[int, str, int]]]]:
+    """Split every row at its ``None`` aisle gaps into (row, [(col, seat, bit)])."""
+    segments = []
+    for row_idx, row_seats in enumerate(SEAT_MAP):
+        current: List[Tuple[int, str, int]] = []
+        for col_idx, seat in enumerate(row_seats):
+            if seat:
+                current.append((col_idx, seat, SEAT_BITS[seat]))
+            elif current:
+                segments.append((row_idx, current))
+                current = []
+        if current:
+            segments.append((row_idx, current))
+    return segments
+
+
+ROW_SEGMENTS = _build_row_segments()
+
+_SEATED_ROWS = sorted({row_idx for row_idx, _ in ROW_SEGMENTS})
+_CENTER_ROW = (_SEATED_ROWS[0] + _SEATED_ROWS[-1]) / 2 if _SEATED_ROWS else 0.0
+_CENTER_COL = (SEAT_MAP_WIDTH - 1) / 2
+
+
+@lru_cache(maxsize=None)
+def seat_runs(count: int) -> Tuple[Tuple[float, int, Tuple[str, ...]], ...]:
+    """All runs of ``count`` adjacent seats as (score, mask, seats), best first.
+
+    The score is the normalised distance of the run's centre to the centre of
+    the hall, so lower is better. Runs never cross an aisle gap or empty row.
+    """
+    runs = []
+    row_span = max(_SEATED_ROWS[-1] - _SEATED_ROWS[0], 1) if _SEATED_ROWS else 1
+    for row_idx, segment in ROW_SEGMENTS:
+        for start in range(len(segment) - count + 1):
+            window = segment[start : start + count]
+            mid_col = (window[0][0] + window[-1][0]) / 2
+            score = abs(mid_col - _CENTER_COL) / SEAT_MAP_WIDTH + abs(row_idx - _CENTER_ROW) / row_span
+            runs.append((round(score, 6), sum(bit for _, _, bit in window), tuple(seat for _, seat, _ in window)))
+    runs.sort(key=lambda run: (run[0], run[1]))
+    return tuple(runs)
+
+
+def best_runs(occupied: int, count: int, top_k: int = 3) -> List[Tuple[str, ...]]:
+    """Return up to ``top_k`` free runs of ``count`` adjacent seats, best first."""
+    if count < 1 or top_k < 1:
+        return []
+    found: List[Tuple[str, ...]] = []
+    for _, run_mask, seats in seat_runs(count):
+        if not run_mask & occupied:
+            found.append(seats)
+            if len(found) >= top_k:
+                break
+    return found
+
+
+def seats_to_mask(seats: Iterable[str]) -> int:
+    """Convert seat codes to a bitmap, ignoring codes outside ``SEAT_MAP``."""
+    mask = 0
+    for seat in seats:
+        mask |= SEAT_BITS.get(seat, 0)
+    return mask
+
+
+def seats_in_mask(mask: int, seats: Iterable[str]) -> List[str]:
+    """Return the seats of ``seats`` whose bit is set in ``mask``."""
+    return [seat for seat in seats if mask & SEAT_BITS.get(seat, 0)]
+
+
+def mask_to_seats(mask: int) -> List[str]:
+    """Return the seat codes set in ``mask`` in ``SEAT_MAP`` order."""
+    return [seat for _, row in _ROW_LAYOUT for seat, bit in row if mask & bit]
+
+
+@lru_cache(maxsize=1024)
+def available_rows(free_mask: int) -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+    """Group the free seats of ``free_mask`` per row letter (cached per bitmap)."""
+    rows = []
+    for row_letter, row in _ROW_LAYOUT:
+        free_in_row = tuple(seat for seat, bit in row if free_mask & bit)
+        if free_in_row:
+            rows.append((row_letter, free_in_row))
+    return tuple(rows)
+
+
+class SeatOccupancyIndex:
+    """Occupied-seat bitmaps per showtime, loaded lazily from the bookings table.
+
+    Loads run outside the lock; bookings committed while a load is in flight
+    are parked in ``_pending`` and merged when the load finishes, so neither
+    the sync nor the async loader can lose a concurrent commit.
+
+    Bookings made by another process (file SQLite or PostgreSQL shared by
+    several workers) never reach :meth:`mark_booked`, so a bitmap older than
+    ``ttl`` seconds is reloaded on its next read. ``ttl=None`` keeps bitmaps
+    until :meth:`invalidate`, which is what the shared index does on the
+    in-memory database (only this process can write it). A load that started before an
+    :meth:`invalidate` returns its result but does not install it.
+    """
+
+    def __init__(
+        self,
+        bind=None,
+        async_bind=None,
+        ttl: Union[None, float, Callable[[], Optional[float]]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._bind = bind
+        self._async_bind = async_bind
+        # Boleh berupa fungsi, dievaluasi sekali saat pertama dibutuhkan (lihat _default_ttl).
+        self._ttl = ttl
+        self._clock = clock
+        self._bitmaps: Dict[int, int] = {}
+        self._loaded_at: Dict[int, float] = {}
+        self._loading: Dict[int, int] = {}
+        self._pending: Dict[int, int] = {}
+        # Dinaikkan oleh invalidate(); load yang dimulai sebelumnya tidak dipasang.
+        self._epoch = 0
+        self._generations: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def bind(self):
+        return self._bind if self._bind is not None else get_engine()
+
+    @property
+    def async_bind(self):
+        return self._async_bind if self._async_bind is not None else get_async_engine()
+
+    @property
+    def ttl(self) -> Optional[float]:
+        if callable(self._ttl):
+            self._ttl = self._ttl()
+        return self._ttl
+
+    @staticmethod
+    def _load_stmt(showtime_id: int):
+        return select(bookings_table.c.seat).where(bookings_table.c.showtime_id == showtime_id)
+
+    def _cached(self, showtime_id: int) -> Optional[int]:
+        bitmap = self._bitmaps.get(showtime_id)
+        if bitmap is None or not self.ttl:
+            return bitmap
+        if self._clock() - self._loaded_at.get(showtime_id, 0.0) >= self.ttl:
+            return None
+        return bitmap
+
+    def _begin_load(self, showtime_id: int) -> Tuple[int, int]:
+        with self._lock:
+            self._loading[showtime_id] = self._loading.get(showtime_id, 0) + 1
+            return self._epoch, self._generations.get(showtime_id, 0)
+
+    def _finish_load(self, showtime_id: int, loaded: Optional[int], token: Tuple[int, int]) -> int:
+        with self._lock:
+            remaining = self._loading.get(showtime_id, 1) - 1
+            if remaining:
+                self._loading[showtime_id] = remaining
+                pending = self._pending.get(showtime_id, 0)
+            else:
+                self._loading.pop(showtime_id, None)
+                pending = self._pending.pop(showtime_id, 0)
+            if loaded is None:
+                return 0
+            # Hasil load menggantikan bitmap lama (bukan di-OR) supaya booking yang
+            # dihapus di database ikut hilang; commit selama load ada di ``pending``.
+            bitmap = loaded | pending
+            if token == (self._epoch, self._generations.get(showtime_id, 0)):
+                self._bitmaps[showtime_id] = bitmap
+                self._loaded_at[showtime_id] = self._clock()
+            return bitmap
+
+    def occupied(self, showtime_id: int) -> int:
+        bitmap = self._cached(showtime_id)
+        if bitmap is not None:
+            return bitmap
+        token = self._begin_load(showtime_id)
+        loaded = None
+        try:
+            with self.bind.connect() as conn:
+                loaded = seats_to_mask(row.seat for row in conn.execute(self._load_stmt(showtime_id)))
+        finally:
+            bitmap = self._finish_load(showtime_id, loaded, token)
+        return bitmap
+
+    async def aoccupied(self, showtime_id: int) -> int:
+        """Async variant of :meth:`occupied` using the async engine."""
+        bitmap = self._cached(showtime_id)
+        if bitmap is not None:
+            return bitmap
+        token = self._begin_load(showtime_id)
+        loaded = None
+        try:
+            async with self.async_bind.connect() as conn:
+                result = await conn.execute(self._load_stmt(showtime_id))
+                loaded = seats_to_mask(row.seat for row in result)
+        finally:
+            bitmap = self._finish_load(showtime_id, loaded, token)
+        return bitmap
+
+    def free(self, showtime_id: int) -> int:
+        return ALL_SEATS_MASK & ~self.occupied(showtime_id)
+
+    def seats_left(self, showtime_id: int) -> int:
+        return self.free(showtime_id).bit_count()
+
+    def is_available(self, showtime_id: int, seats: Iterable[str]) -> bool:
+        return not (self.occupied(showtime_id) & seats_to_mask(seats))
+
+    def taken(self, showtime_id: int, seats: Iterable[str]) -> List[str]:
+        """Return the subset of ``seats`` that is already booked."""
+        return seats_in_mask(self.occupied(showtime_id), seats)
+
+    def mark_booked(self, showtime_id: int, seats: Iterable[str]) -> None:
+        """Record committed bookings; unloaded showtimes pick them up on first load."""
+        mask = seats_to_mask(seats)
+        with self._lock:
+            if showtime_id in self._bitmaps:
+                self._bitmaps[showtime_id] |= mask
+            if showtime_id in self._loading:
+                self._pending[showtime_id] = self._pending.get(showtime_id, 0) | mask
+
+    def invalidate(self, showtime_id: Optional[int] = None) -> None:
+        """Drop cached bitmaps (and parked commits) so the next read reloads them."""
+        with self._lock:
+            if showtime_id is None:
+                self._bitmaps.clear()
+                self._loaded_at.clear()
+                self._pending.clear()
+                self._epoch += 1
+            else:
+                self._bitmaps.pop(showtime_id, None)
+                self._loaded_at.pop(showtime_id, None)
+                self._pending.pop(showtime_id, None)
+                self._generations[showtime_id] = self._generations.get(showtime_id, 0) + 1
+
+
+def _default_ttl() -> Optional[float]:
+    """``TIKETA_SEAT_INDEX_TTL`` seconds (``0`` = never), default 5 s, none for the in-memory DB."""
+    raw = os.getenv("TIKETA_SEAT_INDEX_TTL")
+    if raw is None:
+        return None if get_database_config().is_memory else DEFAULT_TTL_SECONDS
+    return float(raw) or None
+
+
+seat_index = SeatOccupancyIndex(ttl=_default_ttl)